@@ -0,0 +1,87 @@
+"""Latency benchmark for the streaming chat client against the mock server.
+
+Measures time-to-first-token, decode rate and per-request overhead with the
+pooled keep-alive session, and compares it with opening a new session (and
+TCP connection) for every request.
+
+    python src/benchmarks/bench_chat.py
+    python src/benchmarks/bench_chat.py --requests 200 --ttft 0 --itl 0 --json chat.json
+    python src/benchmarks/bench_chat.py --url http://localhost:8000/v1 --model facebook/opt-125m
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from llm.chat_client import ChatClient
+from llm.mock_server import MockServer
+from utils.stats import percentile
+
+
+def run_requests(make_client, model, count, max_tokens):
+    """Send count sequential requests; returns per-request stats"""
+    ttfts, durations, rates = [], [], []
+    for i in range(count):
+        client = make_client()
+        result = client.chat([{"role": "user", "content": f"Benchmark request {i}"}], model=model, max_tokens=max_tokens)
+        durations.append(result.duration * 1000)
+        if result.ttft is not None:
+            ttfts.append(result.ttft * 1000)
+        if result.tokens_per_s:
+            rates.append(result.tokens_per_s)
+    return {
+        "requests": count,
+        "ttft_p50_ms": round(percentile(ttfts, 0.50), 3) if ttfts else None,
+        "ttft_p99_ms": round(percentile(ttfts, 0.99), 3) if ttfts else None,
+        "request_p50_ms": round(percentile(durations, 0.50), 3),
+        "request_p99_ms": round(percentile(durations, 0.99), 3),
+        "tokens_per_s": round(statistics.median(rates), 1) if rates else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming chat client")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--max-tokens", type=int, default=32)
+    parser.add_argument("--ttft", type=float, default=0.0, help="mock server delay before the first token (s)")
+    parser.add_argument("--itl", type=float, default=0.0, help="mock server delay between tokens (s)")
+    parser.add_argument("--url", help="benchmark a real endpoint instead of the mock server")
+    parser.add_argument("--model", default="mock-model")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = MockServer(ttft=args.ttft, itl=args.itl).start()
+        url = server.url
+
+    try:
+        pooled = ChatClient(url, args.model)
+        results = {
+            "pooled_session": run_requests(lambda: pooled, args.model, args.requests, args.max_tokens),
+            "session_per_request": run_requests(
+                lambda: ChatClient(url, args.model), args.model, args.requests, args.max_tokens
+            )
+        }
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(f"{'scenario':24} {'TTFT p50':>10} {'TTFT p99':>10} {'req p50':>10} {'req p99':>10} {'tok/s':>10}")
+    for name, stats in results.items():
+        print(f"{name:24} {stats['ttft_p50_ms']:>10} {stats['ttft_p99_ms']:>10} {stats['request_p50_ms']:>10} "
+              f"{stats['request_p99_ms']:>10} {stats['tokens_per_s']!s:>10}")
+
+    if args.json:
+        report = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "url": url, "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
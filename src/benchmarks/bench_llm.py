@@ -0,0 +1,255 @@
+"""Load test for OpenAI-compatible LLM endpoints (vLLM or the bundled mock server).
+
+Replays a prompt mix with asyncio, either closed-loop at a fixed concurrency
+or open-loop at a Poisson arrival rate, and reports time-to-first-token,
+inter-token latency, end-to-end latency and tokens/s with p50/p95/p99.
+
+    python src/benchmarks/bench_llm.py --mock --concurrency 16 --requests 200
+    python src/benchmarks/bench_llm.py --endpoint local --rate 4 --duration 60 --json load.json
+    python src/benchmarks/bench_llm.py --url http://gpu-box:8000/v1 --model my-model --prompts prompts.jsonl
+
+A prompts file is JSON Lines with "prompt" (or "messages"), and optional
+"weight" and "max_tokens" per line; a plain text file is one prompt per line.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from llm.chat_client import AsyncChatClient, ChatError
+from llm.mock_server import MockServer
+from utils.config import get_config
+from utils.stats import distribution
+
+DEFAULT_PROMPTS = [
+    {"prompt": "Say hello.", "max_tokens": 16, "weight": 3},
+    {"prompt": "Explain what ROCm is in two sentences.", "max_tokens": 96, "weight": 2},
+    {"prompt": "Write a short Python function that checks whether a GPU is visible to PyTorch, "
+               "then explain each line.", "max_tokens": 256, "weight": 1}
+]
+
+
+def load_prompts(path):
+    """Read a prompt mix; returns a list of {"messages", "max_tokens", "weight"}"""
+    if path is None:
+        entries = DEFAULT_PROMPTS
+    else:
+        text = Path(path).read_text(encoding="utf-8")
+        entries = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                entries.append(json.loads(line))
+            else:
+                entries.append({"prompt": line})
+    prompts = []
+    for entry in entries:
+        messages = entry.get("messages") or [{"role": "user", "content": entry["prompt"]}]
+        prompts.append({
+            "messages": messages,
+            "max_tokens": entry.get("max_tokens"),
+            "weight": entry.get("weight", 1)
+        })
+    return prompts
+
+
+class LoadTest:
+    """Send requests from a prompt mix and collect one record per request"""
+
+    def __init__(self, client, prompts, max_tokens=None, temperature=0.0, seed=0):
+        self.client = client
+        self.prompts = prompts
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.random = random.Random(seed)
+        self.records = []
+        self.t0 = time.perf_counter()  # request start offsets are relative to this
+
+    def _next_prompt(self):
+        return self.random.choices(self.prompts, weights=[p["weight"] for p in self.prompts])[0]
+
+    async def one_request(self, index, record=True):
+        prompt = self._next_prompt()
+        params = {"temperature": self.temperature}
+        max_tokens = self.max_tokens or prompt["max_tokens"]
+        if max_tokens:
+            params["max_tokens"] = max_tokens
+        started = time.perf_counter()
+        entry = {"index": index, "start": round(started - self.t0, 6)}
+        try:
+            result = await self.client.chat(prompt["messages"], **params)
+            entry.update(
+                ok=True,
+                ttft=result.ttft,
+                e2e=result.duration,
+                tokens=result.tokens,
+                tokens_per_s=result.tokens_per_s,
+                itl=result.inter_token_latencies
+            )
+        except ChatError as e:
+            entry.update(ok=False, error=str(e), e2e=time.perf_counter() - started)
+        if record:
+            self.records.append(entry)
+        return entry
+
+    async def run_concurrency(self, concurrency, count, duration):
+        """Closed loop: concurrency workers each send their next request when the last finishes"""
+        deadline = time.perf_counter() + duration if duration else None
+        counter = iter(range(count or sys.maxsize))
+
+        async def worker():
+            for index in counter:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                await self.one_request(index)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def run_rate(self, rate, count, duration):
+        """Open loop: start requests at Poisson arrival times regardless of completions"""
+        tasks = []
+        start = time.perf_counter()
+        next_at = start
+        index = 0
+        while (not count or index < count) and (not duration or next_at - start < duration):
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(self.one_request(index)))
+            index += 1
+            next_at += self.random.expovariate(rate)
+        await asyncio.gather(*tasks)
+
+
+def summarize_records(records, wall_time):
+    ok = [r for r in records if r["ok"]]
+    errors = [r for r in records if not r["ok"]]
+    output_tokens = sum(r["tokens"] for r in ok)
+    return {
+        "requests": len(records),
+        "succeeded": len(ok),
+        "failed": len(errors),
+        "error_samples": sorted({r["error"] for r in errors})[:5],
+        "wall_time_s": round(wall_time, 3),
+        "requests_per_s": round(len(ok) / wall_time, 3) if wall_time else None,
+        "output_tokens_per_s": round(output_tokens / wall_time, 1) if wall_time else None,
+        "ttft_ms": distribution([r["ttft"] for r in ok if r["ttft"] is not None]),
+        "itl_ms": distribution([gap for r in ok for gap in r["itl"]]),
+        "e2e_ms": distribution([r["e2e"] for r in ok]),
+        "tokens_per_s": distribution([r["tokens_per_s"] for r in ok if r["tokens_per_s"]], scale=1),
+        "output_tokens": distribution([r["tokens"] for r in ok], scale=1)
+    }
+
+
+def print_summary(summary):
+    print(f"requests: {summary['succeeded']} ok, {summary['failed']} failed in {summary['wall_time_s']}s "
+          f"({summary['requests_per_s']} req/s, {summary['output_tokens_per_s']} output tokens/s)")
+    print(f"{'metric':18} {'p50':>10} {'p95':>10} {'p99':>10} {'mean':>10} {'max':>10}")
+    for name in ("ttft_ms", "itl_ms", "e2e_ms", "tokens_per_s", "output_tokens"):
+        stats = summary[name]
+        if stats:
+            print(f"{name:18} {stats['p50']:>10} {stats['p95']:>10} {stats['p99']:>10} "
+                  f"{stats['mean']:>10} {stats['max']:>10}")
+    for error in summary["error_samples"]:
+        print(f"  error: {error}")
+
+
+async def run(args, url, model):
+    client = AsyncChatClient(url, model, timeout=args.timeout, max_connections=args.max_connections,
+                             client_id="bench")
+    test = LoadTest(client, load_prompts(args.prompts), args.max_tokens, args.temperature, args.seed)
+    try:
+        for i in range(args.warmup):
+            await test.one_request(-1 - i, record=False)
+        start = test.t0 = time.perf_counter()
+        if args.rate:
+            await test.run_rate(args.rate, args.requests, args.duration)
+        else:
+            await test.run_concurrency(args.concurrency, args.requests, args.duration)
+        wall_time = time.perf_counter() - start
+    finally:
+        await client.close()
+    return test.records, wall_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test an OpenAI-compatible chat endpoint")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--endpoint", help="llm_endpoints entry in llm_config.yaml (default: first enabled)")
+    target.add_argument("--url", help="base URL, e.g. http://localhost:8000/v1")
+    target.add_argument("--mock", action="store_true", help="start the bundled mock server and test it")
+    parser.add_argument("--model", help="model name (default: from the config endpoint)")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=8, help="closed loop: requests in flight")
+    load.add_argument("--rate", type=float, help="open loop: mean arrivals per second (Poisson)")
+    parser.add_argument("--requests", type=int, default=100, help="total requests (0 = until --duration)")
+    parser.add_argument("--duration", type=float, help="stop starting requests after this many seconds")
+    parser.add_argument("--warmup", type=int, default=2, help="unrecorded requests sent first")
+    parser.add_argument("--prompts", help="prompt mix: .jsonl or one prompt per line")
+    parser.add_argument("--max-tokens", type=int, help="override max_tokens for every prompt")
+    parser.add_argument("--temperature", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0, help="seed for prompt choice and arrivals")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--max-connections", type=int, default=256)
+    parser.add_argument("--mock-ttft", type=float, default=0.05)
+    parser.add_argument("--mock-itl", type=float, default=0.01)
+    parser.add_argument("--json", help="write the full report (summary and per-request records) here")
+    args = parser.parse_args()
+    if not args.requests and not args.duration:
+        parser.error("--requests 0 needs --duration")
+
+    server = None
+    if args.mock:
+        server = MockServer(ttft=args.mock_ttft, itl=args.mock_itl).start()
+        url, model = server.url, args.model or server.settings.model
+    elif args.url:
+        url, model = args.url, args.model
+        if not model:
+            parser.error("--url needs --model")
+    else:
+        endpoint = get_config().endpoint(args.endpoint)
+        url, model = endpoint.url, args.model or endpoint.model
+
+    try:
+        records, wall_time = asyncio.run(run(args, url, model))
+    finally:
+        if server is not None:
+            server.stop()
+
+    summary = summarize_records(records, wall_time)
+    print(f"{url} model={model} " + (f"rate={args.rate}/s" if args.rate else f"concurrency={args.concurrency}"))
+    print_summary(summary)
+
+    if args.json:
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "url": url,
+                "model": model,
+                "mode": "rate" if args.rate else "concurrency",
+                "rate": args.rate,
+                "concurrency": None if args.rate else args.concurrency,
+                "prompts": args.prompts,
+                "max_tokens": args.max_tokens,
+                "seed": args.seed
+            },
+            "summary": summary,
+            "records": [{key: value for key, value in r.items() if key != "itl"} for r in records]
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Rerun-latency benchmark for the Streamlit GUI using streamlit.testing AppTest.
+
+Every widget interaction reruns src/gui/streamlit_app.py. This drives each
+tab's buttons (with the wsl/powershell/docker shims from shims.py on PATH,
+and the chat tab pointed at the bundled mock server), records wall time and
+Python allocations per interaction, and appends the summary to a JSON Lines
+history file (logs/benchmarks/rerun_history.jsonl by default) so rerun
+latency can be tracked across versions.
+
+    python src/benchmarks/bench_rerun.py
+    python src/benchmarks/bench_rerun.py --repeat 10 --history rerun_history.jsonl
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks.shims import shims_on_path
+from llm.mock_server import MockServer
+from utils.config import CONFIG_PATH, ConfigLoader, get_config_loader, set_config_loader
+from utils.job_manager import get_job_manager
+from utils.tracing import Tracer, set_tracer
+
+APP_PATH = Path(__file__).parent.parent / "gui" / "streamlit_app.py"
+RESULTS_DIR = Path(__file__).parent.parent.parent / "logs" / "benchmarks"
+DEFAULT_HISTORY = RESULTS_DIR / "rerun_history.jsonl"
+MOCK_CONFIG = RESULTS_DIR / "rerun_llm_config.yaml"
+
+
+def find_button(at, label):
+    """Return the first button whose label contains label"""
+    for button in at.button:
+        if label in button.label:
+            return button
+    raise LookupError(f"No button labelled {label!r}; have {[b.label for b in at.button]}")
+
+
+def wait_for_jobs(timeout=30):
+    """Let background jobs started by an interaction finish before the next one"""
+    deadline = time.monotonic() + timeout
+    while get_job_manager().running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def click(label):
+    def interact(at):
+        find_button(at, label).click()
+    return interact
+
+
+def send_chat(at):
+    at.text_input[0].input("Hello from the benchmark")
+    find_button(at, "Send").click()
+
+
+# Tabs only render when selected (lazy tabs), and AppTest does not keep the
+# selection between runs, so each interaction presets the tab it needs
+COMPATIBILITY = {"active_tab": "✅ Compatibility"}
+INSTALLATION = {"active_tab": "📥 Installation", "compatibility_passed": True}
+DOCKER = {"active_tab": "🐳 Docker & Containers"}
+MODELS = {"active_tab": "🤖 Models & Chat"}
+
+# (name, session state to preset, interaction applied before the rerun)
+INTERACTIONS = [
+    ("idle_rerun", {}, None),
+    ("sidebar_view_logs", {}, click("View Full Logs")),
+    ("sidebar_check_wsl", {}, click("Check WSL Environment")),
+    ("compatibility_check", COMPATIBILITY, click("Run Compatibility Check")),
+    ("install_wsl2", INSTALLATION, click("Install WSL2")),
+    ("test_rocm", INSTALLATION, click("Test ROCm")),
+    ("test_pytorch", INSTALLATION, click("Test PyTorch")),
+    ("docker_build_vllm", DOCKER, click("Build vLLM Container")),
+    ("chat_send", MODELS, send_chat),
+    ("sidebar_reset", {}, click("Reset Installation"))
+]
+
+
+def timed_run(at, trace_allocations=False):
+    """Rerun the app; return (seconds, peak allocated KB, net allocated KB).
+
+    Allocation tracing slows the rerun down noticeably, so timed samples
+    and allocation samples are taken on separate reruns.
+    """
+    if trace_allocations:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    peak = net = None
+    if trace_allocations:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak, net = (peak - before) / 1024, (current - before) / 1024
+    if at.exception:
+        raise RuntimeError(f"App raised: {at.exception[0].value}")
+    return elapsed, peak, net
+
+
+def run_interaction(at, state, interact, trace_allocations=False):
+    def preset():
+        for key, value in state.items():
+            at.session_state[key] = value
+
+    if state:
+        preset()
+        at.run()  # render the tab so its widgets exist
+        preset()
+    if interact is not None:
+        interact(at)
+    result = timed_run(at, trace_allocations)
+    wait_for_jobs()
+    return result
+
+
+def run_benchmark(repeat, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+    elapsed, _, _ = timed_run(at)
+    results["initial_load"] = {"samples_ms": [round(elapsed * 1000, 2)]}
+
+    for name, state, interact in INTERACTIONS:
+        samples = [
+            round(run_interaction(at, state, interact)[0] * 1000, 2)
+            for _ in range(repeat)
+        ]
+        _, peak, net = run_interaction(at, state, interact, trace_allocations=True)
+        results[name] = {"samples_ms": samples, "peak_alloc_kb": round(peak, 1), "net_alloc_kb": round(net, 1)}
+
+    for stats in results.values():
+        stats["p50_ms"] = round(statistics.median(stats["samples_ms"]), 2)
+        stats["max_ms"] = max(stats["samples_ms"])
+    return results
+
+
+@contextmanager
+def mock_llm_config():
+    """Point the config (and so the chat tab) at the bundled mock server instead of a real endpoint"""
+    server = MockServer(ttft=0.01, itl=0.001).start()
+    previous = get_config_loader()
+    try:
+        data = yaml.safe_load(CONFIG_PATH.read_text(encoding="utf-8"))
+        data["llm_endpoints"] = {"mock": {"url": server.url, "model": server.settings.model, "context_tokens": 2048}}
+        data.pop("gateway", None)
+        # Kept after the run: the app's hot-reload watcher may still be watching it
+        MOCK_CONFIG.parent.mkdir(parents=True, exist_ok=True)
+        MOCK_CONFIG.write_text(yaml.safe_dump(data), encoding="utf-8")
+        set_config_loader(ConfigLoader(MOCK_CONFIG))
+        yield server
+    finally:
+        set_config_loader(previous)
+        server.stop()
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=APP_PATH.parent
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Streamlit rerun latency per interaction")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per interaction")
+    parser.add_argument("--timeout", type=float, default=60, help="AppTest timeout per run (s)")
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY), help="JSON Lines file to append results to")
+    parser.add_argument("--label", default="", help="free-form label stored with the results")
+    args = parser.parse_args()
+
+    import streamlit
+
+    set_tracer(Tracer())  # keep spans in memory instead of logs/traces
+    with shims_on_path(), mock_llm_config():
+        results = run_benchmark(args.repeat, args.timeout)
+
+    print(f"{'interaction':24} {'p50 ms':>10} {'max ms':>10} {'peak KB':>10} {'net KB':>10}")
+    for name, stats in results.items():
+        print(f"{name:24} {stats['p50_ms']:>10} {stats['max_ms']:>10} "
+              f"{stats.get('peak_alloc_kb', '-'):>10} {stats.get('net_alloc_kb', '-'):>10}")
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "label": args.label,
+        "streamlit": streamlit.__version__,
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "results": results
+    }
+    history = Path(args.history)
+    history.parent.mkdir(parents=True, exist_ok=True)
+    with open(history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"\nAppended results to {history}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Micro-benchmarks for the subprocess helpers used by the Streamlit GUI.
+
+Runs run_powershell_script, run_wsl_command, docker_installed and
+load_config against fake executables placed on PATH (see shims.py), so the
+numbers can be collected on Linux without Windows, WSL or Docker. Docker
+status checks are also measured over the Engine API against a fake daemon
+(see fake_docker_engine.py).
+
+    python src/benchmarks/bench_subprocess.py
+    python src/benchmarks/bench_subprocess.py --json results.json
+    python src/benchmarks/bench_subprocess.py --baseline results.json --tolerance 0.25
+
+With --baseline, the run fails (exit code 1) if any scenario's p50 latency
+is slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks.fake_docker_engine import FakeDockerEngine
+from benchmarks.shims import shims_on_path, configure
+from utils import system_commands
+from utils.docker_api import DockerAPI, set_docker_api
+from utils.stats import percentile
+from utils.probe_cache import get_probe_cache
+from utils.tracing import Tracer, set_tracer
+from utils.wsl_session import get_wsl_pool
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def measure(fn, iterations, setup=None):
+    """Time fn() iterations times and return latency statistics in ms"""
+    timings = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # One extra call under tracemalloc for the Python-side allocation peak
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "max_ms": round(max(timings), 3),
+        "peak_alloc_kb": round(peak / 1024, 1)
+    }
+
+
+def expect_success(result):
+    success, output = result
+    if not success:
+        raise RuntimeError(f"Benchmark command failed: {output[-500:]}")
+    return output
+
+
+def run_scenarios(iterations, lines, latency):
+    """Run every scenario and return {name: stats}"""
+    results = {}
+    line_bytes = 80
+
+    # Process spawn + capture with no output
+    configure(latency=latency)
+    results["powershell_spawn"] = measure(
+        lambda: expect_success(system_commands.run_powershell_script("detect_hardware.ps1")), iterations
+    )
+
+    # Output capture throughput
+    configure(latency=0, lines=lines, line_bytes=line_bytes)
+    stats = measure(
+        lambda: expect_success(system_commands.run_powershell_script("detect_hardware.ps1")),
+        max(iterations // 10, 3)
+    )
+    stats["lines_per_s"] = round(lines / (stats["p50_ms"] / 1000))
+    stats["mb_per_s"] = round(lines * (line_bytes + 1) / (stats["p50_ms"] / 1000) / 1e6, 1)
+    results["powershell_output_throughput"] = stats
+
+    # WSL: first command on a fresh session (attach + shell start) vs pooled reuse
+    configure(latency=latency)
+    pool = get_wsl_pool()
+    results["wsl_cold"] = measure(
+        lambda: expect_success(system_commands.run_wsl_command("true")), iterations, setup=pool.close
+    )
+    results["wsl_warm"] = measure(lambda: expect_success(system_commands.run_wsl_command("true")), iterations)
+    results["wsl_batch_3_probes"] = measure(
+        lambda: system_commands.run_wsl_batch(["true", "echo probe", "uname"]), iterations
+    )
+
+    command = f"yes '{'x' * line_bytes}' | head -n {lines}"
+    stats = measure(lambda: expect_success(system_commands.run_wsl_command(command)), max(iterations // 10, 3))
+    stats["lines_per_s"] = round(lines / (stats["p50_ms"] / 1000))
+    stats["mb_per_s"] = round(lines * (line_bytes + 1) / (stats["p50_ms"] / 1000) / 1e6, 1)
+    results["wsl_output_throughput"] = stats
+    pool.close()
+
+    # Docker probe: every call spawns vs served from the probe cache vs one Engine API round trip
+    cache = get_probe_cache()
+    set_docker_api(DockerAPI("unix:///nonexistent/docker.sock"))  # no daemon: fall back to the CLI shim
+    results["docker_probe_uncached"] = measure(
+        system_commands.docker_installed, iterations, setup=lambda: cache.invalidate("docker")
+    )
+    results["docker_probe_cached"] = measure(system_commands.docker_installed, iterations)
+    with FakeDockerEngine() as engine:
+        engine.add_container("rocm-vllm-local")
+        api = DockerAPI(engine.host)
+        set_docker_api(api)
+        results["docker_probe_api"] = measure(
+            system_commands.docker_installed, iterations, setup=lambda: cache.invalidate("docker")
+        )
+        results["docker_inspect_api"] = measure(lambda: api.inspect_container("rocm-vllm-local"), iterations)
+        set_docker_api(None)
+
+    results["load_config"] = measure(system_commands.load_config, iterations)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions against a baseline report"""
+    regressions = []
+    for name, stats in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous and stats["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {stats['p50_ms']}ms vs baseline {previous['p50_ms']}ms")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'scenario':32} {'p50 ms':>10} {'p99 ms':>10} {'mean ms':>10} {'peak KB':>10}  extra")
+    for name, stats in results.items():
+        extra = ""
+        if "lines_per_s" in stats:
+            extra = f"{stats['lines_per_s']:,} lines/s, {stats['mb_per_s']} MB/s"
+        print(f"{name:32} {stats['p50_ms']:>10} {stats['p99_ms']:>10} {stats['mean_ms']:>10} "
+              f"{stats['peak_alloc_kb']:>10}  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the GUI subprocess helpers against shims")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=200000, help="output lines for throughput scenarios")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated process start latency (s)")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown vs baseline")
+    args = parser.parse_args()
+
+    set_tracer(Tracer())  # keep spans in memory instead of logs/traces
+    with shims_on_path():
+        results = run_scenarios(args.iterations, args.lines, args.latency)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "lines": args.lines,
+            "latency": args.latency,
+            # The benchmark process only. RUSAGE_CHILDREN is no substitute: a forked child's
+            # peak includes the parent's memory at fork time, whatever the shim itself uses
+            "parent_max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+        },
+        "results": results
+    }
+    print_table(results)
+    if report["meta"]["parent_max_rss_kb"]:
+        print(f"\nPeak RSS of the benchmark process (not the shims it spawns): {report['meta']['parent_max_rss_kb']} KB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
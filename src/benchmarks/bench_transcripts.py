@@ -0,0 +1,106 @@
+"""Benchmark the transcript store as the corpus grows.
+
+Fills a temporary store with synthetic conversations in steps and, after
+each step, measures full-text search, recent-conversation listing and
+loading one conversation, so it shows whether lookups stay in milliseconds.
+
+    python src/benchmarks/bench_transcripts.py
+    python src/benchmarks/bench_transcripts.py --steps 1000 5000 20000 --json transcripts.json
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from llm.transcripts import TranscriptStore
+from utils.stats import percentile
+
+# Word frequencies in text follow Zipf's law: a few words are everywhere, most are rare
+VOCABULARY = ("rocm pytorch driver install docker container vllm model token prompt gpu memory kernel "
+              "wsl ubuntu python error version cache latency throughput batch server port config "
+              "radeon compile build image layer volume mount network timeout retry").split()
+VOCABULARY += ["".join(random.Random(i).choices("abcdefghijklmnopqrstuvwxyz", k=7)) for i in range(5000)]
+WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+
+
+def sentence(rng, words=24):
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=words))
+
+
+def fill(store, rng, conversations, turns):
+    """Add conversations of turns user/assistant pairs; returns their ids"""
+    ids = []
+    for _ in range(conversations):
+        conversation_id = uuid.uuid4().hex
+        ids.append(conversation_id)
+        for _ in range(turns):
+            store.add(conversation_id, "user", sentence(rng, 12), model="bench-model")
+            store.add(conversation_id, "assistant", sentence(rng, 48), model="bench-model")
+    store.flush(timeout=600)
+    return ids
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(percentile(samples, 0.50), 3), "p99_ms": round(percentile(samples, 0.99), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript search as the corpus grows")
+    parser.add_argument("--steps", type=int, nargs="+", default=[1000, 5000, 10000],
+                        help="total conversations after each step")
+    parser.add_argument("--turns", type=int, default=4, help="user/assistant pairs per conversation")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        store = TranscriptStore(Path(directory) / "transcripts.sqlite")
+        ids = []
+        try:
+            for total in args.steps:
+                added = total - len(ids)
+                start = time.perf_counter()
+                ids += fill(store, rng, added, args.turns)
+                insert_s = time.perf_counter() - start
+                queries = [sentence(rng, 2) for _ in range(args.repeat)]
+                query_iter = iter(queries * 2)
+                results.append({
+                    "conversations": len(ids),
+                    "messages": store.stats()["messages"],
+                    "insert_messages_per_s": round(added * args.turns * 2 / insert_s) if insert_s else None,
+                    "search": timed(lambda: store.search(next(query_iter), limit=20), args.repeat),
+                    "recent": timed(lambda: store.conversations(limit=50), args.repeat),
+                    "load_conversation": timed(lambda: store.messages(rng.choice(ids)), args.repeat)
+                })
+        finally:
+            store.close()
+
+    print(f"{'conversations':>14} {'messages':>10} {'insert msg/s':>13} {'search p50':>11} {'search p99':>11} "
+          f"{'recent p50':>11} {'load p50':>9}")
+    for r in results:
+        print(f"{r['conversations']:>14} {r['messages']:>10} {r['insert_messages_per_s']!s:>13} "
+              f"{r['search']['p50_ms']:>11} {r['search']['p99_ms']:>11} {r['recent']['p50_ms']:>11} "
+              f"{r['load_conversation']['p50_ms']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "turns": args.turns, "results": results},
+                      f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
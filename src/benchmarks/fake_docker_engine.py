@@ -0,0 +1,279 @@
+"""A fake Docker Engine API server for exercising utils.docker_api without Docker.
+
+Serves the endpoints the client uses over a Unix socket (or TCP where Unix
+sockets are unavailable), with HTTP/1.1 keep-alive and chunked streaming
+like the real daemon. Builds stream one message per Dockerfile line from the
+uploaded context; pulls stream layer progress.
+
+    with FakeDockerEngine(build_delay=0.01) as engine:
+        engine.add_container("rocm-vllm-local", labels={"rocm-installer.role": "vllm"})
+        api = DockerAPI(engine.host)
+
+engine.connections counts accepted connections, so tests can check reuse.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import socketserver
+import tarfile
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, unquote, urlsplit
+
+API_VERSION = "1.47"
+
+
+class FakeEngineHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    engine = None  # set on the bound subclass
+
+    def setup(self):
+        super().setup()
+        with self.engine.lock:
+            self.engine.connections += 1
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading a stream, as the real daemon allows
+
+    def log_message(self, format, *args):
+        pass
+
+    def address_string(self):
+        return "fake-docker-engine"
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        path = re.sub(r"^/v\d+\.\d+", "", parts.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        with self.engine.lock:
+            self.engine.requests += 1
+        return path, query
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Api-Version", API_VERSION)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _send_chunk(self, message):
+        data = (json.dumps(message) + "\r\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _container(self, name):
+        container = self.engine.containers.get(name.lstrip("/"))
+        if container is None:
+            self._send_json(404, {"message": f"No such container: {name}"})
+        return container
+
+    def do_GET(self):
+        path, query = self._route()
+        engine = self.engine
+        if path == "/_ping":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"OK")
+        elif path == "/version":
+            self._send_json(200, {"Version": "99.0.0", "ApiVersion": API_VERSION, "Os": "linux", "Arch": "amd64"})
+        elif path == "/images/json":
+            reference = json.loads(query.get("filters", "{}")).get("reference", [None])[0]
+            images = [image for image in engine.images if reference is None or reference in image["RepoTags"]]
+            self._send_json(200, images)
+        elif path == "/containers/json":
+            labels = json.loads(query.get("filters", "{}")).get("label", [])
+            listed = []
+            for container in engine.containers.values():
+                if not container["State"]["Running"] and query.get("all") != "1":
+                    continue
+                container_labels = container["Config"]["Labels"]
+                if all(container_labels.get(label.partition("=")[0]) == label.partition("=")[2] for label in labels):
+                    listed.append({"Id": container["Id"], "Names": [container["Name"]], "Image": container["Config"]["Image"],
+                                   "State": container["State"]["Status"], "Labels": container_labels})
+            self._send_json(200, listed)
+        elif match := re.fullmatch(r"/images/(.+)/json", path):
+            name = unquote(match.group(1))
+            image = next((image for image in engine.images if name in image["RepoTags"] or name == image["Id"]), None)
+            if image is None:
+                self._send_json(404, {"message": f"No such image: {name}"})
+            else:
+                self._send_json(200, {"Id": image["Id"], "RepoTags": image["RepoTags"], "Size": image["Size"],
+                                      "Config": {"Labels": image["Labels"]}})
+        elif match := re.fullmatch(r"/containers/([^/]+)/json", path):
+            container = self._container(unquote(match.group(1)))
+            if container is not None:
+                self._send_json(200, container)
+        elif match := re.fullmatch(r"/containers/([^/]+)/stats", path):
+            container = self._container(unquote(match.group(1)))
+            if container is not None:
+                self._send_json(200, {
+                    "memory_stats": {"usage": 1536 * 2**20, "limit": 64 * 2**30, "stats": {"inactive_file": 512 * 2**20}},
+                    "cpu_stats": {"cpu_usage": {"total_usage": 4_000_000}, "system_cpu_usage": 100_000_000, "online_cpus": 8},
+                    "precpu_stats": {"cpu_usage": {"total_usage": 2_000_000}, "system_cpu_usage": 90_000_000},
+                    "pids_stats": {"current": 42}
+                })
+        else:
+            self._send_json(404, {"message": f"page not found: {path}"})
+
+    def do_POST(self):
+        path, query = self._route()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if path == "/build":
+            self._build(body, query)
+        elif path == "/images/create":
+            self._pull(query)
+        else:
+            self._send_json(404, {"message": f"page not found: {path}"})
+
+    def _build(self, body, query):
+        dockerfile = query.get("dockerfile", "Dockerfile")
+        try:
+            with tarfile.open(fileobj=io.BytesIO(body)) as tar:
+                names = [name[2:] if name.startswith("./") else name for name in tar.getnames()]
+                member = tar.extractfile(f"./{dockerfile}") if f"./{dockerfile}" in tar.getnames() else None
+                instructions = [line for line in (member.read().decode().splitlines() if member else [])
+                                if line.strip() and not line.lstrip().startswith("#")]
+        except tarfile.TarError as e:
+            self._send_json(500, {"message": f"invalid build context: {e}"})
+            return
+        self._start_stream()
+        if not instructions:
+            self._send_chunk({"errorDetail": {"message": f"Cannot locate specified Dockerfile: {dockerfile}"},
+                              "error": f"Cannot locate specified Dockerfile: {dockerfile}"})
+            self._end_stream()
+            return
+        for step, instruction in enumerate(instructions, 1):
+            time.sleep(self.engine.build_delay)
+            self._send_chunk({"stream": f"Step {step}/{len(instructions)} : {instruction}\n"})
+            if self.engine.fail_build_on and self.engine.fail_build_on in instruction:
+                message = f"The command '/bin/sh -c {instruction}' returned a non-zero code: 1"
+                self._send_chunk({"errorDetail": {"code": 1, "message": message}, "error": message})
+                self._end_stream()
+                return
+        image_id = "sha256:" + hashlib.sha256(body).hexdigest()
+        self._send_chunk({"aux": {"ID": image_id}})
+        self._send_chunk({"stream": f"Successfully built {image_id[7:19]}\n"})
+        if query.get("t"):
+            self._send_chunk({"stream": f"Successfully tagged {query['t']}\n"})
+            self.engine.add_image(query["t"], image_id, json.loads(query.get("labels", "{}")))
+        self.engine.context_files.append(names)
+        self._end_stream()
+
+    def _pull(self, query):
+        image = f"{query['fromImage']}:{query.get('tag', 'latest')}"
+        self._start_stream()
+        self._send_chunk({"status": f"Pulling from {query['fromImage']}", "id": query.get("tag", "latest")})
+        for layer in ("a1b2c3", "d4e5f6"):
+            for done in (25, 50, 100):
+                time.sleep(self.engine.build_delay)
+                self._send_chunk({"status": "Downloading", "id": layer, "progress": f"{done}%",
+                                  "progressDetail": {"current": done, "total": 100}})
+            self._send_chunk({"status": "Pull complete", "id": layer})
+        self._send_chunk({"status": f"Status: Downloaded newer image for {image}"})
+        self.engine.add_image(image, "sha256:" + hashlib.sha256(image.encode()).hexdigest())
+        self._end_stream()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeDockerEngine:
+    """Run the fake daemon on a background thread; host is a DOCKER_HOST value for it"""
+
+    def __init__(self, build_delay=0.0, fail_build_on=None):
+        self.build_delay = build_delay
+        self.fail_build_on = fail_build_on  # Dockerfile text whose step fails, to test error reporting
+        self.containers = {}
+        self.images = []
+        self.context_files = []  # file names of each build context received
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        handler = type("BoundFakeEngineHandler", (FakeEngineHandler,), {"engine": self})
+        self._directory = None
+        if hasattr(socketserver, "UnixStreamServer"):
+            self._directory = tempfile.TemporaryDirectory(prefix="fake_docker_engine_")
+            path = os.path.join(self._directory.name, "docker.sock")
+            self.server = _UnixServer(path, handler)
+            self.host = f"unix://{path}"
+        else:
+            self.server = _TCPServer(("127.0.0.1", 0), handler)
+            self.host = f"tcp://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = None
+
+    def add_container(self, name, image="rocm-vllm:latest", labels=None, running=True):
+        self.containers[name] = {
+            "Id": hashlib.sha256(name.encode()).hexdigest(),
+            "Name": f"/{name}",
+            "RestartCount": 0,
+            "State": {"Status": "running" if running else "exited", "Running": running, "Restarting": False,
+                      "ExitCode": 0, "StartedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+            "Config": {"Image": image, "Labels": dict(labels or {})}
+        }
+
+    def add_image(self, tag, image_id, labels=None):
+        with self.lock:
+            self.images = [image for image in self.images if tag not in image["RepoTags"]]
+            self.images.append({"Id": image_id, "RepoTags": [tag], "Created": int(time.time()), "Size": 0,
+                                "Labels": dict(labels or {})})
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._directory is not None:
+            self._directory.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Docker Engine API")
+    parser.add_argument("--build-delay", type=float, default=0.2, help="delay per build step / pull update (s)")
+    args = parser.parse_args()
+    with FakeDockerEngine(args.build_delay) as engine:
+        print(f"Fake Docker Engine on {engine.host} (Ctrl+C to stop); export DOCKER_HOST={engine.host}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Replay a recorded chat workload against an endpoint.
+
+Requests are sent at the recorded offsets (optionally sped up) with the
+recorded sampling parameters and output lengths, so a vLLM configuration
+can be load tested with the traffic it will actually see. Prompts come from
+the recording when it stored them; otherwise a synthetic prompt of the
+recorded length is sent.
+
+    python src/benchmarks/replay_workload.py logs/workloads/workload_20251119_100000.jsonl.gz --mock
+    python src/benchmarks/replay_workload.py trace.jsonl.gz --endpoint local --speed 2 --json replay.json
+
+The report has the same TTFT / inter-token / end-to-end percentiles as
+bench_llm.py, next to the latencies observed when the trace was recorded.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks.bench_llm import summarize_records, print_summary
+from llm.chat_client import AsyncChatClient, ChatError
+from llm.mock_server import MockServer
+from llm.workload import read_workload
+from utils.config import get_config
+from utils.stats import distribution
+
+FILLER = "the quick brown fox jumps over the lazy dog ".split()
+CHARS_PER_TOKEN = 4  # used to size synthetic prompts when only a length was recorded
+
+
+def synthetic_messages(entry, index):
+    """A prompt of about the recorded size; the index keeps prompts distinct so no prefix cache skews results"""
+    if entry.get("prompt_tokens"):
+        chars = entry["prompt_tokens"] * CHARS_PER_TOKEN
+    else:
+        chars = entry.get("prompt_chars") or 64
+    words = [f"request{index}"]
+    while sum(len(word) + 1 for word in words) < chars:
+        words.append(FILLER[len(words) % len(FILLER)])
+    return [{"role": "user", "content": " ".join(words)}]
+
+
+def replay_params(entry, exact_lengths):
+    params = dict(entry.get("params") or {})
+    if exact_lengths and entry.get("tokens"):
+        # Generate exactly the recorded number of tokens (vLLM extension; others ignore it)
+        params["max_tokens"] = entry["tokens"]
+        params["ignore_eos"] = True
+    return params
+
+
+async def replay(client, entries, speed=1.0, exact_lengths=True, model=None):
+    """Send entries at their recorded offsets divided by speed; returns (records, wall_time)"""
+    records = []
+    start = time.perf_counter()
+
+    async def send(index, entry):
+        delay = start + entry["t"] / speed - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        messages = entry.get("messages") or synthetic_messages(entry, index)
+        began = time.perf_counter()
+        record = {"index": index, "start": round(began - start, 6), "scheduled": round(entry["t"] / speed, 6)}
+        try:
+            result = await client.chat(messages, model=model or entry.get("model"), **replay_params(entry, exact_lengths))
+            record.update(ok=True, ttft=result.ttft, e2e=result.duration, tokens=result.tokens,
+                          tokens_per_s=result.tokens_per_s, itl=result.inter_token_latencies)
+        except ChatError as e:
+            record.update(ok=False, error=str(e), e2e=time.perf_counter() - began)
+        records.append(record)
+
+    await asyncio.gather(*(send(index, entry) for index, entry in enumerate(entries)))
+    records.sort(key=lambda r: r["index"])
+    return records, time.perf_counter() - start
+
+
+def recorded_summary(entries):
+    ok = [e for e in entries if e.get("ok")]
+    return {
+        "requests": len(entries),
+        "span_s": round(entries[-1]["t"] - entries[0]["t"], 3) if entries else 0,
+        "ttft_ms": distribution([e["ttft"] for e in ok if e.get("ttft") is not None]),
+        "e2e_ms": distribution([e["duration"] for e in ok if e.get("duration") is not None]),
+        "output_tokens": distribution([e["tokens"] for e in ok if e.get("tokens") is not None], scale=1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded chat workload against an endpoint")
+    parser.add_argument("workload", help="workload file recorded by llm.workload (.jsonl or .jsonl.gz)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--endpoint", help="llm_endpoints entry in llm_config.yaml (default: first enabled)")
+    target.add_argument("--url", help="base URL, e.g. http://localhost:8000/v1")
+    target.add_argument("--mock", action="store_true", help="replay against the bundled mock server")
+    parser.add_argument("--model", help="send every request to this model (default: the target's model)")
+    parser.add_argument("--keep-models", action="store_true", help="use the model names from the recording")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression, e.g. 2 replays twice as fast")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--natural-lengths", action="store_true",
+                        help="let the model stop on its own instead of forcing the recorded output length")
+    parser.add_argument("--max-connections", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--json", help="write the report (summary and per-request records) here")
+    args = parser.parse_args()
+
+    header, entries = read_workload(args.workload)
+    entries = entries[:args.limit] if args.limit else entries
+    if not entries:
+        print(f"{args.workload} has no requests")
+        return 1
+
+    server = None
+    if args.mock:
+        server = MockServer().start()
+        url, model = server.url, server.settings.model
+    elif args.url:
+        url, model = args.url, args.model
+    else:
+        endpoint = get_config().endpoint(args.endpoint)
+        url, model = endpoint.url, endpoint.model
+    model = None if args.keep_models else (args.model or model)
+    if model is None and not args.keep_models:
+        parser.error("--url needs --model or --keep-models")
+
+    async def run():
+        client = AsyncChatClient(url, model, timeout=args.timeout, max_connections=args.max_connections,
+                                 client_id="replay")
+        try:
+            return await replay(client, entries, args.speed, not args.natural_lengths, model)
+        finally:
+            await client.close()
+
+    try:
+        records, wall_time = asyncio.run(run())
+    finally:
+        if server is not None:
+            server.stop()
+
+    lateness = [r["start"] - r["scheduled"] for r in records]
+    summary = summarize_records(records, wall_time)
+    summary["schedule_lag_ms"] = distribution(lateness)
+    recorded = recorded_summary(entries)
+    print(f"Replayed {len(entries)} requests from {args.workload} (recorded {header.get('started')}) "
+          f"against {url} at {args.speed}x")
+    print_summary(summary)
+    if recorded["ttft_ms"]:
+        print(f"recorded: TTFT p50 {recorded['ttft_ms']['p50']} ms, e2e p50 {recorded['e2e_ms']['p50']} ms "
+              f"over {recorded['span_s']}s")
+    print(f"arrival lag p99: {summary['schedule_lag_ms']['p99']} ms")
+
+    if args.json:
+        report = {
+            "meta": {"workload": args.workload, "recorded": header, "url": url, "model": model, "speed": args.speed},
+            "summary": summary,
+            "recorded": recorded,
+            "records": [{key: value for key, value in r.items() if key != "itl"} for r in records]
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import json
+import os
+import signal
+import stat
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+# Fake wsl/powershell/docker executables for benchmarking on Linux.
+# Behaviour is controlled through environment variables read at run time:
+#   SHIM_LATENCY     seconds to sleep before doing anything (process/VM start cost)
+#   SHIM_LINES       number of output lines to print
+#   SHIM_LINE_BYTES  width of each output line
+#   SHIM_EXIT        exit code
+# The wsl shim skips its options up to "-e" and execs the rest, so it works
+# both for one-shot commands and as a persistent shell session.
+
+SHIM_HEADER = """#!/bin/sh
+sleep "${SHIM_LATENCY:-0}"
+"""
+
+SHIM_OUTPUT = """if [ "${SHIM_LINES:-0}" -gt 0 ]; then
+    yes "$(printf '%*s' "${SHIM_LINE_BYTES:-80}" '' | tr ' ' x)" | head -n "$SHIM_LINES"
+fi
+exit "${SHIM_EXIT:-0}"
+"""
+
+SHIMS = {
+    "wsl": SHIM_HEADER + """while [ "$#" -gt 0 ] && [ "$1" != "-e" ]; do shift; done
+shift
+exec "$@"
+""",
+    "powershell": SHIM_HEADER + SHIM_OUTPUT,
+    "docker": SHIM_HEADER + """if [ "$1" = "--version" ]; then
+    echo "Docker version 99.0.0, build shim"
+    exit "${SHIM_EXIT:-0}"
+fi
+""" + SHIM_OUTPUT
+}
+
+
+def write_shims(directory):
+    """Write the shim executables into directory and return it"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, body in SHIMS.items():
+        path = directory / name
+        path.write_text(body)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return directory
+
+
+@contextmanager
+def shims_on_path(**settings):
+    """Put the shims first on PATH for the duration of a with-block.
+
+    Keyword arguments set the SHIM_* variables, e.g. latency=0.05, lines=1000.
+    """
+    saved = {key: os.environ.get(key) for key in ("PATH", "SHIM_LATENCY", "SHIM_LINES", "SHIM_LINE_BYTES", "SHIM_EXIT")}
+    with tempfile.TemporaryDirectory(prefix="rocm_shims_") as directory:
+        write_shims(directory)
+        os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+        configure(**settings)
+        try:
+            yield Path(directory)
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+
+def configure(latency=0.0, lines=0, line_bytes=80, exit_code=0):
+    """Change shim behaviour for subsequently started processes"""
+    os.environ["SHIM_LATENCY"] = str(latency)
+    os.environ["SHIM_LINES"] = str(lines)
+    os.environ["SHIM_LINE_BYTES"] = str(line_bytes)
+    os.environ["SHIM_EXIT"] = str(exit_code)
+
+
+# A stateful fake docker CLI for exercising llm.vllm_container without Docker.
+# Containers are recorded in the JSON file named by FAKE_DOCKER_STATE; "run"
+# and "start" launch llm/mock_server.py on the published host port in place
+# of vLLM, with the FAKE_DOCKER_STARTUP_DELAY, FAKE_DOCKER_COLD_REQUESTS and
+# FAKE_DOCKER_COLD_PENALTY settings. FAKE_DOCKER_CRASH=1 makes containers exit
+# right after starting; like the real daemon, inspect restarts a crashed
+# container whose --restart policy allows it and reports it as restarting.
+# Only the subcommands and output formats the manager uses are implemented.
+FAKE_DOCKER = """#!{python}
+import json, os, signal, subprocess, sys, time
+
+STATE = os.environ["FAKE_DOCKER_STATE"]
+MOCK_SERVER = {mock_server!r}
+VALUE_OPTIONS = {{"--name", "--restart", "--label", "-p", "--device", "--group-add", "--ipc", "-v", "-e", "--format",
+                 "--tail", "-t"}}
+
+
+def load():
+    try:
+        with open(STATE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {{}}
+
+
+def save(containers):
+    with open(STATE + ".tmp", "w") as f:
+        json.dump(containers, f)
+    os.replace(STATE + ".tmp", STATE)
+
+
+def alive(pid):
+    try:
+        with open(f"/proc/{{pid}}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+def launch(container):
+    log = open(container["log"], "a")
+    command = [sys.executable, MOCK_SERVER, "--port", container["port"], "--model", container["model"],
+               "--startup-delay", os.environ.get("FAKE_DOCKER_STARTUP_DELAY", "0"),
+               "--cold-requests", os.environ.get("FAKE_DOCKER_COLD_REQUESTS", "0"),
+               "--cold-penalty", os.environ.get("FAKE_DOCKER_COLD_PENALTY", "1")]
+    if os.environ.get("FAKE_DOCKER_CRASH") == "1":
+        command = [sys.executable, "-c", "import sys; print('HIP error: no ROCm-capable device is detected'); sys.exit(1)"]
+    process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    container.update(pid=process.pid, started=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+
+
+def halt(container):
+    if container.get("pid") and alive(container["pid"]):
+        os.kill(container["pid"], signal.SIGTERM)
+        for _ in range(50):
+            if not alive(container["pid"]):
+                break
+            time.sleep(0.02)
+    container["pid"] = None
+
+
+def parse(args):
+    options, positional = {{}}, []
+    i = 0
+    while i < len(args):
+        if args[i] in VALUE_OPTIONS:
+            options.setdefault(args[i], []).append(args[i + 1])
+            i += 2
+        elif args[i].startswith("-") and not positional:
+            options[args[i]] = True
+            i += 1
+        else:
+            positional = args[i:]
+            break
+    return options, positional
+
+
+def missing(name):
+    print(f"Error response from daemon: No such container: {{name}}", file=sys.stderr)
+    sys.exit(1)
+
+
+def main(argv):
+    if not argv or argv[0] == "--version":
+        print("Docker version 99.0.0, build fake")
+        return 0
+    command, (options, positional) = argv[0], parse(argv[1:])
+    containers = load()
+    if command == "run":
+        image, args = positional[0], positional[1:]
+        name = options["--name"][0]
+        if name in containers:
+            print(f'docker: Error response from daemon: Conflict. The container name "/{{name}}" is already in use.',
+                  file=sys.stderr)
+            return 125
+        labels = dict(label.split("=", 1) for label in options.get("--label", []))
+        container = {{"name": name, "image": image, "labels": labels, "args": args, "restart_count": 0,
+                     "policy": options.get("--restart", ["no"])[0],
+                     "port": options["-p"][0].split(":")[0], "model": args[args.index("--model") + 1],
+                     "log": os.path.join(os.path.dirname(STATE), name + ".log")}}
+        launch(container)
+        containers[name] = container
+        save(containers)
+        print(os.urandom(32).hex())
+        return 0
+    if command == "build":
+        for step in ("FROM rocm/vllm", "COPY . /app", "RUN pip install"):
+            print(f"Step: {{step}}")
+        print("Successfully tagged " + options.get("-t", ["image"])[0])
+        return 0
+    name = positional[0] if positional else None
+    if name not in containers:
+        missing(name)
+    container = containers[name]
+    if command == "inspect":
+        running = bool(container.get("pid")) and alive(container["pid"])
+        restarting = (not running and container.get("pid") is not None
+                      and container.get("policy") in ("always", "unless-stopped", "on-failure"))
+        if restarting:
+            container["restart_count"] = container.get("restart_count", 0) + 1
+            launch(container)
+        state = "restarting" if restarting else "running" if running else ("exited" if container.get("started") else "created")
+        print(json.dumps({{"Name": "/" + name, "RestartCount": container.get("restart_count", 0),
+                          "State": {{"Status": state, "Running": running or restarting, "Restarting": restarting,
+                                    "ExitCode": 0 if running else 1, "StartedAt": container.get("started")}},
+                          "Config": {{"Image": container["image"], "Labels": container["labels"]}}}}))
+    elif command == "start":
+        if not (container.get("pid") and alive(container["pid"])):
+            launch(container)
+        print(name)
+    elif command == "stop":
+        halt(container)
+        print(name)
+    elif command == "restart":
+        halt(container)
+        launch(container)
+        print(name)
+    elif command == "rm":
+        if container.get("pid") and alive(container["pid"]) and "-f" not in options:
+            print(f"Error response from daemon: cannot remove running container {{name}}", file=sys.stderr)
+            return 1
+        halt(container)
+        del containers[name]
+        print(name)
+    elif command == "logs":
+        with open(container["log"]) as f:
+            lines = f.read().splitlines()
+        print("\\n".join(lines[-int(options.get("--tail", ["100"])[0]):]))
+    else:
+        print(f"fake docker: unsupported command {{command}}", file=sys.stderr)
+        return 1
+    save(containers)
+    return 0
+
+
+sys.exit(main(sys.argv[1:]))
+"""
+
+
+@contextmanager
+def fake_docker_on_path(startup_delay=0.0, cold_requests=0, cold_penalty=1.0, crash=False):
+    """Put the fake docker CLI first on PATH; containers it started are stopped on exit"""
+    keys = ("PATH", "FAKE_DOCKER_STATE", "FAKE_DOCKER_STARTUP_DELAY", "FAKE_DOCKER_COLD_REQUESTS",
+            "FAKE_DOCKER_COLD_PENALTY", "FAKE_DOCKER_CRASH")
+    saved = {key: os.environ.get(key) for key in keys}
+    mock_server = Path(__file__).parent.parent / "llm" / "mock_server.py"
+    with tempfile.TemporaryDirectory(prefix="rocm_fake_docker_") as directory:
+        path = Path(directory) / "docker"
+        path.write_text(FAKE_DOCKER.format(python=sys.executable, mock_server=str(mock_server)))
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+        os.environ["FAKE_DOCKER_STATE"] = str(Path(directory) / "containers.json")
+        os.environ["FAKE_DOCKER_STARTUP_DELAY"] = str(startup_delay)
+        os.environ["FAKE_DOCKER_COLD_REQUESTS"] = str(cold_requests)
+        os.environ["FAKE_DOCKER_COLD_PENALTY"] = str(cold_penalty)
+        os.environ["FAKE_DOCKER_CRASH"] = "1" if crash else "0"
+        try:
+            yield path
+        finally:
+            state = Path(os.environ["FAKE_DOCKER_STATE"])
+            if state.exists():
+                for container in json.loads(state.read_text()).values():
+                    if container.get("pid"):
+                        try:
+                            os.kill(container["pid"], signal.SIGTERM)
+                        except OSError:
+                            pass
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
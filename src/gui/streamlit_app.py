@@ -1,11 +1,36 @@
 import streamlit as st
-import subprocess
 import json
 import sys
-import yaml
-from pathlib import Path
-from datetime import datetime
 import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+import logging
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.process_utils import LiveOutput, LiveText
+from utils.job_manager import get_job_manager, SUCCEEDED, CANCELLED
+from utils.probe_cache import get_probe_cache, environment_fingerprint
+from utils.log_store import session_log_store
+from utils.logging_utils import setup_logger, LEVEL_ALIASES
+from utils.system_commands import (
+    run_powershell_script, run_wsl_command, docker_installed, docker_version, build_image, probe_wsl_environment,
+    image_labels, dockerfile_changed, DOCKERFILE_DIGEST_LABEL
+)
+from utils.wsl_session import SessionBusy
+from utils.config import get_config, get_dockerfile_loader, ConfigError
+from utils.file_watch import start_hot_reload
+from llm.chat_client import get_chat_client, ChatError
+from llm.response_cache import CachedChatClient, get_response_cache
+from llm.compare import fan_out, compare_rows, TOKEN, DONE
+from llm.conversation import Conversation, chat_summarizer, token_counter
+from llm.transcripts import get_transcript_store
+from llm.workload import current_recorder, start_recording, stop_recording
+from llm.batch_runner import run_batch
+from llm.vllm_container import get_container_manager
+from utils.log_viewer import get_log_index
+from utils import log_archive
+from utils.tracing import get_tracer, to_chrome_trace, summarize
 
 st.set_page_config(
     page_title="ROCm AI Platform",
@@ -64,83 +89,264 @@ st.markdown("""
 if 'install_stage' not in st.session_state:
     st.session_state.install_stage = 0
 if 'logs' not in st.session_state:
-    st.session_state.logs = []
+    st.session_state.logs = session_log_store()
+if 'show_logs' not in st.session_state:
+    st.session_state.show_logs = False
 if 'gpu_info' not in st.session_state:
     st.session_state.gpu_info = None
 if 'compatibility_passed' not in st.session_state:
     st.session_state.compatibility_passed = False
 if 'docker_installed' not in st.session_state:
     st.session_state.docker_installed = False
+if 'handled_jobs' not in st.session_state:
+    st.session_state.handled_jobs = set()
+if 'compatibility_result' not in st.session_state:
+    st.session_state.compatibility_result = None
+if 'conversation' not in st.session_state:
+    st.session_state.conversation = Conversation()
+if 'chat_session_id' not in st.session_state:
+    st.session_state.chat_session_id = uuid.uuid4().hex
+
+# Tokens reserved for each chat reply; the history is trimmed to the rest of the context
+CHAT_REPLY_TOKENS = 512
+
+# Background job name -> install stage reached when the job succeeds
+JOB_STAGES = {
+    "wsl_install": 2,
+    "ROCm_install": 3,
+    "pytorch_install": 4,
+    "pytorch_test": 5
+}
+
+logger = setup_logger()
+
+# Pick up edits to llm_config.yaml and the Dockerfiles without a restart
+start_hot_reload()
+
+# Fail fast on a broken config rather than when the chat tab first needs it
+try:
+    get_config()
+except ConfigError as e:
+    logger.error(str(e), extra={"stage": "config"})
+    st.error(f"❌ {e}")
+    st.stop()
 
 def add_log(message, level="INFO"):
     """Add a log entry with timestamp"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    st.session_state.logs.append(f"[{timestamp}] [{level}] {message}")
+    st.session_state.logs.append(message, level)
+    logger.log(LEVEL_ALIASES.get(level, logging.getLevelName(level)), message, extra={"stage": "gui"})
 
-def run_powershell_script(script_name, params=""):
-    """Execute a PowerShell script and return the output"""
-    try:
-        script_path = Path(__file__).parent.parent / "scripts" / script_name
-   
-        if not script_path.exists():
-            return False, f"Script not found: {script_path}"
-        
-        cmd = ["powershell", "-ExecutionPolicy", "Bypass", "-File", str(script_path)]
-        if params:
-            cmd.append(params)
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minutes timeout
-        )
-        
-        return result.returncode == 0, result.stdout + result.stderr
-    except subprocess.TimeoutExpired:
-        return False, "Script execution timed out"
-    except Exception as e:
-        return False, f"Error: {str(e)}"
+def live_output():
+    """Create a placeholder that shows command output as it streams in"""
+    return LiveOutput(st.empty())
+
+def submit_job(name, description, fn):
+    """Run fn(job) in the background so it survives reruns and refreshes.
+
+    Reruns the whole app afterwards so the job list and polling start.
+    """
+    def traced(job):
+        with get_tracer().span(description, "stage", job_id=job.id) as span:
+            success, output = fn(job)
+            span["success"] = success
+            return success, output
+    
+    add_log(f"Starting {description}")
+    get_job_manager().submit(name, traced, description)
+    st.rerun(scope="app")
+
+def poll_interval():
+    """Fragment refresh interval: poll once a second while jobs are running"""
+    return 1 if get_job_manager().running() else None
+
+def apply_job_results():
+    """Log finished jobs and advance the install stage, once per session.
+
+    Returns True if any job finished since the last call.
+    """
+    changed = False
+    for job in reversed(get_job_manager().jobs()):
+        if not job.done or job.id in st.session_state.handled_jobs:
+            continue
+        st.session_state.handled_jobs.add(job.id)
+        changed = True
+        if job.status == SUCCEEDED:
+            add_log(f"{job.description} completed", "SUCCESS")
+            if job.name in JOB_STAGES:
+                get_probe_cache().invalidate("wsl")
+                st.session_state.compatibility_passed = True
+                st.session_state.install_stage = JOB_STAGES[job.name]
+        elif job.status == CANCELLED:
+            add_log(f"{job.description} cancelled", "WARNING")
+        else:
+            add_log(f"{job.description} failed", "ERROR")
+    return changed
+
+def render_job(name, success_msg, failure_msg, log_title="View Installation Log"):
+    """Show the state of the latest job for a step; returns it (or None)"""
+    manager = get_job_manager()
+    job = manager.latest(name)
+    if job is None:
+        return None
+    
+    if not job.done:
+        st.info(f"⏳ {job.description} running for {job.duration:.0f}s ({job.line_count} lines of output)")
+        if job.progress is not None:
+            st.progress(job.progress)
+        st.code(job.tail(40))
+        if st.button("⏹️ Cancel", key=f"cancel_{job.id}"):
+            manager.cancel(job.id)
+            st.rerun(scope="fragment")
+    else:
+        if job.status == SUCCEEDED:
+            st.success(success_msg)
+        elif job.status == CANCELLED:
+            st.warning(f"⏹️ {job.description} was cancelled")
+        else:
+            st.error(failure_msg)
+        with st.expander(log_title):
+            if job.transcript_path is not None and job.transcript_path.exists():
+                render_log_viewer(job.transcript_path, job.id)
+            else:
+                st.code(job.output)
+    return job
+
+def jump_to_error(index, key, page_size):
+    """Widget callback: show the page with the next error after the current page"""
+    current = st.session_state.get(f"{key}_page", 1)
+    error_line = index.next_error(current * page_size - 1)
+    if error_line is None:
+        error_line = index.next_error()
+    if error_line is not None:
+        st.session_state[f"{key}_level"] = "All"
+        st.session_state[f"{key}_search"] = ""
+        st.session_state[f"{key}_page"] = error_line // page_size + 1
 
-def run_wsl_command(command, description=""):
-    """Execute a command in WSL"""
+def render_log_viewer(path, key, page_size=200):
+    """Page through a log file of any size, loading only the visible lines"""
+    index = get_log_index(path)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        level = st.selectbox("Level", ["All", "ERROR", "WARNING", "SUCCESS"], key=f"{key}_level")
+    with col2:
+        pattern = st.text_input("Search (regex)", key=f"{key}_search")
+    with col3:
+        st.button("⏭️ Next Error", key=f"{key}_next_error", on_click=jump_to_error, args=(index, key, page_size))
+    
     try:
-        add_log(f"Executing WSL command: {description or command}")
-        result = subprocess.run(
-            ["wsl", "-d", "Ubuntu-22.04", "-e", "bash", "-c", command],
-            capture_output=True,
-            text=True,
-            timeout=600  # 10 minutes timeout
-        )
-        return result.returncode == 0, result.stdout + result.stderr
+        matches = index.filter(level=None if level == "All" else level, pattern=pattern or None)
     except Exception as e:
-        return False, f"Error: {str(e)}"
+        st.error(f"Invalid search: {e}")
+        return
+    total = len(index) if matches is None else len(matches)
+    pages = max((total + page_size - 1) // page_size, 1)
+    
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=page_key)
+    start = (page - 1) * page_size
+    if matches is None:
+        lines = index.lines(start, page_size)
+    else:
+        lines = index.lines_at(matches[start:start + page_size])
+    st.caption(f"{total} {'lines' if matches is None else 'matching lines'} in {Path(path).name}")
+    st.code("\n".join(lines))
+
+def job_running(name):
+    """Return True while the latest job with this name is still running"""
+    job = get_job_manager().latest(name)
+    return job is not None and not job.done
+
+def install_rocm_job(job):
+    """Copy the install scripts into WSL, then run the ROCm installer"""
+    success_prep, output_prep = run_powershell_script(
+        "prepare_wsl_env.ps1", on_line=job.append, cancel_event=job.cancel_event
+    )
+    if not success_prep:
+        return False, f"Failed to prepare WSL environment\n{output_prep}"
+    job.set_progress(0.1)
+    return run_wsl_command(
+        "bash /tmp/ROCm_install/install_ROCm.sh",
+        "Installing ROCm in WSL2",
+        on_line=job.append,
+        cancel_event=job.cancel_event
+    )
+
+def test_pytorch_job(job):
+    """Check that PyTorch imports and can see the GPU"""
+    test_cmd = "python3 -c 'import torch; print(f\"PyTorch: {torch.__version__}\"); print(f\"CUDA Available: {torch.cuda.is_available()}\"); print(f\"GPU: {torch.cuda.get_device_name(0) if torch.cuda.is_available() else \"N/A\"}\")'"
+    success, output = run_wsl_command(test_cmd, "Testing PyTorch", on_line=job.append, cancel_event=job.cancel_event)
+    return success and "True" in output, output
+
+def batch_job(input_path, output_path, endpoint, concurrency, max_tokens):
+    """Background job body for a JSONL batch run"""
+    def run(job):
+        last_logged = [0]
+        
+        def progress(done, total):
+            job.set_progress(done / total if total else 1.0)
+            if done - last_logged[0] >= 100 or done == total:
+                last_logged[0] = done
+                job.append(f"{done}/{total} prompts done")
+        
+        try:
+            report = run_batch(
+                input_path, output_path, endpoint, concurrency, {"max_tokens": max_tokens},
+                on_progress=progress, cancel_event=job.cancel_event
+            )
+        except (OSError, ValueError) as e:
+            job.append(f"Error: {e}")
+            return False, f"Error: {e}"
+        output = json.dumps(report, indent=2)
+        job.append(output)
+        return not report["failed"] and not report["cancelled"], output
+    return run
 
 def check_docker_installed():
-    """Check if Docker Desktop is installed and running"""
-    try:
-        result = subprocess.run(["docker", "--version"], capture_output=True, text=True)
-        if result.returncode == 0:
-            st.session_state.docker_installed = True
-            return True
-        return False
-    except FileNotFoundError:
-        return False
-
-def load_config():
-    """Load LLM configuration"""
-    config_path = Path(__file__).parent.parent / "config" / "llm_config.yaml"
-    if config_path.exists():
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
-    return {}
+    """Check if Docker Desktop is installed and running (cached across reruns)"""
+    installed = docker_installed()
+    st.session_state.docker_installed = installed
+    return installed
+
+def run_compatibility_check():
+    """Run the hardware and AMD driver checks; returns (status, output)"""
+    add_log("Starting compatibility check")
+    
+    # Run hardware detection
+    live = live_output()
+    success, output = run_powershell_script("detect_hardware.ps1", on_line=live)
+    live.clear()
+    
+    if not success:
+        add_log("Compatibility check failed", "ERROR")
+        return "failed", output
+    add_log("Hardware check passed", "SUCCESS")
+    
+    # Run AMD driver verification
+    success2, output2 = run_powershell_script("verify_amd_compatibility.ps1")
+    
+    st.session_state.compatibility_passed = True  # Allow to continue with warnings
+    if success2:
+        add_log("AMD GPU compatibility confirmed", "SUCCESS")
+        st.session_state.install_stage = 1
+        return "passed", output + "\n\n" + output2
+    return "warnings", output + "\n\n" + output2
 
 # Header
 st.markdown('<div class="main-header">🚀 ROCm AI Platform</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-header">One-Click AMD ROCm Setup & AI Development Environment</div>', unsafe_allow_html=True)
 
+apply_job_results()
+
 # Sidebar - Installation Progress
-with st.sidebar:
+# Each region is a fragment: widgets inside one rerun only that region, and
+# changes that affect the whole page call st.rerun(scope="app").
+def sidebar():
+    if apply_job_results():
+        st.rerun(scope="app")
+    
     st.header("📋 Installation Progress")
     
     stages = [
@@ -169,24 +375,81 @@ with st.sidebar:
     else:
         st.write("Run compatibility check first")
     
+    if st.button("🔎 Check WSL Environment"):
+        get_probe_cache().invalidate("wsl")
+        try:
+            probe_wsl_environment()
+        except SessionBusy as e:
+            st.warning(f"⏳ {e}; try again when the running install step finishes.")
+    wsl_status = get_probe_cache().peek(("wsl", "environment"), environment_fingerprint("wsl"))
+    if wsl_status:
+        st.json(wsl_status)
+    
     st.markdown("---")
     
     # Quick Actions
     st.subheader("⚡ Quick Actions")
     if st.button("🔄 Reset Installation"):
         st.session_state.install_stage = 0
-        st.session_state.logs = []
+        st.session_state.logs.clear()
         st.session_state.compatibility_passed = False
-        st.rerun()
+        st.session_state.compatibility_result = None
+        st.rerun(scope="app")
     
     if st.button("📜 View Full Logs"):
-        if st.session_state.logs:
-            st.text_area("Installation Logs", "\n".join(st.session_state.logs), height=500, key="full_logs")
+        st.session_state.show_logs = not st.session_state.show_logs
+    
+    logs = st.session_state.logs
+    if st.session_state.show_logs and len(logs):
+        page = st.number_input(
+            f"Page (1 = newest of {logs.page_count()})",
+            min_value=1, max_value=logs.page_count(), value=1, key="log_page"
+        )
+        st.text_area("Installation Logs", "\n".join(logs.page(page - 1)), height=500, key="full_logs")
+        if logs.spilled:
+            logs.flush()
+            st.caption(f"{logs.spilled} older entries saved to {logs.spill_path}")
+    
+    # Background Jobs
+    jobs = get_job_manager().jobs()
+    if jobs:
+        st.markdown("---")
+        st.subheader("⚙️ Background Jobs")
+        for job in jobs[:10]:
+            st.write(f"**{job.description}** — {job.status} ({job.duration:.0f}s)")
+    
+    # Stage timing
+    spans = get_tracer().spans()
+    if spans:
+        st.markdown("---")
+        st.subheader("⏱️ Timing")
+        for name, (count, total, longest) in list(summarize(spans).items())[:8]:
+            st.write(f"**{name}** — {total:.1f}s total ({count}x, max {longest:.1f}s)")
+        st.download_button(
+            "💾 Export Chrome Trace",
+            json.dumps(to_chrome_trace(spans)),
+            file_name="rocm_install_trace.json",
+            mime="application/json"
+        )
+
+with st.sidebar:
+    st.fragment(sidebar, run_every=poll_interval())()
 
 # Main Content Area
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["🏠 Home", "✅ Compatibility", "📥 Installation", "🐳 Docker & Containers", "🤖 Models & Chat", "📚 Documentation"])
+TAB_LABELS = ["🏠 Home", "✅ Compatibility", "📥 Installation", "🐳 Docker & Containers", "🤖 Models & Chat", "📚 Documentation"]
+try:
+    # Streamlit versions with lazy tabs only run the selected tab's body
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(TAB_LABELS, key="active_tab", on_change="rerun")
+except TypeError:
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(TAB_LABELS)
+
+def render_tab(tab, body):
+    """Render a tab's body unless the tabs report it as not selected"""
+    if getattr(tab, "open", None) is not False:
+        with tab:
+            body()
 
-with tab1:
+def home_tab():
     st.header("Welcome to the ROCm AI Platform")
     
     col1, col2 = st.columns(2)
@@ -239,7 +502,8 @@ with tab1:
     
     st.info("👉 **Ready to start?** Go to the **Compatibility** tab to check your system!")
 
-with tab2:
+@st.fragment
+def compatibility_tab():
     st.header("✅ System Compatibility Check")
   
     st.markdown("""
@@ -251,41 +515,34 @@ with tab2:
     """)
     
     if st.button("🚀 Run Compatibility Check", type="primary", use_container_width=True):
-        with st.spinner("Checking system compatibility..."):
-            add_log("Starting compatibility check")
-            
-            # Run hardware detection
-            success, output = run_powershell_script("detect_hardware.ps1")
-            
-            if success:
-                st.markdown('<div class="success-box">✅ Hardware check passed!</div>', unsafe_allow_html=True)
-                add_log("Hardware check passed", "SUCCESS")
-                
-                # Run AMD driver verification
-                success2, output2 = run_powershell_script("verify_amd_compatibility.ps1")
-                
-                if success2:
-                    st.markdown('<div class="success-box">✅ AMD GPU compatibility confirmed!</div>', unsafe_allow_html=True)
-                    add_log("AMD GPU compatibility confirmed", "SUCCESS")
-                    st.session_state.compatibility_passed = True
-                    st.session_state.install_stage = 1
-                else:
-                    st.markdown('<div class="warning-box">⚠️ GPU compatibility check completed with warnings</div>', unsafe_allow_html=True)
-                    st.session_state.compatibility_passed = True  # Allow to continue with warnings
-            
-                with st.expander("🔍 View Detailed Output"):
-                    st.code(output + "\n\n" + output2)
+        with st.spinner("Checking system compatibility..."), get_tracer().span("Compatibility check"):
+            st.session_state.compatibility_result = run_compatibility_check()
+        # The install stage changed, which the sidebar and other tabs show
+        st.rerun(scope="app")
+    
+    if st.session_state.compatibility_result:
+        status, output = st.session_state.compatibility_result
+        if status == "failed":
+            st.markdown('<div class="error-box">❌ Compatibility check failed</div>', unsafe_allow_html=True)
+            with st.expander("🔍 View Error Details"):
+                st.code(output)
+        else:
+            st.markdown('<div class="success-box">✅ Hardware check passed!</div>', unsafe_allow_html=True)
+            if status == "passed":
+                st.markdown('<div class="success-box">✅ AMD GPU compatibility confirmed!</div>', unsafe_allow_html=True)
             else:
-                st.markdown('<div class="error-box">❌ Compatibility check failed</div>', unsafe_allow_html=True)
-                add_log("Compatibility check failed", "ERROR")
-                with st.expander("🔍 View Error Details"):
-                    st.code(output)
+                st.markdown('<div class="warning-box">⚠️ GPU compatibility check completed with warnings</div>', unsafe_allow_html=True)
+            with st.expander("🔍 View Detailed Output"):
+                st.code(output)
     
     if st.session_state.compatibility_passed:
         st.success("✨ Your system is ready for ROCm installation!")
         st.info("👉 Proceed to the **Installation** tab")
 
-with tab3:
+def installation_tab():
+    if apply_job_results():
+        st.rerun(scope="app")
+    
     st.header("📥 ROCm Installation")
     
     if not st.session_state.compatibility_passed:
@@ -309,21 +566,12 @@ with tab3:
             ⚠️ **Note:** This may require a system restart.
             """)
    
-            if st.button("🚀 Install WSL2", key="wsl_install"):
-                with st.spinner("Installing WSL2... This may take several minutes"):
-                    add_log("Starting WSL2 installation")
-                    success, output = run_powershell_script("wsl2_setup.ps1")
-                
-                    if success:
-                        st.success("✅ WSL2 installation completed!")
-                        add_log("WSL2 installation completed", "SUCCESS")
-                        st.session_state.install_stage = 2
-                    else:
-                        st.error("❌ WSL2 installation failed")
-                        add_log("WSL2 installation failed", "ERROR")
-                    
-                    with st.expander("View Installation Log"):
-                        st.code(output)
+            if st.button("🚀 Install WSL2", key="wsl_install", disabled=job_running("wsl_install")):
+                submit_job("wsl_install", "WSL2 installation", lambda job: run_powershell_script(
+                    "wsl2_setup.ps1", on_line=job.append, cancel_event=job.cancel_event
+                ))
+            
+            render_job("wsl_install", "✅ WSL2 installation completed!", "❌ WSL2 installation failed")
         
         # Step 2: ROCm Installation
         with st.expander("**Step 2: ROCm Installation**", expanded=(st.session_state.install_stage == 2)):
@@ -336,34 +584,10 @@ with tab3:
             ⏱️ **Estimated time:** 10-15 minutes
             """)
             
-            if st.button("🚀 Install ROCm", key="ROCm_install"):
-                with st.spinner("Installing ROCm... Please wait"):
-                    add_log("Starting ROCm installation")
-                    
-                    # Prepare WSL environment (copy scripts)
-                    success_prep, output_prep = run_powershell_script("prepare_wsl_env.ps1")
-                    if not success_prep:
-                        st.error("❌ Failed to prepare WSL environment")
-                        add_log(f"WSL prep failed: {output_prep}", "ERROR")
-                        with st.expander("View Prep Log"):
-                            st.code(output_prep)
-                    else:
-                        # Copy script to WSL and execute
-                        success, output = run_wsl_command(
-                            "bash /tmp/ROCm_install/install_ROCm.sh",
-                            "Installing ROCm in WSL2"
-                        )
-                        
-                        if success:
-                            st.success("✅ ROCm installation completed!")
-                            add_log("ROCm installation completed", "SUCCESS")
-                            st.session_state.install_stage = 3
-                        else:
-                            st.error("❌ ROCm installation failed")
-                            add_log("ROCm installation failed", "ERROR")
-                        
-                        with st.expander("View Installation Log"):
-                            st.code(output)
+            if st.button("🚀 Install ROCm", key="ROCm_install", disabled=job_running("ROCm_install")):
+                submit_job("ROCm_install", "ROCm installation", install_rocm_job)
+            
+            render_job("ROCm_install", "✅ ROCm installation completed!", "❌ ROCm installation failed")
         
         # Step 3: PyTorch Installation
         with st.expander("**Step 3: PyTorch with ROCm**", expanded=(st.session_state.install_stage == 3)):
@@ -376,25 +600,15 @@ with tab3:
             ⏱️ **Estimated time:** 10-15 minutes
             """)
         
-            if st.button("🚀 Install PyTorch", key="pytorch_install"):
-                with st.spinner("Installing PyTorch... Please wait"):
-                    add_log("Starting PyTorch installation")
-        
-                    success, output = run_wsl_command(
-                        "bash /tmp/ROCm_install/install_pytorch.sh",
-                        "Installing PyTorch with ROCm"
-                    )
+            if st.button("🚀 Install PyTorch", key="pytorch_install", disabled=job_running("pytorch_install")):
+                submit_job("pytorch_install", "PyTorch installation", lambda job: run_wsl_command(
+                    "bash /tmp/ROCm_install/install_pytorch.sh",
+                    "Installing PyTorch with ROCm",
+                    on_line=job.append,
+                    cancel_event=job.cancel_event
+                ))
             
-                    if success:
-                        st.success("✅ PyTorch installation completed!")
-                        add_log("PyTorch installation completed", "SUCCESS")
-                        st.session_state.install_stage = 4
-                    else:
-                        st.error("❌ PyTorch installation failed")
-                        add_log("PyTorch installation failed", "ERROR")
-            
-                    with st.expander("View Installation Log"):
-                        st.code(output)
+            render_job("pytorch_install", "✅ PyTorch installation completed!", "❌ PyTorch installation failed")
     
         # Step 4: Validation
         with st.expander("**Step 4: Validation & Testing**", expanded=(st.session_state.install_stage == 4)):
@@ -405,29 +619,26 @@ with tab3:
             col1, col2 = st.columns(2)
                 
             with col1:
-                if st.button("🧪 Test ROCm", use_container_width=True):
-                    with st.spinner("Testing ROCm..."):
-                        success, output = run_wsl_command("ROCminfo", "Testing ROCm")
-                        if success:
-                            st.success("✅ ROCm is working!")
-                            with st.expander("ROCm Info"):
-                                st.code(output)
-                        else:
-                            st.error("❌ ROCm test failed")
-                            st.code(output)
+                if st.button("🧪 Test ROCm", use_container_width=True, disabled=job_running("rocm_test")):
+                    submit_job("rocm_test", "ROCm test", lambda job: run_wsl_command(
+                        "ROCminfo", "Testing ROCm", on_line=job.append, cancel_event=job.cancel_event
+                    ))
+                render_job("rocm_test", "✅ ROCm is working!", "❌ ROCm test failed", "ROCm Info")
         
             with col2:
-                if st.button("🔥 Test PyTorch", use_container_width=True):
-                    with st.spinner("Testing PyTorch..."):
-                        test_cmd = "python3 -c 'import torch; print(f\"PyTorch: {torch.__version__}\"); print(f\"CUDA Available: {torch.cuda.is_available()}\"); print(f\"GPU: {torch.cuda.get_device_name(0) if torch.cuda.is_available() else \"N/A\"}\")'"
-                        success, output = run_wsl_command(test_cmd, "Testing PyTorch")
-                        if success and "True" in output:
-                            st.success("✅ PyTorch with ROCm is working!")
-                            st.code(output)
-                            st.session_state.install_stage = 5
-                        else:
-                            st.error("❌ PyTorch test failed")
-                            st.code(output)
+                if st.button("🔥 Test PyTorch", use_container_width=True, disabled=job_running("pytorch_test")):
+                    submit_job("pytorch_test", "PyTorch test", test_pytorch_job)
+                render_job("pytorch_test", "✅ PyTorch with ROCm is working!", "❌ PyTorch test failed", "PyTorch Info")
+        
+        # Past Logs
+        with st.expander("**📂 Past Logs**"):
+            log_files = [path for run in log_archive.list_runs() for path in log_archive.run_files(run)]
+            log_files += sorted((log_archive.LOG_DIR / "jobs").glob("*.log"), reverse=True)
+            if log_files:
+                log_file = st.selectbox("Log file", log_files, format_func=lambda path: path.name, key="past_log_file")
+                render_log_viewer(log_file, "past_logs")
+            else:
+                st.write("No logs recorded yet")
             
         # Completion
         if st.session_state.install_stage >= 5:
@@ -460,7 +671,113 @@ with tab3:
             to avoid overwriting your ROCm PyTorch installation!
             """)
 
-with tab4:
+def build_image_job(image, dockerfile_dir):
+    """Background job body for an image build; the image is labelled with the Dockerfile's digest"""
+    def run(job):
+        job.append(f"Building {image} from {dockerfile_dir}")
+        try:
+            labels = {DOCKERFILE_DIGEST_LABEL: get_dockerfile_loader(dockerfile_dir.name).get().digest}
+        except ConfigError as e:
+            job.append(f"Warning: {e}")
+            labels = None
+        return build_image(image, dockerfile_dir, on_line=job.append, cancel_event=job.cancel_event, labels=labels)
+    return run
+
+def image_status(image, dockerfile_name):
+    """Say whether image is built and whether its Dockerfile changed since"""
+    if image_labels(image) is None:
+        st.caption(f"{image} has not been built yet.")
+        return
+    try:
+        dockerfile = get_dockerfile_loader(dockerfile_name).get()
+    except ConfigError as e:
+        st.warning(f"⚠️ {e}")
+        return
+    if dockerfile_changed(image, dockerfile):
+        st.warning(f"⚠️ src/docker/{dockerfile_name}/Dockerfile changed since {image} was built; rebuild it.")
+
+# Container action -> (button label, job description verb, outcome shown when it succeeds)
+CONTAINER_ACTIONS = {
+    "start": ("▶️ Start", "Starting", "is ready"),
+    "stop": ("⏹️ Stop", "Stopping", "stopped"),
+    "restart": ("🔁 Restart", "Restarting", "is ready"),
+    "remove": ("🗑️ Remove", "Removing", "removed")
+}
+
+def container_job(action, endpoint):
+    """Background job body for a vLLM container action; start and restart wait for readiness and warm up"""
+    def run(job):
+        manager = get_container_manager()
+        try:
+            if action == "restart":
+                success, output = manager.restart(endpoint, on_line=job.append)
+                if success:
+                    success, output = manager.ensure_running(endpoint, on_line=job.append,
+                                                             cancel_event=job.cancel_event)
+            elif action == "start":
+                success, output = manager.ensure_running(endpoint, on_line=job.append, cancel_event=job.cancel_event)
+            elif action == "stop":
+                success, output = manager.stop(endpoint, on_line=job.append)
+            else:
+                success, output = manager.remove(endpoint, on_line=job.append)
+        finally:
+            get_probe_cache().invalidate("vllm_container")
+        return success, output
+    return run
+
+def container_status(endpoint):
+    """docker inspect summary for the endpoint's container (cached for a few seconds)"""
+    return get_probe_cache().get(
+        ("vllm_container", endpoint.name), lambda: get_container_manager().status(endpoint), ttl=5
+    )
+
+def vllm_server_panel(endpoint):
+    name = f"vllm_{endpoint.name}"
+    status = container_status(endpoint)
+    if status is None:
+        st.markdown(f"**{endpoint.name}** · `{endpoint.model}` · no container yet")
+    else:
+        icon = "🟢" if status["running"] else "⚪"
+        st.markdown(f"**{endpoint.name}** · `{endpoint.model}` · {icon} {status['name']} is {status['state']}")
+        if status["managed"] and status["model"] != endpoint.model:
+            st.caption(f"Serves {status['model']}; starting it recreates the container for {endpoint.model}")
+    if status is not None and status["running"]:
+        usage = get_probe_cache().get(
+            ("vllm_container", endpoint.name, "usage"), lambda: get_container_manager().usage(endpoint), ttl=5
+        )
+        if usage is not None:
+            cpu = f"{usage['cpu_percent']}%" if usage["cpu_percent"] is not None else "n/a"
+            st.caption(f"Memory {usage['memory_mb']:.0f} MB · CPU {cpu} · {usage['pids']} processes")
+    st.caption(f"{endpoint.url} · containers keep running when the app closes")
+    
+    busy = job_running(name)
+    enabled = {
+        "start": not busy,
+        "stop": not busy and status is not None and status["running"],
+        "restart": not busy and status is not None,
+        "remove": not busy and status is not None
+    }
+    for column, (action, (label, verb, _)) in zip(st.columns(len(CONTAINER_ACTIONS)), CONTAINER_ACTIONS.items()):
+        with column:
+            if st.button(label, key=f"{name}_{action}", disabled=not enabled[action], use_container_width=True):
+                submit_job(name, f"{verb} vLLM ({endpoint.name})", container_job(action, endpoint))
+    
+    latest = get_job_manager().latest(name)
+    if latest is not None:
+        verb, outcome = next((verb, outcome) for _, verb, outcome in CONTAINER_ACTIONS.values()
+                             if latest.description.startswith(verb))
+        render_job(name, f"✅ vLLM ({endpoint.name}) {outcome}", f"❌ {verb} vLLM ({endpoint.name}) failed",
+                   "Container Log")
+    
+    if status is not None:
+        with st.expander("📜 Container Logs"):
+            if st.button("Load logs", key=f"{name}_logs"):
+                success, output = get_container_manager().logs(endpoint)
+                st.code(output or "(no output)")
+
+def docker_tab():
+    if apply_job_results():
+        st.rerun(scope="app")
     st.header("🐳 Docker & Containers")
     st.markdown("Manage your AI containers and environments.")
     
@@ -470,47 +787,283 @@ with tab4:
         st.warning("⚠️ Docker Desktop is not detected!")
         st.markdown("Please install Docker Desktop for Windows to use container features.")
         st.markdown("[Download Docker Desktop](https://www.docker.com/products/docker-desktop/)")
+        if st.button("🔄 Check Again"):
+            get_probe_cache().invalidate("docker")
+            st.rerun(scope="fragment")
+        return
+    version = docker_version()
+    if version is not None:
+        st.success(f"✅ Docker Engine {version['version']} is running (API {version['api_version']}).")
     else:
         st.success("✅ Docker Desktop is installed and ready.")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("vLLM Server")
-            st.markdown("High-performance LLM serving engine.")
-            if st.button("🚀 Build vLLM Container"):
-                with st.spinner("Building vLLM container..."):
-                    # Logic to build container
-                    dockerfile_path = Path(__file__).parent.parent / "docker" / "vllm"
-                    cmd = f"docker build -t rocm-vllm:latest {dockerfile_path}"
-                    success, output = run_powershell_script("run_docker_build.ps1", f"-Path {dockerfile_path} -Tag rocm-vllm:latest") # Placeholder script
-                    # For now, just simulating or using direct command if script doesn't exist
-                    # In real implementation, we'd use a script or subprocess directly
-                    st.info("Build process started (Simulation)")
-                    
-        with col2:
-            st.subheader("PyTorch Interactive")
-            st.markdown("JupyterLab environment for development.")
-            if st.button("🚀 Build PyTorch Container"):
-                with st.spinner("Building PyTorch container..."):
-                    st.info("Build process started (Simulation)")
-
-with tab5:
+    
+    try:
+        config = get_config()
+    except ConfigError as e:
+        st.error(f"❌ {e}")
+        return
+    docker_dir = Path(__file__).parent.parent / "docker"
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("vLLM Server")
+        st.markdown("High-performance LLM serving engine.")
+        if st.button("🚀 Build vLLM Container", disabled=job_running("vllm_build")):
+            submit_job("vllm_build", f"Building {config.docker.vllm_image}",
+                       build_image_job(config.docker.vllm_image, docker_dir / "vllm"))
+        render_job("vllm_build", f"✅ Built {config.docker.vllm_image}", "❌ vLLM image build failed", "Build Log")
+        image_status(config.docker.vllm_image, "vllm")
+                
+    with col2:
+        st.subheader("PyTorch Interactive")
+        st.markdown("JupyterLab environment for development.")
+        if st.button("🚀 Build PyTorch Container", disabled=job_running("pytorch_build")):
+            submit_job("pytorch_build", f"Building {config.docker.pytorch_image}",
+                       build_image_job(config.docker.pytorch_image, docker_dir / "pytorch"))
+        render_job("pytorch_build", f"✅ Built {config.docker.pytorch_image}", "❌ PyTorch image build failed", "Build Log")
+        image_status(config.docker.pytorch_image, "pytorch")
+    
+    st.subheader("vLLM Containers")
+    st.markdown(f"One `{config.docker.vllm_image}` container per enabled endpoint in llm_config.yaml. "
+                "**Start** waits until the model is loaded and sends warm-up requests.")
+    for endpoint in config.endpoints:
+        if endpoint.enabled:
+            vllm_server_panel(endpoint)
+
+@st.fragment
+def models_tab():
     st.header("🤖 Models & Chat")
     st.markdown("Manage local LLMs and chat with them.")
     
-    config = load_config()
+    try:
+        config = get_config()
+    except ConfigError as e:
+        st.error(f"❌ {e}")
+        return
     
     st.subheader("Model Configuration")
-    st.json(config)
+    st.json(config.as_dict())
     
     st.subheader("Chat Interface")
+    try:
+        endpoint = config.chat_endpoint()
+    except ConfigError as e:
+        st.warning(f"⚠️ {e}")
+        return
+    via = " (gateway)" if endpoint.name == "gateway" else ""
+    st.caption(f"Endpoint: {endpoint.url}{via} · Model: {endpoint.model}")
+    
+    # Follow the endpoint (it can change on a config reload); the history stays
+    conversation = st.session_state.conversation
+    conversation.budget = max(endpoint.context_tokens - CHAT_REPLY_TOKENS, CHAT_REPLY_TOKENS)
+    conversation.set_counter(token_counter(endpoint.model))
+    # The gateway queues requests per X-Client-Id, so each browser session waits its own turn
+    client = get_chat_client(endpoint).for_client(st.session_state.chat_session_id)
+    conversation.summarize = chat_summarizer(client)
+    
+    for message in conversation.messages:
+        speaker = "You" if message.role == "user" else "AI"
+        st.markdown(f"**{speaker}:** {message.content}")
+    
     user_input = st.text_input("You:", placeholder="Ask something...")
-    if st.button("Send"):
-        st.write(f"**AI:** (Echo) {user_input}")
-        st.info("Connect to vLLM container to enable real chat.")
+    temperature = st.slider("Temperature", 0.0, 2.0, 0.7, 0.1, key="chat_temperature",
+                            help="At 0 replies are deterministic and repeated prompts are answered from the response cache")
+    if st.button("Send") and user_input:
+        conversation.add("user", user_input)
+        messages = conversation.request_messages()
+        st.markdown(f"**You:** {user_input}")
+        live = LiveText(st.empty(), prefix="**AI:** ")
+        try:
+            with get_tracer().span("Chat request", "llm", model=endpoint.model) as span:
+                cached_client = CachedChatClient(client, get_response_cache())
+                result = cached_client.chat(messages, on_token=live, temperature=temperature, max_tokens=CHAT_REPLY_TOKENS)
+                span.update(tokens=result.tokens, ttft_s=result.ttft, cached=result.cached,
+                            prompt_tokens=conversation.prompt_tokens)
+        except ChatError as e:
+            conversation.pop()
+            live.placeholder.empty()
+            st.error(f"❌ {e}")
+            st.info("Start the vLLM container from the **Docker & Containers** tab, or check llm_endpoints in llm_config.yaml.")
+            add_log(f"Chat request failed: {e}", "ERROR")
+        else:
+            live.flush()
+            conversation.add("assistant", result.text)
+            store = get_transcript_store()
+            store.add(st.session_state.chat_session_id, "user", user_input, model=endpoint.model)
+            store.add(st.session_state.chat_session_id, "assistant", result.text, model=endpoint.model,
+                      tokens=result.tokens, ttft_s=result.ttft, cached=result.cached)
+            if result.cached:
+                st.caption(f"💾 From the response cache · {result.tokens} tokens")
+            else:
+                rate = f"{result.tokens_per_s:.1f} tokens/s" if result.tokens_per_s else "n/a tokens/s"
+                ttft = f"{result.ttft * 1000:.0f} ms" if result.ttft is not None else "n/a"
+                st.caption(f"⏱️ First token after {ttft} · {result.tokens} tokens in {result.duration:.2f}s · {rate}")
+    
+    if conversation.last_prompt_tokens is not None:
+        stats = conversation.stats()
+        summarised = f" · {stats['summarised']} earlier messages summarised" if stats["summarised"] else ""
+        st.caption(f"🧮 Last prompt: ~{stats['last_prompt_tokens']} of {stats['budget']} tokens{summarised}")
+    if conversation.messages and st.button("🧹 Clear Chat"):
+        conversation.clear()
+        st.session_state.chat_session_id = uuid.uuid4().hex  # the old one stays in the transcripts
+        st.rerun(scope="fragment")
+    
+    with st.expander("🗂️ Transcripts"):
+        transcripts_panel()
+    
+    with st.expander("⚖️ Compare Models"):
+        compare_panel(config)
+    
+    with st.expander("⏺️ Workload Recording"):
+        workload_panel(endpoint)
+    
+    with st.expander("💾 Response Cache"):
+        cache = get_response_cache()
+        stats = cache.stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Entries", stats["entries"])
+        col2.metric("Hit rate", f"{stats['hit_rate']:.0%}" if stats["hit_rate"] is not None else "n/a")
+        col3.metric("Tokens saved", stats["saved_tokens"])
+        st.caption(f"{stats['hits']} hits · {stats['misses']} misses · {stats['bypassed']} bypassed (sampling) · "
+                   f"{stats['bytes'] / 1024:.0f} KiB on disk at {stats['path']}")
+        if st.button("🗑️ Clear Cache", disabled=not stats["entries"]):
+            cache.clear()
+            st.rerun(scope="fragment")
+    
+    with st.expander("📦 Batch Inference"):
+        st.fragment(batch_panel, run_every=poll_interval() if job_running("batch_run") else None)(endpoint)
+
+def transcripts_panel():
+    """Search, reopen and export saved chat transcripts"""
+    store = get_transcript_store()
+    query = st.text_input("Search all chats", key="transcript_query", placeholder="e.g. rocm install error")
+    if query:
+        started = time.perf_counter()
+        hits = store.search(query, limit=20)
+        st.caption(f"{len(hits)} matches in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for hit in hits:
+            when = datetime.fromtimestamp(hit["created"]).strftime("%Y-%m-%d %H:%M")
+            st.markdown(f"**{hit['title'] or hit['conversation_id'][:8]}** · {hit['role']} · {when}  \n{hit['snippet']}")
+    
+    recent = store.conversations(limit=50)
+    if recent:
+        chosen = st.selectbox(
+            "Recent chats", recent, key="transcript_choice",
+            format_func=lambda c: f"{c['title'] or c['id'][:8]} · {c['message_count']} messages · "
+                                  f"{datetime.fromtimestamp(c['updated']).strftime('%Y-%m-%d %H:%M')}"
+        )
+        if st.button("📂 Open Chat"):
+            conversation = st.session_state.conversation
+            conversation.clear()
+            for message in store.messages(chosen["id"]):
+                conversation.add(message["role"], message["content"])
+            st.session_state.chat_session_id = chosen["id"]
+            st.rerun(scope="fragment")
+    
+    export_path = st.text_input("Export to (JSONL)", key="transcript_export",
+                                help="One conversation per line, ready for batch_runner.py to replay")
+    if st.button("💾 Export", disabled=not export_path):
+        try:
+            count = store.export_jsonl(export_path)
+            st.success(f"✅ Exported {count} conversations to {export_path}")
+        except OSError as e:
+            st.error(f"❌ {e}")
+    stats = store.stats()
+    st.caption(f"{stats['conversations']} chats · {stats['messages']} messages in {stats['path']}")
+
+def workload_panel(endpoint):
+    """Record every chat request in this process for replay_workload.py"""
+    st.markdown("Records the timing, sizes and parameters of every chat request (this tab, comparisons, "
+                "batch runs) so the same traffic can be replayed as a load test.")
+    if current_recorder() is None:
+        include_prompts = st.checkbox("Include prompt text", key="workload_prompts",
+                                      help="Without it, replays send synthetic prompts of the recorded length")
+        if st.button("⏺️ Start Recording"):
+            recorder = start_recording(include_prompts=include_prompts, source=endpoint.url)
+            add_log(f"Recording chat workload to {recorder.path}")
+    elif st.button("⏹️ Stop Recording"):
+        recorder = stop_recording()
+        if recorder is not None:
+            add_log(f"Recorded {recorder.count} chat requests to {recorder.path}")
+            st.success(f"✅ Saved {recorder.count} requests to {recorder.path}")
+            st.code(f"python src/benchmarks/replay_workload.py {recorder.path} --url {endpoint.url} --model {endpoint.model}",
+                    language="bash")
+    recorder = current_recorder()
+    if recorder is not None:
+        st.caption(f"🔴 Recording: {recorder.count} requests so far → {recorder.path}")
+
+def compare_panel(config):
+    """Stream one prompt from several endpoints side by side"""
+    endpoints = [e for e in config.endpoints if e.enabled]
+    names = [e.name for e in endpoints]
+    selected = st.multiselect("Endpoints", names, default=names, key="compare_endpoints",
+                              format_func=lambda name: f"{name} ({config.endpoint(name).model})")
+    prompt = st.text_area("Prompt", key="compare_prompt", placeholder="The same prompt goes to every endpoint")
+    max_tokens = st.number_input("Max tokens", min_value=1, max_value=32768, value=256, key="compare_max_tokens")
+    if not st.button("⚖️ Compare", disabled=len(selected) < 1 or not prompt):
+        return
+    
+    chosen = [e for e in endpoints if e.name in selected]
+    columns = st.columns(len(chosen))
+    outputs = []
+    for column, endpoint in zip(columns, chosen):
+        with column:
+            st.markdown(f"**{endpoint.name}** · `{endpoint.model}`")
+            outputs.append((LiveText(st.empty()), st.empty()))
+    
+    outcomes = {}
+    messages = [{"role": "user", "content": prompt}]
+    started = time.perf_counter()
+    with get_tracer().span("Model comparison", "llm", endpoints=len(chosen)) as span:
+        for index, kind, value in fan_out(chosen, messages, client_id=st.session_state.chat_session_id,
+                                          max_tokens=int(max_tokens)):
+            live, status = outputs[index]
+            if kind == TOKEN:
+                live(value)
+                continue
+            live.flush()
+            outcomes[index] = value
+            if kind == DONE:
+                rate = f"{value.tokens_per_s:.1f} tokens/s" if value.tokens_per_s else "n/a tokens/s"
+                ttft = f"{value.ttft * 1000:.0f} ms" if value.ttft is not None else "n/a"
+                status.caption(f"⏱️ First token after {ttft} · {value.tokens} tokens in {value.duration:.2f}s · {rate}")
+            else:
+                status.error(f"❌ {value}")
+        span.update(failed=sum(isinstance(value, str) for value in outcomes.values()))
+    
+    wall_time = time.perf_counter() - started
+    rows = compare_rows(chosen, outcomes)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    durations = [row["duration_s"] for row in rows if "duration_s" in row]
+    if len(durations) > 1:
+        st.caption(f"Wall time {wall_time:.2f}s for {len(durations)} models "
+                   f"(sequentially they would take {sum(durations):.2f}s)")
 
-with tab6:
+def batch_panel(endpoint):
+    st.markdown("Run a JSONL file of prompts (`{\"id\": ..., \"prompt\": ...}` per line) through the endpoint. "
+                "Rerunning with the same output file resumes an interrupted run.")
+    input_path = st.text_input("Prompts file (JSONL)", key="batch_input")
+    output_path = st.text_input("Results file (JSONL)", key="batch_output")
+    col1, col2 = st.columns(2)
+    with col1:
+        concurrency = st.number_input("Concurrent requests", min_value=1, max_value=256, value=16, key="batch_concurrency")
+    with col2:
+        max_tokens = st.number_input("Max tokens per reply", min_value=1, max_value=32768, value=256, key="batch_max_tokens")
+    
+    if st.button("▶️ Start Batch", disabled=job_running("batch_run")):
+        if not input_path or not Path(input_path).is_file():
+            st.error(f"❌ Prompts file not found: {input_path}")
+        elif not output_path:
+            st.error("❌ Choose a results file")
+        else:
+            submit_job("batch_run", "Batch inference", batch_job(
+                input_path, output_path, endpoint, int(concurrency), int(max_tokens)
+            ))
+    
+    render_job("batch_run", "✅ Batch finished", "❌ Batch finished with failures", "Batch Report")
+
+def docs_tab():
     st.header("📚 Documentation & Resources")
     
     col1, col2 = st.columns(2)
@@ -562,6 +1115,14 @@ with tab6:
         4. Create an issue on GitHub
         """)
 
+render_tab(tab1, home_tab)
+render_tab(tab2, compatibility_tab)
+# Polls while background jobs run so their output tails stay live
+render_tab(tab3, st.fragment(installation_tab, run_every=poll_interval()))
+render_tab(tab4, st.fragment(docker_tab, run_every=poll_interval()))
+render_tab(tab5, models_tab)
+render_tab(tab6, docs_tab)
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -569,4 +1130,4 @@ st.markdown("""
     <p>ROCm AI Platform | Made with ❤️ for the AMD AI Community</p>
     <p>⚠️ This is an unofficial community tool. For official support, visit AMD.com</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
@@ -0,0 +1,232 @@
+"""A small asyncio HTTP/1.1 client with keep-alive connection pooling.
+
+Only what the LLM tools need: JSON requests, Content-Length and chunked
+response bodies read incrementally (for server-sent events), and a bounded
+pool of reusable connections per base URL. Standard library only.
+"""
+import asyncio
+import json
+import ssl
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+
+class HTTPError(Exception):
+    """Raised for connection failures, timeouts and malformed responses"""
+
+
+class Response:
+    """Status, headers and an incrementally readable body"""
+
+    def __init__(self, reader, status, reason, headers, timeout):
+        self._reader = reader
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.timeout = timeout
+        self.complete = False
+        self._chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+        length = headers.get("content-length")
+        self._remaining = int(length) if length is not None else None
+        if not self._chunked and self._remaining is None and status in (204, 304):
+            self._remaining = 0
+        self.keep_alive = headers.get("connection", "").lower() != "close" and (
+            self._chunked or self._remaining is not None
+        )
+
+    async def _read(self, coro):
+        try:
+            return await asyncio.wait_for(coro, self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(f"No data for {self.timeout}s")
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            raise HTTPError(f"Connection closed mid-response: {e}")
+
+    async def iter_chunks(self):
+        """Yield body bytes as they arrive"""
+        if self.complete:
+            return
+        if self._chunked:
+            while True:
+                size_line = await self._read(self._reader.readline())
+                try:
+                    size = int(size_line.split(b";")[0].strip(), 16)
+                except ValueError:
+                    raise HTTPError(f"Bad chunk size line: {size_line[:40]!r}")
+                if size == 0:
+                    # Trailers end with an empty line
+                    while (await self._read(self._reader.readline())).strip():
+                        pass
+                    break
+                data = await self._read(self._reader.readexactly(size + 2))
+                yield data[:-2]
+        elif self._remaining is not None:
+            while self._remaining > 0:
+                data = await self._read(self._reader.read(min(self._remaining, 65536)))
+                if not data:
+                    raise HTTPError("Connection closed before the body was complete")
+                self._remaining -= len(data)
+                yield data
+        else:
+            while True:
+                data = await self._read(self._reader.read(65536))
+                if not data:
+                    break
+                yield data
+        self.complete = True
+
+    async def iter_lines(self):
+        """Yield body lines (without the newline) as they arrive"""
+        pending = b""
+        async for chunk in self.iter_chunks():
+            pending += chunk
+            if b"\n" in chunk:
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    yield line
+        if pending:
+            yield pending
+
+    async def read(self):
+        return b"".join([chunk async for chunk in self.iter_chunks()])
+
+    async def json(self):
+        data = await self.read()
+        try:
+            return json.loads(data)
+        except ValueError:
+            raise HTTPError(f"Response is not JSON: {data[:200]!r}")
+
+
+class _NotSent(Exception):
+    """Writing the request failed, so the server cannot have acted on it"""
+
+
+class ConnectionPool:
+    """Keep-alive connections to one host, at most max_connections at a time.
+
+        pool = ConnectionPool("http://localhost:8000/v1")
+        async with pool.request("POST", "/chat/completions", {"model": ...}) as response:
+            async for line in response.iter_lines():
+                ...
+    """
+
+    def __init__(self, base_url, max_connections=64, timeout=300, connect_timeout=5, headers=None):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {base_url}")
+        self.base_url = base_url.rstrip("/")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.headers = dict(headers or {})
+        self.max_connections = max_connections
+        self._idle = []
+        self._semaphore = None
+        self.connections_opened = 0
+
+    async def _connect(self):
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=self.ssl, limit=1 << 20),
+                self.connect_timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise HTTPError(f"Cannot connect to {self.host}:{self.port}: {e or 'timed out'}")
+        self.connections_opened += 1
+        return reader, writer
+
+    def _encode(self, method, path, body, headers):
+        payload = b""
+        lines = [f"{method} {self.base_path}{path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        all_headers = dict(self.headers, **(headers or {}))
+        if body is not None:
+            payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+            all_headers.setdefault("Content-Type", "application/json")
+        all_headers["Content-Length"] = str(len(payload))
+        lines += [f"{key}: {value}" for key, value in all_headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload
+
+    async def _send(self, connection, request):
+        reader, writer = connection
+        try:
+            writer.write(request)
+            await writer.drain()
+        except (ConnectionError, OSError) as e:
+            raise _NotSent(e)
+        status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        try:
+            _, status, *reason = status_line.decode("latin-1").split(" ", 2)
+            status = int(status)
+        except ValueError:
+            raise HTTPError(f"Malformed status line: {status_line[:80]!r}")
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), self.timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        return Response(reader, status, reason[0].strip() if reason else "", headers, self.timeout)
+
+    @asynccontextmanager
+    async def request(self, method, path, body=None, headers=None):
+        """Send a request; the response body must be read inside the with-block"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        request = self._encode(method, path, body, headers)
+        async with self._semaphore:
+            # Once the request may have reached the server it is never resent
+            # (POST /chat/completions is not idempotent): only a pooled
+            # connection that fails while writing is replaced by a fresh one
+            connection = self._checkout()
+            for reused in (connection is not None, False):
+                if not reused:
+                    connection = await self._connect()
+                try:
+                    response = await self._send(connection, request)
+                    break
+                except _NotSent as e:
+                    connection[1].close()
+                    if not reused:
+                        raise HTTPError(f"Request to {self.base_url}{path} failed: {e.args[0]}")
+                except asyncio.TimeoutError:  # a subclass of OSError since Python 3.11, so it goes first
+                    connection[1].close()
+                    raise HTTPError(f"No response from {self.base_url}{path} within {self.timeout}s")
+                except HTTPError:
+                    connection[1].close()
+                    raise
+                except (ConnectionError, asyncio.IncompleteReadError, OSError) as e:
+                    connection[1].close()
+                    raise HTTPError(f"Request to {self.base_url}{path} failed: {e or type(e).__name__}")
+            try:
+                yield response
+            finally:
+                if response.complete and response.keep_alive and not connection[1].is_closing():
+                    self._idle.append(connection)
+                else:
+                    connection[1].close()
+
+    def _checkout(self):
+        """An idle connection the server has not closed meanwhile, or None"""
+        while self._idle:
+            connection = self._idle.pop()
+            if not connection[0].at_eof() and not connection[1].is_closing():
+                return connection
+            connection[1].close()
+        return None
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
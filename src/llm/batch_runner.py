@@ -0,0 +1,251 @@
+"""Run a JSONL file of prompts through an OpenAI-compatible endpoint.
+
+Each input line is {"id": ..., "prompt": "..."} or {"id": ..., "messages": [...]},
+optionally with request parameters such as max_tokens or temperature. Results
+are appended to the output JSONL as they complete; failures go to
+<output>.errors.jsonl. The output file doubles as the checkpoint: rerunning
+with the same output skips every id already in it, so an interrupted run
+resumes where it stopped and failed prompts are retried.
+
+    python src/llm/batch_runner.py prompts.jsonl results.jsonl --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from llm.chat_client import AsyncChatClient, ChatError
+from llm.response_cache import AsyncCachedChatClient, get_response_cache
+from utils.config import get_config
+from utils.stats import percentile
+
+REQUEST_PARAMS = ("max_tokens", "temperature", "top_p", "seed", "stop", "presence_penalty", "frequency_penalty")
+RETRY_DELAYS = (1, 4, 15)  # seconds between attempts for a failing prompt
+
+
+def completed_ids(output_path):
+    """Ids already written to output_path; a torn final line is cut off"""
+    path = Path(output_path)
+    done = set()
+    if not path.exists():
+        return done
+    good_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError):
+                break
+            good_bytes += len(line)
+    if good_bytes < path.stat().st_size:
+        # A run killed mid-write leaves a partial line; drop it so appends stay valid
+        with open(path, "r+b") as f:
+            f.truncate(good_bytes)
+    return done
+
+
+def read_prompts(input_path, skip):
+    """Yield (id, messages, params) for input lines whose id is not in skip"""
+    with open(input_path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{input_path}:{number}: invalid JSON: {e}")
+            if not isinstance(entry, dict):
+                raise ValueError(f"{input_path}:{number}: expected a JSON object, got {type(entry).__name__}")
+            prompt_id = entry.get("id", number)
+            if prompt_id in skip:
+                continue
+            messages = entry.get("messages") or [{"role": "user", "content": entry.get("prompt", "")}]
+            params = {key: entry[key] for key in REQUEST_PARAMS if key in entry}
+            yield prompt_id, messages, params
+
+
+def count_lines(path):
+    """Number of non-blank lines, which is what read_prompts yields prompts for"""
+    with open(path, "rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+class BatchRunner:
+    """Dispatch prompts with bounded concurrency and append results as they finish"""
+
+    def __init__(self, client, concurrency=16, default_params=None, retry_delays=RETRY_DELAYS,
+                 on_progress=None, cancel_event=None):
+        self.client = client
+        self.concurrency = concurrency
+        self.default_params = dict(default_params or {})
+        self.retry_delays = retry_delays
+        self.on_progress = on_progress
+        self.cancel_event = cancel_event
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.output_tokens = 0
+        self.latencies = []
+
+    def _cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    async def _run_one(self, prompt_id, messages, params):
+        params = dict(self.default_params, **params)
+        for attempt, delay in enumerate((*self.retry_delays, None)):
+            try:
+                result = await self.client.chat(messages, **params)
+                return {
+                    "id": prompt_id,
+                    "response": result.text,
+                    "finish_reason": result.finish_reason,
+                    "prompt_tokens": result.prompt_tokens,
+                    "tokens": result.tokens,
+                    "ttft_s": result.ttft,
+                    "duration_s": result.duration,
+                    "cached": result.cached
+                }, None
+            except ChatError as e:
+                if delay is None or self._cancelled():
+                    return None, {"id": prompt_id, "error": str(e), "attempts": attempt + 1}
+                await asyncio.sleep(delay)
+
+    async def run(self, input_path, output_path):
+        """Process input_path into output_path; returns a throughput report"""
+        output_path = Path(output_path)
+        errors_path = output_path.with_name(output_path.name + ".errors.jsonl")
+        done = completed_ids(output_path)
+        self.skipped = len(done)
+        total = count_lines(input_path)
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)  # bounded: input is streamed, not loaded
+        start = time.perf_counter()
+
+        # Errors from earlier runs are retried, so start the error file afresh
+        with open(output_path, "a", encoding="utf-8") as out, open(errors_path, "w", encoding="utf-8") as err:
+            async def feed():
+                for item in read_prompts(input_path, done):
+                    if self._cancelled():
+                        break
+                    await queue.put(item)
+                for _ in range(self.concurrency):
+                    await queue.put(None)
+
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    if self._cancelled():
+                        continue
+                    record, error = await self._run_one(*item)
+                    if record is not None:
+                        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        out.flush()
+                        self.succeeded += 1
+                        self.output_tokens += record["tokens"]
+                        self.latencies.append(record["duration_s"])
+                    else:
+                        err.write(json.dumps(error, ensure_ascii=False) + "\n")
+                        err.flush()
+                        self.failed += 1
+                    if self.on_progress is not None:
+                        self.on_progress(self.skipped + self.succeeded + self.failed, total)
+
+            await asyncio.gather(feed(), *(worker() for _ in range(self.concurrency)))
+
+        if not self.failed:
+            errors_path.unlink(missing_ok=True)
+        return self.report(time.perf_counter() - start, output_path, errors_path)
+
+    def report(self, wall_time, output_path, errors_path):
+        latencies_ms = [value * 1000 for value in self.latencies]
+        return {
+            "output": str(output_path),
+            "errors": str(errors_path) if self.failed else None,
+            "cancelled": self._cancelled(),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped_already_done": self.skipped,
+            "wall_time_s": round(wall_time, 3),
+            "requests_per_s": round(self.succeeded / wall_time, 3) if wall_time else None,
+            "output_tokens_per_s": round(self.output_tokens / wall_time, 1) if wall_time else None,
+            "latency_p50_ms": round(percentile(latencies_ms, 0.50), 1) if latencies_ms else None,
+            "latency_p95_ms": round(percentile(latencies_ms, 0.95), 1) if latencies_ms else None
+        }
+
+
+def run_batch(input_path, output_path, endpoint=None, concurrency=16, default_params=None,
+              on_progress=None, cancel_event=None, cache=None):
+    """Run a batch synchronously (e.g. from a background job); returns the report.
+
+    With a ResponseCache, deterministic prompts seen before are answered from it.
+    """
+    if endpoint is None:
+        endpoint = get_config().chat_endpoint()
+
+    async def main():
+        client = AsyncChatClient(endpoint.url, endpoint.model, timeout=endpoint.timeout_seconds,
+                                 max_connections=concurrency, client_id="batch")
+        runner = BatchRunner(AsyncCachedChatClient(client, cache) if cache is not None else client,
+                             concurrency, default_params, on_progress=on_progress, cancel_event=cancel_event)
+        try:
+            report = await runner.run(input_path, output_path)
+        finally:
+            await client.close()
+        if cache is not None:
+            cache.flush()
+            report["cache"] = cache.stats()
+        return report
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through the configured LLM endpoint")
+    parser.add_argument("input", help="JSONL prompts")
+    parser.add_argument("output", help="JSONL results; also the resume checkpoint")
+    parser.add_argument("--endpoint", help="llm_endpoints entry in llm_config.yaml (default: the gateway if enabled, else the first enabled)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-tokens", type=int, help="default max_tokens for lines that set none")
+    parser.add_argument("--temperature", type=float, help="default temperature for lines that set none")
+    parser.add_argument("--cache", action="store_true",
+                        help="answer repeated deterministic prompts (temperature 0 or a seed) from the response cache")
+    parser.add_argument("--report", help="write the throughput report as JSON here")
+    args = parser.parse_args()
+
+    defaults = {}
+    if args.max_tokens is not None:
+        defaults["max_tokens"] = args.max_tokens
+    if args.temperature is not None:
+        defaults["temperature"] = args.temperature
+
+    last_print = [0.0]
+
+    def progress(done, total):
+        now = time.monotonic()
+        if now - last_print[0] >= 1 or done == total:
+            last_print[0] = now
+            print(f"\r{done}/{total} prompts", end="", flush=True)
+
+    config = get_config()
+    endpoint = config.endpoint(args.endpoint) if args.endpoint else config.chat_endpoint()
+    try:
+        report = run_batch(args.input, args.output, endpoint, args.concurrency, defaults, on_progress=progress,
+                           cache=get_response_cache() if args.cache else None)
+    except KeyboardInterrupt:
+        print("\nInterrupted; rerun the same command to resume")
+        return 130
+    print()
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+import copy
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from llm.async_http import ConnectionPool, HTTPError
+from llm.workload import current_recorder
+from utils.config import ConfigError, get_config, get_config_loader
+
+DEFAULT_TIMEOUT = 300  # seconds
+CONNECT_TIMEOUT = 5
+CLIENT_ID_HEADER = "X-Client-Id"
+
+
+class ChatError(Exception):
+    """Raised when the endpoint cannot be reached or returns an error"""
+
+
+class ChatResult:
+    """The reply to one chat request plus its timing.
+
+    ttft is the time from sending the request to the first content token;
+    tokens_per_s is the decode rate after the first token.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.parts = []
+        self.tokens = 0
+        self.prompt_tokens = None
+        self.finish_reason = None
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.token_times = []
+        self.finished_at = None
+        self.cancelled = False
+        self.cached = False
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    @property
+    def ttft(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+    @property
+    def duration(self):
+        return (self.finished_at or time.perf_counter()) - self.started
+
+    @property
+    def tokens_per_s(self):
+        if self.first_token_at is None or self.finished_at is None or self.tokens < 2:
+            return None
+        decode_time = self.finished_at - self.first_token_at
+        return (self.tokens - 1) / decode_time if decode_time > 0 else None
+
+    @property
+    def inter_token_latencies(self):
+        """Seconds between consecutive streamed deltas"""
+        return [b - a for a, b in zip(self.token_times, self.token_times[1:])]
+
+    def handle_event(self, data, on_token=None):
+        """Apply one SSE data payload; returns False once the stream is done"""
+        if data == "[DONE]":
+            return False
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            raise ChatError(f"Malformed event: {data[:200]}")
+        if not isinstance(chunk, dict):
+            raise ChatError(f"Malformed event: {data[:200]}")
+        if "error" in chunk:
+            raise ChatError(f"Server reported: {chunk['error']}")
+        usage = chunk.get("usage")
+        if usage:
+            self.tokens = usage.get("completion_tokens", self.tokens)
+            self.prompt_tokens = usage.get("prompt_tokens")
+        for choice in chunk.get("choices") or []:
+            if choice.get("finish_reason"):
+                self.finish_reason = choice["finish_reason"]
+            text = (choice.get("delta") or {}).get("content")
+            if not text:
+                continue
+            now = time.perf_counter()
+            if self.first_token_at is None:
+                self.first_token_at = now
+            self.token_times.append(now)
+            self.parts.append(text)
+            if on_token is not None:
+                on_token(text)
+        return True
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+        if not self.tokens:
+            # No usage block: one streamed delta is one token for OpenAI-style servers
+            self.tokens = len(self.parts)
+        return self
+
+    def as_dict(self):
+        return {
+            "model": self.model,
+            "tokens": self.tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "finish_reason": self.finish_reason,
+            "ttft_s": self.ttft,
+            "duration_s": self.duration,
+            "tokens_per_s": self.tokens_per_s,
+            "cancelled": self.cancelled,
+            "cached": self.cached
+        }
+
+
+class SSEParser:
+    """Collects server-sent event lines; feed() returns each complete data payload"""
+
+    def __init__(self):
+        self.data = []
+
+    def feed(self, line):
+        line = line.rstrip(b"\r")
+        if not line:
+            return self.flush()
+        if line.startswith(b"data:"):
+            self.data.append(line[5:].lstrip(b" "))
+        return None
+
+    def flush(self):
+        if not self.data:
+            return None
+        # A server sending invalid UTF-8 gets a malformed-event ChatError from handle_event, not a UnicodeDecodeError
+        payload, self.data = b"\n".join(self.data).decode("utf-8", errors="replace"), []
+        return payload
+
+
+def iter_sse_data(lines):
+    """Yield the data payloads of server-sent events from an iterator of byte lines"""
+    parser = SSEParser()
+    for line in lines:
+        payload = parser.feed(line)
+        if payload is not None:
+            yield payload
+    payload = parser.flush()
+    if payload is not None:
+        yield payload
+
+
+def chat_body(model, messages, params):
+    body = dict(params, model=model, messages=list(messages), stream=True)
+    body.setdefault("stream_options", {"include_usage": True})
+    return body
+
+
+class ChatClient:
+    """Client for an OpenAI-compatible /v1/chat/completions endpoint.
+
+    One requests.Session with a keep-alive connection pool is shared by all
+    calls (and threads), so only the first request pays for the TCP connect.
+    client_id is sent as X-Client-Id, which the gateway queues fairly by.
+    """
+
+    def __init__(self, base_url, model, timeout=DEFAULT_TIMEOUT, pool_size=8, api_key=None, client_id=None):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.client_id = client_id
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def for_client(self, client_id):
+        """A view of this client that sends client_id and shares its connection pool"""
+        view = copy.copy(self)
+        view.client_id = client_id
+        return view
+
+    def models(self):
+        """Return the model ids the endpoint serves"""
+        try:
+            response = self.session.get(f"{self.base_url}/models", timeout=(CONNECT_TIMEOUT, self.timeout))
+            response.raise_for_status()
+            return [model["id"] for model in response.json().get("data", [])]
+        except (requests.RequestException, ValueError) as e:
+            raise ChatError(f"Cannot list models at {self.base_url}: {e}")
+
+    def chat(self, messages, on_token=None, cancel_event=None, model=None, **params):
+        """Send a chat request and stream the reply.
+
+        on_token(text) is called for each content delta as it arrives.
+        Setting cancel_event stops reading and closes the connection. Extra
+        keyword arguments (temperature, max_tokens, ...) go into the request
+        body. Returns a ChatResult; raises ChatError on failure.
+        """
+        model = model or self.model
+        recorder = current_recorder()
+        started = time.time()
+        try:
+            result = self._chat(messages, on_token, cancel_event, model, params)
+        except ChatError as e:
+            if recorder is not None:
+                recorder.record(started, model, messages, params, error=e)
+            raise
+        if recorder is not None:
+            recorder.record(started, model, messages, params, result)
+        return result
+
+    def _chat(self, messages, on_token, cancel_event, model, params):
+        result = ChatResult(model)
+        try:
+            response = self.session.post(
+                f"{self.base_url}/chat/completions",
+                json=chat_body(model, messages, params),
+                headers={CLIENT_ID_HEADER: self.client_id} if self.client_id else None,
+                stream=True,
+                timeout=(CONNECT_TIMEOUT, self.timeout)
+            )
+        except requests.RequestException as e:
+            raise ChatError(f"Cannot reach {self.base_url}: {e}")
+
+        with response:
+            if response.status_code != 200:
+                raise ChatError(f"{self.base_url} returned HTTP {response.status_code}: {_error_message(response)}")
+            try:
+                # chunk_size=None hands over data as soon as it arrives instead
+                # of waiting for a fixed-size buffer to fill
+                for data in iter_sse_data(response.iter_lines(chunk_size=None, delimiter=b"\n")):
+                    if cancel_event is not None and cancel_event.is_set():
+                        result.cancelled = True
+                        response.close()
+                        break
+                    if not result.handle_event(data, on_token):
+                        break
+            except requests.RequestException as e:
+                raise ChatError(f"Stream from {self.base_url} failed: {e}")
+        return result.finish()
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncChatClient:
+    """asyncio counterpart of ChatClient for running many requests at once.
+
+    Uses the stdlib ConnectionPool from async_http, so up to max_connections
+    requests share keep-alive connections within one event loop.
+    """
+
+    def __init__(self, base_url, model, timeout=DEFAULT_TIMEOUT, max_connections=64, api_key=None, client_id=None):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        if client_id:
+            headers[CLIENT_ID_HEADER] = client_id
+        self.pool = ConnectionPool(
+            base_url, max_connections=max_connections, timeout=timeout,
+            connect_timeout=CONNECT_TIMEOUT, headers=headers
+        )
+
+    async def chat(self, messages, on_token=None, model=None, **params):
+        """Send a chat request and stream the reply; see ChatClient.chat"""
+        model = model or self.model
+        recorder = current_recorder()
+        started = time.time()
+        try:
+            result = await self._chat(messages, on_token, model, params)
+        except ChatError as e:
+            if recorder is not None:
+                recorder.record(started, model, messages, params, error=e)
+            raise
+        if recorder is not None:
+            recorder.record(started, model, messages, params, result)
+        return result
+
+    async def _chat(self, messages, on_token, model, params):
+        result = ChatResult(model)
+        try:
+            async with self.pool.request("POST", "/chat/completions", chat_body(model, messages, params)) as response:
+                if response.status != 200:
+                    body = await response.read()
+                    raise ChatError(f"{self.base_url} returned HTTP {response.status}: {body[:200].decode('utf-8', 'replace')}")
+                parser = SSEParser()
+                async for line in response.iter_lines():
+                    data = parser.feed(line)
+                    if data is not None and not result.handle_event(data, on_token):
+                        break
+                # Drain what follows [DONE] so the connection can be reused
+                async for _ in response.iter_chunks():
+                    pass
+        except HTTPError as e:
+            raise ChatError(f"Request to {self.base_url} failed: {e}")
+        return result.finish()
+
+    async def close(self):
+        await self.pool.close()
+
+
+def _error_message(response):
+    try:
+        body = response.json()
+    except ValueError:
+        return response.text[:200]
+    # OpenAI-style {"error": {"message": ...}} or {"error": "..."}; anything else is shown as is
+    error = body.get("error", body) if isinstance(body, dict) else body
+    return error.get("message", error) if isinstance(error, dict) else str(error)[:200]
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+_subscribed = False
+
+
+def _close_replaced_clients(new, old):
+    """Config subscriber: close the clients of endpoints the new config no longer has"""
+    endpoints = list(new.endpoints)
+    try:
+        endpoints.append(new.chat_endpoint())
+    except ConfigError:
+        pass
+    keys = {(endpoint.url, endpoint.model, endpoint.timeout_seconds) for endpoint in endpoints}
+    with _clients_lock:
+        replaced = [_clients.pop(key) for key in list(_clients) if key not in keys]
+    for client in replaced:
+        client.close()
+
+
+def get_chat_client(endpoint=None):
+    """Return a shared client for a config Endpoint (the chat endpoint if None).
+
+    Clients are keyed by URL, model and timeout, so a hot-reloaded config
+    gets a new client while in-flight requests finish on the old one; clients
+    of endpoints that a reload removes or changes are closed.
+    """
+    global _subscribed
+    if endpoint is None:
+        endpoint = get_config().chat_endpoint()
+    key = (endpoint.url, endpoint.model, endpoint.timeout_seconds)
+    with _clients_lock:
+        if not _subscribed:
+            get_config_loader().subscribe(_close_replaced_clients)
+            _subscribed = True
+        if key not in _clients:
+            _clients[key] = ChatClient(endpoint.url, endpoint.model, timeout=endpoint.timeout_seconds)
+        return _clients[key]
@@ -0,0 +1,74 @@
+"""Send one prompt to several endpoints at once and interleave their streams.
+
+Each endpoint gets a worker thread that streams its reply onto a shared
+queue, so a comparison takes as long as the slowest model rather than the
+sum of all of them. The caller consumes events on its own thread, which is
+what Streamlit needs: only the script thread may update the page.
+
+    for index, kind, value in fan_out(endpoints, messages, max_tokens=256):
+        ...  # kind is "token" (text), "done" (ChatResult) or "error" (message)
+"""
+import queue
+import threading
+
+from llm.chat_client import ChatError, get_chat_client
+
+TOKEN = "token"
+DONE = "done"
+ERROR = "error"
+
+
+def fan_out(endpoints, messages, cancel_event=None, client_id=None, **params):
+    """Yield (endpoint index, kind, value) events from all endpoints as they arrive"""
+    events = queue.Queue()
+    if cancel_event is None:
+        cancel_event = threading.Event()
+
+    def worker(index, endpoint):
+        try:
+            result = get_chat_client(endpoint).for_client(client_id).chat(
+                messages, on_token=lambda text: events.put((index, TOKEN, text)),
+                cancel_event=cancel_event, **params
+            )
+            events.put((index, DONE, result))
+        except ChatError as e:
+            events.put((index, ERROR, str(e)))
+        except Exception as e:  # a worker must always report back or the consumer waits forever
+            events.put((index, ERROR, f"{type(e).__name__}: {e}"))
+
+    threads = [
+        threading.Thread(target=worker, args=(index, endpoint), daemon=True, name=f"compare-{endpoint.name}")
+        for index, endpoint in enumerate(endpoints)
+    ]
+    for thread in threads:
+        thread.start()
+    pending = len(threads)
+    try:
+        while pending:
+            index, kind, value = events.get()
+            if kind != TOKEN:
+                pending -= 1
+            yield index, kind, value
+    finally:
+        if pending:
+            # The consumer stopped early (e.g. a rerun); stop the remaining streams
+            cancel_event.set()
+
+
+def compare_rows(endpoints, outcomes):
+    """One summary row per endpoint from {index: ChatResult or error message}"""
+    rows = []
+    for index, endpoint in enumerate(endpoints):
+        outcome = outcomes.get(index)
+        row = {"endpoint": endpoint.name, "model": endpoint.model}
+        if isinstance(outcome, str) or outcome is None:
+            row.update(error=outcome or "no reply")
+        else:
+            row.update(
+                ttft_ms=round(outcome.ttft * 1000, 1) if outcome.ttft is not None else None,
+                tokens=outcome.tokens,
+                tokens_per_s=round(outcome.tokens_per_s, 1) if outcome.tokens_per_s else None,
+                duration_s=round(outcome.duration, 2)
+            )
+        rows.append(row)
+    return rows
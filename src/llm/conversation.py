@@ -0,0 +1,217 @@
+"""Chat history that fits the model's context window.
+
+Every message's token count is computed once, when it is added, so sizing
+the prompt each turn is a sum rather than a re-tokenisation of the whole
+conversation. When the prompt outgrows the budget, the oldest turns are
+folded into a summary in one step down to a low-water mark instead of
+dropping one message per turn: the system prompt, the summary and the
+surviving turns then stay byte-identical for many turns, which is what lets
+vLLM's prefix cache skip their prefill.
+
+    conversation = Conversation(budget=1536, count_tokens=token_counter(model))
+    conversation.add("user", text)
+    result = client.chat(conversation.request_messages())
+    conversation.add("assistant", result.text)
+"""
+import functools
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant."
+MESSAGE_OVERHEAD = 4  # role and separator tokens most chat templates add per message
+LOW_WATER = 0.6  # after trimming, the prompt uses at most this fraction of the budget
+SUMMARY_SHARE = 0.25  # the summary may use at most this fraction of the budget
+
+
+def approximate_tokens(text):
+    """Fast estimate for English text: about four characters per token"""
+    return max(1, (len(text) + 3) // 4)
+
+
+@functools.lru_cache(maxsize=8)
+def token_counter(model):
+    """A token counting function for model; the tokenizer if available, else approximate_tokens.
+
+    Uses the Hugging Face tokenizer when transformers is installed and the
+    model is already in the local cache (vLLM downloads it there); nothing is
+    fetched over the network.
+    """
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model, local_files_only=True)
+    except Exception:  # optional dependency, and the model may not be cached
+        return approximate_tokens
+
+    def count(text):
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return count
+
+
+def extractive_summary(previous, messages):
+    """Summarise without a model call: the earlier summary plus the user's questions"""
+    questions = [m.content.strip().replace("\n", " ") for m in messages if m.role == "user"]
+    lines = [previous] if previous else []
+    lines += [f"- The user asked: {question[:200]}" for question in questions]
+    return "\n".join(lines)
+
+
+def chat_summarizer(client, max_tokens=200):
+    """A summarize function that asks the model itself, falling back to extractive_summary"""
+    from llm.chat_client import ChatError
+
+    def summarize(previous, messages):
+        transcript = "\n".join(f"{m.role}: {m.content}" for m in messages)
+        if previous:
+            transcript = f"Earlier summary: {previous}\n{transcript}"
+        request = [
+            {"role": "system", "content": "Summarise the conversation below in a few sentences. "
+                                          "Keep facts, names and decisions; omit pleasantries."},
+            {"role": "user", "content": transcript}
+        ]
+        try:
+            text = client.chat(request, temperature=0, max_tokens=max_tokens).text.strip()
+        except ChatError:
+            text = ""
+        return text or extractive_summary(previous, messages)
+    return summarize
+
+
+class Message:
+    __slots__ = ("role", "content", "tokens")
+
+    def __init__(self, role, content, tokens):
+        self.role = role
+        self.content = content
+        self.tokens = tokens
+
+    def as_dict(self):
+        return {"role": self.role, "content": self.content}
+
+
+class Conversation:
+    """Full chat history plus the window of it that is sent to the model.
+
+    messages holds every message for display; messages[start:] is the
+    window. Everything before start is represented by summary, which is
+    appended to the system prompt so the prompt's leading tokens never change.
+    """
+
+    def __init__(self, system_prompt=DEFAULT_SYSTEM_PROMPT, budget=3072, count_tokens=approximate_tokens,
+                 summarize=extractive_summary, low_water=LOW_WATER):
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.count_tokens = count_tokens
+        self.summarize = summarize
+        self.low_water = low_water
+        self.messages = []
+        self.start = 0
+        self.summary = ""
+        self.trims = 0
+        self.last_prompt_tokens = None
+        self._window_tokens = 0
+        self._system_tokens = None
+
+    def _count(self, text):
+        return self.count_tokens(text) + MESSAGE_OVERHEAD
+
+    def set_counter(self, count_tokens):
+        """Switch token counters (e.g. the endpoint's model changed), recounting the stored messages"""
+        if count_tokens is self.count_tokens:
+            return
+        self.count_tokens = count_tokens
+        for message in self.messages:
+            message.tokens = self._count(message.content)
+        self._window_tokens = sum(message.tokens for message in self.messages[self.start:])
+        self._system_tokens = None
+
+    def add(self, role, content):
+        message = Message(role, content, self._count(content))
+        self.messages.append(message)
+        self._window_tokens += message.tokens
+        return message
+
+    def system_message(self):
+        content = self.system_prompt
+        if self.summary:
+            content += f"\n\nSummary of the earlier conversation:\n{self.summary}"
+        return {"role": "system", "content": content}
+
+    @property
+    def system_tokens(self):
+        if self._system_tokens is None:
+            self._system_tokens = self._count(self.system_message()["content"])
+        return self._system_tokens
+
+    @property
+    def prompt_tokens(self):
+        """Tokens the next request's messages take, from the cached counts"""
+        return self.system_tokens + self._window_tokens
+
+    def trim(self):
+        """Fold the oldest turns into the summary once the prompt exceeds the budget.
+
+        Whole turns are dropped (the window always starts at a user message)
+        until the prompt is under low_water * budget, but the latest turn is
+        always kept. Returns True if anything was folded.
+        """
+        if self.prompt_tokens <= self.budget:
+            return False
+        target = self.budget * self.low_water
+        last_user = max((i for i, m in enumerate(self.messages) if m.role == "user"), default=len(self.messages))
+        end = self.start
+        tokens = self._window_tokens
+        while end < last_user and self.system_tokens + tokens > target:
+            tokens -= self.messages[end].tokens
+            end += 1
+            # Never split a turn: keep dropping until the next user message
+            while end < last_user and self.messages[end].role != "user":
+                tokens -= self.messages[end].tokens
+                end += 1
+        if end == self.start:
+            return False
+        self.summary = self._fit_summary(self.summarize(self.summary, self.messages[self.start:end]))
+        self._system_tokens = None
+        self.start = end
+        self._window_tokens = tokens
+        self.trims += 1
+        return True
+
+    def _fit_summary(self, summary):
+        """Cut the oldest part of the summary until it fits its share of the budget"""
+        limit = self.budget * SUMMARY_SHARE
+        while summary and self.count_tokens(summary) > limit:
+            summary = summary[len(summary) // 4 + 1:]
+            summary = summary[summary.find("\n") + 1:] if "\n" in summary else summary
+        return summary
+
+    def request_messages(self):
+        """The messages for the next request: system prompt (with summary) and the window"""
+        self.trim()
+        self.last_prompt_tokens = self.prompt_tokens
+        return [self.system_message()] + [m.as_dict() for m in self.messages[self.start:]]
+
+    def pop(self):
+        """Remove the latest message, e.g. a question whose request failed"""
+        message = self.messages.pop()
+        if len(self.messages) >= self.start:
+            self._window_tokens -= message.tokens
+        else:
+            self.start = len(self.messages)
+        return message
+
+    def clear(self):
+        self.messages = []
+        self.start = 0
+        self.summary = ""
+        self.last_prompt_tokens = None
+        self._window_tokens = 0
+        self._system_tokens = None
+
+    def stats(self):
+        return {
+            "messages": len(self.messages),
+            "in_window": len(self.messages) - self.start,
+            "summarised": self.start,
+            "prompt_tokens": self.prompt_tokens,
+            "last_prompt_tokens": self.last_prompt_tokens,
+            "budget": self.budget,
+            "trims": self.trims
+        }
@@ -0,0 +1,514 @@
+"""OpenAI-compatible gateway in front of several vLLM / LM Studio backends.
+
+Exposes one /v1 URL and forwards each request to a healthy backend serving
+the requested model, picking the one with the fewest outstanding requests.
+Every backend has a concurrency limit (max_concurrency in llm_config.yaml);
+requests beyond the limits wait in a per-client round-robin queue so one
+busy client cannot starve the others, and are rejected with 429 once the
+queue is full. Clients are told apart by their X-Client-Id header (the chat
+tab sends its session id, the batch runner "batch"), falling back to the
+peer address. Streamed responses are relayed chunk by chunk and only read
+from the backend as fast as the client consumes them.
+
+    python src/llm/gateway.py                # settings from the gateway section
+    python src/llm/gateway.py --port 9000
+
+Besides /v1/*, GET /health and GET /gateway/stats report the gateway state.
+Backends are re-read from the config on every health check, so endpoints
+added to or removed from llm_config.yaml take effect without a restart.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from llm.async_http import ConnectionPool, HTTPError
+from utils.config import ConfigError, get_config
+from utils.logging_utils import LOGGER_NAME
+
+PROXIED_PATHS = ("/v1/chat/completions", "/v1/completions", "/v1/embeddings")
+RETRY_STATUSES = (502, 503, 504)  # answered by another backend if nothing was sent yet
+HEALTH_TIMEOUT = 3
+WRITE_BUFFER_HIGH = 64 * 1024  # bytes buffered per client before drain() waits
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+    429: "Too Many Requests", 502: "Bad Gateway", 503: "Service Unavailable", 504: "Gateway Timeout"
+}
+
+
+class Backend:
+    """One upstream endpoint and its routing state"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.name = endpoint.name
+        self.limit = endpoint.max_concurrency
+        self.pool = ConnectionPool(endpoint.url, max_connections=endpoint.max_concurrency,
+                                   timeout=endpoint.timeout_seconds)
+        self.health_pool = ConnectionPool(endpoint.url, max_connections=1, timeout=HEALTH_TIMEOUT,
+                                          connect_timeout=HEALTH_TIMEOUT)
+        self.models = {endpoint.model}
+        self.healthy = True  # optimistic until the first check, so startup does not block
+        self.retired = False
+        self.outstanding = 0
+        self.served = 0
+        self.failures = 0
+        self.last_error = None
+
+    def serves(self, model):
+        return model is None or model in self.models
+
+    def available(self, model):
+        return self.healthy and not self.retired and self.outstanding < self.limit and self.serves(model)
+
+    def mark_failed(self, error):
+        self.healthy = False
+        self.failures += 1
+        self.last_error = str(error)
+
+    async def check(self):
+        """Refresh health and the served model list from GET /models"""
+        try:
+            async with self.health_pool.request("GET", "/models") as response:
+                payload = await response.json()
+            if response.status != 200:
+                raise HTTPError(f"GET /models returned {response.status}")
+            self.models = {m["id"] for m in payload.get("data", []) if "id" in m} | {self.endpoint.model}
+            self.healthy = True
+            self.last_error = None
+        except (HTTPError, KeyError, TypeError, AttributeError) as e:
+            self.healthy = False
+            self.last_error = str(e)
+        return self.healthy
+
+    async def close(self):
+        await self.pool.close()
+        await self.health_pool.close()
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "url": self.endpoint.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "limit": self.limit,
+            "served": self.served,
+            "failures": self.failures,
+            "models": sorted(self.models),
+            "last_error": self.last_error
+        }
+
+
+class QueueFull(Exception):
+    pass
+
+
+class NoBackend(Exception):
+    pass
+
+
+class Scheduler:
+    """Hand out backend slots: least outstanding first, waiters served round-robin per client"""
+
+    def __init__(self, max_queue=256):
+        self.backends = []
+        self.max_queue = max_queue
+        self.waiting = OrderedDict()  # client -> deque of (future, model, excluded)
+        self.queued = 0
+        self.rejected = 0
+        self._tie = itertools.count()
+
+    def _pick(self, model, excluded=()):
+        candidates = [b for b in self.backends if b not in excluded and b.available(model)]
+        if not candidates:
+            return None
+        least = min(b.outstanding for b in candidates)
+        candidates = [b for b in candidates if b.outstanding == least]
+        return candidates[next(self._tie) % len(candidates)]
+
+    def _take(self, backend):
+        backend.outstanding += 1
+        return backend
+
+    def check_routable(self, model, excluded=()):
+        """Raise NoBackend if no healthy backend could ever serve model"""
+        live = [b for b in self.backends if not b.retired and b not in excluded]
+        if not any(b.serves(model) for b in live):
+            raise NoBackend(f"No backend serves model {model!r}")
+        if not any(b.healthy and b.serves(model) for b in live):
+            raise NoBackend(f"No healthy backend for model {model!r}")
+
+    async def acquire(self, client, model, timeout, excluded=()):
+        """Wait for a slot and return its Backend; release() it when done"""
+        self.check_routable(model, excluded)
+        # dispatch() runs whenever a slot frees up, so a free slot here is one
+        # no waiter can use and taking it does not overtake anyone
+        backend = self._pick(model, excluded)
+        if backend is not None:
+            return self._take(backend)
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(f"{self.queued} requests already queued")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, model, excluded)
+        self.waiting.setdefault(client, deque()).append(entry)
+        self.queued += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if future.done() and not future.cancelled():
+                self.release(future.result())
+            else:
+                future.cancel()
+                self._remove(client, entry)
+            raise
+
+    def _remove(self, client, entry):
+        queue = self.waiting.get(client)
+        if queue is not None and entry in queue:
+            queue.remove(entry)
+            self.queued -= 1
+            if not queue:
+                del self.waiting[client]
+
+    def release(self, backend):
+        backend.outstanding -= 1
+        self.dispatch()
+
+    def dispatch(self):
+        """Give free slots to waiting clients in round-robin order"""
+        progress = True
+        while progress and self.waiting:
+            progress = False
+            for client in list(self.waiting):
+                queue = self.waiting[client]
+                future, model, excluded = queue[0]
+                backend = self._pick(model, excluded)
+                if backend is None:
+                    continue
+                queue.popleft()
+                self.queued -= 1
+                # Served clients go to the back of the line
+                del self.waiting[client]
+                if queue:
+                    self.waiting[client] = queue
+                future.set_result(self._take(backend))
+                progress = True
+
+
+class Request:
+    def __init__(self, method, path, version, headers, body):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+async def read_request(reader):
+    """Parse one request from a client connection; None when it closed"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, path, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(f"Malformed request line: {line[:80]!r}")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        return Request(method, path, version, headers, None)
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return Request(method, path, version, headers, body)
+
+
+def _head(status, headers):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}"]
+    lines += [f"{key}: {value}" for key, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+class Gateway:
+    """The gateway server; endpoints=None follows the llm_endpoints in the config"""
+
+    def __init__(self, endpoints=None, max_queue=256, queue_timeout=60, health_interval=5):
+        self.static_endpoints = endpoints
+        self.scheduler = Scheduler(max_queue)
+        self.queue_timeout = queue_timeout
+        self.health_interval = health_interval
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.started = time.time()
+        self.requests = 0
+        self.retries = 0
+        self._server = None
+        self._health_task = None
+        self._retiring = set()
+        self.reconcile()
+
+    @classmethod
+    def from_config(cls, config=None):
+        settings = (config or get_config()).gateway
+        return cls(max_queue=settings.max_queue, queue_timeout=settings.queue_timeout_seconds,
+                   health_interval=settings.health_interval_seconds)
+
+    @property
+    def backends(self):
+        return self.scheduler.backends
+
+    def _log(self, level, message):
+        self.logger.log(level, message, extra={"stage": "gateway"})
+
+    def reconcile(self):
+        """Match the backend list to the configured endpoints"""
+        if self.static_endpoints is not None:
+            endpoints = self.static_endpoints
+        else:
+            try:
+                endpoints = [e for e in get_config().endpoints if e.enabled]
+            except ConfigError as e:
+                self._log(logging.ERROR, f"{e}; keeping the current backends")
+                return
+        current = {b.endpoint: b for b in self.backends}
+        backends = []
+        for endpoint in endpoints:
+            backend = current.pop(endpoint, None)
+            if backend is None:
+                backend = Backend(endpoint)
+                self._log(logging.INFO, f"Backend {endpoint.name} added: {endpoint.url}")
+            backends.append(backend)
+        for backend in current.values():
+            # In-flight requests finish on a retired backend; its pools close once idle
+            backend.retired = True
+            self._retiring.add(backend)
+            self._log(logging.INFO, f"Backend {backend.name} removed")
+        self.scheduler.backends = backends
+
+    async def check_health(self):
+        self.reconcile()
+        results = await asyncio.gather(*(b.check() for b in self.backends))
+        for backend, healthy in zip(self.backends, results):
+            if not healthy:
+                self._log(logging.WARNING, f"Backend {backend.name} unhealthy: {backend.last_error}")
+        for backend in [b for b in self._retiring if not b.outstanding]:
+            self._retiring.discard(backend)
+            await backend.close()
+        # Recovered backends can take queued requests
+        self.scheduler.dispatch()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:  # the loop must outlive any one bad check
+                self._log(logging.ERROR, f"Health check failed: {e}")
+
+    async def start(self, host="127.0.0.1", port=8080):
+        await self.check_health()
+        self._server = await asyncio.start_server(self._handle_connection, host, port, limit=1 << 20)
+        self._health_task = asyncio.ensure_future(self._health_loop())
+        return self
+
+    @property
+    def url(self):
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for backend in list(self.backends) + list(self._retiring):
+            await backend.close()
+
+    async def _handle_connection(self, reader, writer):
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
+        peer = writer.get_extra_info("peername")
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                keep_alive = await self._handle_request(request, writer, peer[0] if peer else "unknown")
+                if not keep_alive or not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, HTTPError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send_json(self, writer, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        head = dict(headers or {}, **{"Content-Type": "application/json", "Content-Length": str(len(body))})
+        writer.write(_head(status, head) + body)
+        await writer.drain()
+        return True
+
+    async def _send_error(self, writer, status, message, headers=None):
+        return await self._send_json(writer, status, {"error": {"message": message, "code": status}}, headers)
+
+    async def _handle_request(self, request, writer, peer):
+        """Answer one request; returns False when the client connection must close"""
+        path = request.path.split("?")[0].rstrip("/")
+        if request.method == "GET":
+            if path == "/v1/models":
+                return await self._send_json(writer, 200, self.models())
+            if path in ("/health", ""):
+                healthy = any(b.healthy for b in self.backends)
+                return await self._send_json(writer, 200 if healthy else 503, {"status": "ok" if healthy else "down"})
+            if path == "/gateway/stats":
+                return await self._send_json(writer, 200, self.stats())
+            return await self._send_error(writer, 404, f"Unknown path {request.path}")
+        if request.method != "POST":
+            return await self._send_error(writer, 405, f"{request.method} is not supported")
+        if path not in PROXIED_PATHS:
+            return await self._send_error(writer, 404, f"Unknown path {request.path}")
+        if request.body is None:
+            await self._send_error(writer, 411, "Chunked request bodies are not supported; send Content-Length")
+            return False
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            return await self._send_error(writer, 400, "Request body is not JSON")
+        self.requests += 1
+        # Local callers (chat tab, batch runner, benchmarks) all share one
+        # address, so the queue key is their X-Client-Id; the peer is a fallback
+        client = request.headers.get("x-client-id") or f"peer:{peer}"
+        return await self._proxy(request, path, payload.get("model"), client, writer)
+
+    async def _proxy(self, request, path, model, client, writer):
+        headers = {"Content-Type": request.headers.get("content-type", "application/json")}
+        excluded = ()
+        for attempt in range(2):
+            try:
+                backend = await self.scheduler.acquire(client, model, self.queue_timeout, excluded)
+            except NoBackend as e:
+                return await self._send_error(writer, 404 if "serves" in str(e) else 503, str(e))
+            except QueueFull as e:
+                return await self._send_error(writer, 429, f"Gateway busy: {e}", {"Retry-After": "1"})
+            except asyncio.TimeoutError:
+                return await self._send_error(writer, 503, f"No backend slot within {self.queue_timeout}s")
+            try:
+                async with backend.pool.request("POST", path[len("/v1"):], request.body, headers) as response:
+                    if response.status in RETRY_STATUSES and attempt == 0 and len(self.backends) > 1:
+                        backend.failures += 1
+                        self.retries += 1
+                        excluded = (backend,)
+                        continue
+                    backend.served += 1
+                    return await self._relay(response, writer)
+            except HTTPError as e:
+                # _relay handles failures after the response started, so nothing was sent yet
+                backend.mark_failed(e)
+                self._log(logging.WARNING, f"Backend {backend.name} failed: {e}")
+                if attempt == 0:
+                    self.retries += 1
+                    excluded = (backend,)
+                    continue
+                return await self._send_error(writer, 502, f"Backend {backend.name} failed: {e}")
+            finally:
+                self.scheduler.release(backend)
+        return await self._send_error(writer, 502, "No backend could answer the request")
+
+    async def _relay(self, response, writer):
+        """Copy a backend response to the client, reading only as fast as the client drains"""
+        headers = {"Content-Type": response.headers.get("content-type", "application/json")}
+        length = response.headers.get("content-length")
+        if length is not None and "chunked" not in response.headers.get("transfer-encoding", ""):
+            headers["Content-Length"] = length
+        else:
+            headers["Transfer-Encoding"] = "chunked"
+            headers["Cache-Control"] = "no-cache"
+        writer.write(_head(response.status, headers))
+        try:
+            async for chunk in response.iter_chunks():
+                if not chunk:
+                    continue
+                if "Transfer-Encoding" in headers:
+                    chunk = f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n"
+                writer.write(chunk)
+                await writer.drain()
+        except HTTPError as e:
+            # Too late for an error status: cut the connection so the client sees a torn response
+            self._log(logging.WARNING, f"Backend response broke off: {e}")
+            return False
+        if "Transfer-Encoding" in headers:
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        return True
+
+    def models(self):
+        owners = {}
+        for backend in self.backends:
+            if backend.healthy:
+                for model in backend.models:
+                    owners.setdefault(model, []).append(backend.name)
+        return {
+            "object": "list",
+            "data": [{"id": model, "object": "model", "owned_by": ",".join(names)}
+                     for model, names in sorted(owners.items())]
+        }
+
+    def stats(self):
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "retries": self.retries,
+            "queued": self.scheduler.queued,
+            "waiting_clients": len(self.scheduler.waiting),
+            "rejected": self.scheduler.rejected,
+            "backends": [b.as_dict() for b in self.backends]
+        }
+
+
+async def serve(host, port, gateway=None):
+    gateway = gateway or Gateway.from_config()
+    await gateway.start(host, port)
+    print(f"Gateway on {gateway.url} for {', '.join(b.name for b in gateway.backends) or 'no backends'}")
+    try:
+        await gateway.serve_forever()
+    finally:
+        await gateway.close()
+
+
+def main():
+    settings = get_config().gateway
+    parser = argparse.ArgumentParser(description="Serve one OpenAI-compatible URL in front of the configured endpoints")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""Minimal OpenAI-compatible server for exercising the LLM clients without a GPU.
+
+Serves GET /v1/models and POST /v1/chat/completions (streamed as server-sent
+events or as one JSON response). Replies echo the last user message word by
+word, padded with filler words up to max_tokens, with a configurable delay
+before the first token and between tokens. To imitate a vLLM container
+starting up, --startup-delay answers 503 until the model is "loaded", and
+--cold-requests makes the first requests pay --cold-penalty extra (kernel
+compilation and graph capture on a real server).
+
+    python src/llm/mock_server.py --port 8000 --ttft 0.2 --itl 0.02
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER = "the quick brown fox jumps over the lazy dog".split()
+
+
+class MockSettings:
+    def __init__(self, ttft=0.05, itl=0.01, max_tokens=64, model="mock-model", fail_rate=0.0,
+                 startup_delay=0.0, cold_requests=0, cold_penalty=1.0):
+        self.ttft = ttft
+        self.itl = itl
+        self.max_tokens = max_tokens
+        self.model = model
+        self.fail_rate = fail_rate
+        self.ready_at = time.monotonic() + startup_delay
+        self.cold_requests = cold_requests
+        self.cold_penalty = cold_penalty
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self.lock = threading.Lock()
+
+
+def reply_tokens(messages, max_tokens):
+    """The words the mock model answers with, each one 'token'"""
+    prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    words = str(prompt).split() or ["Hello"]
+    tokens = [word + " " for word in words]
+    while len(tokens) < max_tokens:
+        tokens.append(FILLER[len(tokens) % len(FILLER)] + " ")
+    return tokens[:max_tokens]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    settings = MockSettings()
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client closed a kept-alive connection or stopped reading a stream
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _loading(self):
+        if time.monotonic() < self.settings.ready_at:
+            self._send_json(503, {"error": {"message": "Model is loading"}})
+            return True
+        return False
+
+    def do_GET(self):
+        if self._loading():
+            return
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": self.settings.model, "object": "model"}]})
+        elif self.path.rstrip("/") in ("/health", ""):
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Request body is not JSON"}})
+            return
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        if self._loading():
+            return
+
+        settings = self.settings
+        with settings.lock:
+            settings.requests += 1
+            settings.active += 1
+            settings.peak_active = max(settings.peak_active, settings.active)
+            fail = settings.fail_rate and (settings.requests * 0.6180339887) % 1 < settings.fail_rate
+            cold = settings.requests <= settings.cold_requests
+        try:
+            if cold:
+                time.sleep(settings.cold_penalty)
+            if fail:
+                self._send_json(503, {"error": {"message": "Mock server overloaded"}})
+                return
+            max_tokens = int(request.get("max_tokens") or settings.max_tokens)
+            tokens = reply_tokens(request.get("messages", []), max_tokens)
+            if request.get("stream"):
+                self._stream(request, tokens)
+            else:
+                time.sleep(settings.ttft + settings.itl * (len(tokens) - 1))
+                self._send_json(200, self._completion(request, tokens))
+        finally:
+            with settings.lock:
+                settings.active -= 1
+
+    def _completion(self, request, tokens):
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model") or self.settings.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "length"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens)
+            }
+        }
+
+    def _stream(self, request, tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = request.get("model") or self.settings.model
+
+        def event(delta, finish_reason=None, usage=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if usage is None else []
+            }
+            if usage is not None:
+                chunk["usage"] = usage
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        try:
+            time.sleep(self.settings.ttft)
+            event({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(self.settings.itl)
+                event({"content": token})
+            event({}, finish_reason="length")
+            if (request.get("stream_options") or {}).get("include_usage"):
+                event({}, usage=self._completion(request, tokens)["usage"])
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512  # load tests open many connections at once
+
+
+class MockServer:
+    """Run the mock server on a background thread, e.g. for benchmarks.
+
+        with MockServer(ttft=0.1) as server:
+            client = ChatClient(server.url, "mock-model")
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **settings):
+        self.settings = MockSettings(**settings)
+        handler = type("BoundMockHandler", (MockHandler,), {"settings": self.settings})
+        self.httpd = _Server((host, port), handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI-compatible chat API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--ttft", type=float, default=0.05, help="delay before the first token (s)")
+    parser.add_argument("--itl", type=float, default=0.01, help="delay between tokens (s)")
+    parser.add_argument("--max-tokens", type=int, default=64, help="reply length when the request sets none")
+    parser.add_argument("--model", default="mock-model")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--startup-delay", type=float, default=0.0, help="answer 503 for this long after start (s)")
+    parser.add_argument("--cold-requests", type=int, default=0, help="requests that pay the cold-start penalty")
+    parser.add_argument("--cold-penalty", type=float, default=1.0, help="extra delay for cold requests (s)")
+    args = parser.parse_args()
+
+    server = MockServer(
+        args.host, args.port, ttft=args.ttft, itl=args.itl,
+        max_tokens=args.max_tokens, model=args.model, fail_rate=args.fail_rate,
+        startup_delay=args.startup_delay, cold_requests=args.cold_requests, cold_penalty=args.cold_penalty
+    )
+    print(f"Mock OpenAI API on {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
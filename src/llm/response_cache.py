@@ -0,0 +1,269 @@
+"""Client-side cache for deterministic chat completions.
+
+Requests are keyed by a SHA-256 of the canonical JSON of model, messages and
+the sampling parameters, so the same prompt with the same settings is only
+generated once. Only deterministic requests are cached: temperature 0 (or
+top_k 1) or a fixed seed, and a single choice. Everything else bypasses the
+cache. Entries are kept in memory in LRU order, bounded by count and by
+total text size, and persisted to SQLite so they survive restarts.
+
+    client = CachedChatClient(ChatClient(url, model), get_response_cache())
+    result = client.chat(messages, temperature=0)   # result.cached on a hit
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from llm.chat_client import ChatResult
+
+CACHE_PATH = Path(__file__).parent.parent.parent / "cache" / "llm_responses.sqlite"
+MAX_ENTRIES = 2048
+MAX_BYTES = 64 * 1024 * 1024
+
+# Request fields that do not change the generated text
+TRANSPORT_PARAMS = ("stream", "stream_options", "user", "timeout")
+
+
+def is_deterministic(params):
+    """Whether a request with these sampling params always yields the same reply"""
+    if params.get("n", 1) != 1:
+        return False
+    if params.get("seed") is not None:
+        return True
+    # An unset temperature means the server default, which samples
+    return params.get("temperature") == 0 or params.get("top_k") == 1
+
+
+def cache_key(model, messages, params):
+    """SHA-256 of the canonical JSON of everything that determines the reply"""
+    request = {
+        "model": model,
+        "messages": list(messages),
+        "params": {key: value for key, value in params.items() if key not in TRANSPORT_PARAMS}
+    }
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU response cache bounded by entry count and text size, persisted to SQLite.
+
+    path=None keeps the cache in memory only. Thread-safe; lookups never
+    touch the disk, and recency of hits is written back on the next store
+    or on flush().
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (entry dict, size); most recent last
+        self._touched = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_tokens = 0
+        self.saved_seconds = 0.0
+        if self.path is not None:
+            self._open()
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, entry TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+        rows = self._db.execute("SELECT key, entry, size FROM responses ORDER BY last_used").fetchall()
+        for key, entry, size in rows:
+            self._entries[key] = (json.loads(entry), size)
+            self._bytes += size
+        self._evict()
+        self._db.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until within bounds; caller holds the lock"""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._touched.pop(key, None)
+            self.evictions += 1
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def get(self, key):
+        """Return the cached entry dict for key, or None"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._touched[key] = time.time()
+            self.hits += 1
+            self.saved_tokens += item[0]["tokens"]
+            self.saved_seconds += item[0]["duration_s"]
+            return item[0]
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def put(self, key, entry):
+        entry_json = json.dumps(entry, ensure_ascii=False)
+        size = len(entry_json.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (entry, size)
+            self._bytes += size
+            self.stores += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, entry, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, entry_json, size, time.time())
+                )
+            self._evict()
+            self._flush_touched()
+
+    def _flush_touched(self):
+        if self._db is not None:
+            if self._touched:
+                self._db.executemany("UPDATE responses SET last_used = ? WHERE key = ?",
+                                     [(used, key) for key, used in self._touched.items()])
+            self._db.commit()
+        self._touched = {}
+
+    def flush(self):
+        with self._lock:
+            self._flush_touched()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._touched = {}
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "saved_tokens": self.saved_tokens,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "path": str(self.path) if self.path else None
+            }
+
+
+def cache_entry(result):
+    """What is stored for a finished ChatResult, or None if it should not be cached"""
+    if result.cancelled or result.finish_reason is None or not result.parts:
+        return None
+    return {
+        "model": result.model,
+        "text": result.text,
+        "tokens": result.tokens,
+        "prompt_tokens": result.prompt_tokens,
+        "finish_reason": result.finish_reason,
+        "duration_s": result.duration
+    }
+
+
+def cached_result(entry, on_token=None):
+    """Rebuild a ChatResult from a cache entry, delivering the text as one token"""
+    result = ChatResult(entry["model"])
+    result.cached = True
+    result.parts = [entry["text"]]
+    result.first_token_at = time.perf_counter()
+    result.token_times = [result.first_token_at]
+    result.tokens = entry["tokens"]
+    result.prompt_tokens = entry["prompt_tokens"]
+    result.finish_reason = entry["finish_reason"]
+    if on_token is not None:
+        on_token(entry["text"])
+    return result.finish()
+
+
+class CachedChatClient:
+    """Wrap a ChatClient so deterministic requests are answered from a ResponseCache"""
+
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _lookup(self, messages, model, params, on_token):
+        """Return (key, cached result); key is None when the request bypasses the cache"""
+        if not is_deterministic(params):
+            self.cache.record_bypass()
+            return None, None
+        key = cache_key(model or self.client.model, messages, params)
+        entry = self.cache.get(key)
+        return key, (cached_result(entry, on_token) if entry is not None else None)
+
+    def _store(self, key, result):
+        entry = cache_entry(result)
+        if key is not None and entry is not None:
+            self.cache.put(key, entry)
+        return result
+
+    def chat(self, messages, on_token=None, cancel_event=None, model=None, **params):
+        key, result = self._lookup(messages, model, params, on_token)
+        if result is not None:
+            return result
+        return self._store(key, self.client.chat(messages, on_token, cancel_event, model, **params))
+
+
+class AsyncCachedChatClient(CachedChatClient):
+    """CachedChatClient for an AsyncChatClient"""
+
+    async def chat(self, messages, on_token=None, model=None, **params):
+        key, result = self._lookup(messages, model, params, on_token)
+        if result is not None:
+            return result
+        return self._store(key, await self.client.chat(messages, on_token, model, **params))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """The process-wide ResponseCache at CACHE_PATH"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,289 @@
+"""Persistent chat transcripts with full-text search.
+
+Conversations and their messages are stored in SQLite in write-ahead-log
+mode, with an FTS5 index over message text. Writes are queued and committed
+in batches by a background thread, so recording a chat turn never waits on
+the disk; readers use their own connections and are not blocked by it.
+
+    store = get_transcript_store()
+    store.add(session_id, "user", "How do I install ROCm?", model="facebook/opt-125m")
+    store.search("ROCm install")          # ranked hits with highlighted snippets
+    store.export_jsonl("eval.jsonl")      # batch_runner input for replaying
+
+The export has one conversation per line: {"id", "model", "messages",
+"reference"}, where messages end with the last user turn and reference is
+the reply that was given to it.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from utils.logging_utils import LOGGER_NAME
+
+TRANSCRIPT_PATH = Path(__file__).parent.parent.parent / "data" / "transcripts.sqlite"
+BATCH_SIZE = 256  # queued messages that trigger an immediate commit
+FLUSH_INTERVAL = 0.5  # seconds; the longest a queued message waits for its commit
+RANK_WINDOW = 1000  # newest matches that search() ranks by relevance
+SNIPPET_WORDS = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS conversations_updated ON conversations (updated);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    model TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_conversation ON messages (conversation_id, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (
+    content, content='messages', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word.
+
+    Only the last word matches as a prefix (it may still be being typed);
+    prefix matching every word would expand each into all its completions.
+    """
+    terms = [f'"{term.replace(chr(34), chr(34) * 2)}"' for term in text.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def make_snippet(content, terms, words=SNIPPET_WORDS):
+    """About words words of content around the first match, with matching words in **"""
+    tokens = content.split()
+    matches = [i for i, token in enumerate(tokens) if any(token.lower().strip(".,;:!?()\"'").startswith(t) for t in terms)]
+    first = matches[0] if matches else 0
+    start = max(first - words // 3, 0)
+    shown = tokens[start:start + words]
+    hits = set(matches)
+    text = " ".join(f"**{token}**" if start + i in hits else token for i, token in enumerate(shown))
+    return ("… " if start else "") + text + (" …" if start + words < len(tokens) else "")
+
+
+class TranscriptStore:
+    """SQLite transcript store; thread-safe, one background writer"""
+
+    def __init__(self, path=TRANSCRIPT_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flushed = threading.Condition(self._lock)
+        self._written = 0  # messages committed, for flush() to wait on
+        self._queued = 0
+        self._local = threading.local()
+        self._closed = False
+        self._write_lock = threading.Lock()  # the writer connection is shared with delete()
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        self._writer.commit()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True, name="transcript-writer")
+        self._thread.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; safe with WAL
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    def _reader(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+            connection.row_factory = sqlite3.Row
+        return connection
+
+    def add(self, conversation_id, role, content, model="", **meta):
+        """Queue one message; it is committed within flush_interval seconds"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("TranscriptStore is closed")
+            self._pending.append((conversation_id, role, content, model, time.time(), json.dumps(meta) if meta else None))
+            self._queued += 1
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def _write_loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                batch, self._pending = self._pending, []
+                closed = self._closed
+            if batch:
+                try:
+                    self._write(batch)
+                except sqlite3.Error as e:
+                    logging.getLogger(LOGGER_NAME).error(f"Could not save {len(batch)} transcript messages: {e}",
+                                                         extra={"stage": "transcripts"})
+                with self._lock:
+                    self._written += len(batch)
+                    self._flushed.notify_all()
+            if closed:
+                return
+
+    def _write(self, batch):
+        conversations = {}
+        for conversation_id, role, content, model, created, _ in batch:
+            first = conversations.setdefault(conversation_id, [created, created, model, "", 0])
+            first[1] = created
+            first[2] = model or first[2]
+            if not first[3] and role == "user":
+                first[3] = content.strip().splitlines()[0][:80] if content.strip() else ""
+            first[4] += 1
+        with self._write_lock, self._writer:  # one transaction per batch
+            self._writer.executemany(
+                "INSERT INTO conversations (id, title, model, created, updated, message_count) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET updated = excluded.updated, "
+                "message_count = message_count + excluded.message_count, "
+                "model = CASE WHEN excluded.model != '' THEN excluded.model ELSE model END, "
+                "title = CASE WHEN title = '' THEN excluded.title ELSE title END",
+                [(cid, title, model, created, updated, count)
+                 for cid, (created, updated, model, title, count) in conversations.items()]
+            )
+            self._writer.executemany(
+                "INSERT INTO messages (conversation_id, role, content, model, created, meta) VALUES (?, ?, ?, ?, ?, ?)",
+                batch
+            )
+
+    def flush(self, timeout=10):
+        """Wait until everything queued so far is committed"""
+        with self._lock:
+            target = self._queued
+            self._wake.set()
+            return self._flushed.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=10)
+        self._writer.close()
+
+    def search(self, text, model=None, conversation_id=None, limit=50):
+        """Messages matching every word of text, best match first.
+
+        Relevance (BM25) is ranked among the newest RANK_WINDOW matches, so a
+        query matching most of a large corpus costs the same as one against
+        a small corpus. Returns dicts with conversation_id, title, role,
+        model, created and a snippet with the matches wrapped in **.
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+        matches = ("SELECT messages_fts.rowid AS id, bm25(messages_fts) AS score FROM messages_fts "
+                   "JOIN messages m ON m.id = messages_fts.rowid WHERE messages_fts MATCH ?")
+        params = [query]
+        if model:
+            matches += " AND m.model = ?"
+            params.append(model)
+        if conversation_id:
+            matches += " AND m.conversation_id = ?"
+            params.append(conversation_id)
+        matches += " ORDER BY messages_fts.rowid DESC LIMIT ?"
+        params.append(RANK_WINDOW)
+        sql = ("SELECT m.id, m.conversation_id, c.title, m.role, m.model, m.created, m.content "
+               f"FROM ({matches}) hits JOIN messages m ON m.id = hits.id "
+               "JOIN conversations c ON c.id = m.conversation_id ORDER BY hits.score LIMIT ?")
+        params.append(limit)
+        terms = text.lower().split()
+        results = []
+        for row in self._reader().execute(sql, params):
+            result = dict(row)
+            result["snippet"] = make_snippet(result.pop("content"), terms)
+            results.append(result)
+        return results
+
+    def conversations(self, limit=50, model=None):
+        """Most recently updated conversations first"""
+        sql = "SELECT id, title, model, created, updated, message_count FROM conversations"
+        params = []
+        if model:
+            sql += " WHERE model = ?"
+            params.append(model)
+        sql += " ORDER BY updated DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._reader().execute(sql, params)]
+
+    def messages(self, conversation_id):
+        rows = self._reader().execute(
+            "SELECT role, content, model, created, meta FROM messages WHERE conversation_id = ? ORDER BY id",
+            (conversation_id,)
+        )
+        return [dict(row, meta=json.loads(row["meta"]) if row["meta"] else {}) for row in rows]
+
+    def delete(self, conversation_id):
+        self.flush()
+        with self._write_lock, self._writer:
+            self._writer.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+
+    def export_jsonl(self, output_path, model=None, conversation_ids=None):
+        """Write conversations as batch_runner input for replay; returns the number written"""
+        self.flush()
+        if conversation_ids is None:
+            conversation_ids = [c["id"] for c in self.conversations(limit=-1, model=model)]
+        written = 0
+        with open(output_path, "w", encoding="utf-8") as f:
+            for conversation_id in conversation_ids:
+                messages = self.messages(conversation_id)
+                last_user = max((i for i, m in enumerate(messages) if m["role"] == "user"), default=None)
+                if last_user is None:
+                    continue
+                reply = next((m["content"] for m in messages[last_user + 1:] if m["role"] == "assistant"), None)
+                f.write(json.dumps({
+                    "id": conversation_id,
+                    "model": messages[last_user]["model"],
+                    "messages": [{"role": m["role"], "content": m["content"]} for m in messages[:last_user + 1]],
+                    "reference": reply
+                }, ensure_ascii=False) + "\n")
+                written += 1
+        return written
+
+    def stats(self):
+        reader = self._reader()
+        conversations, = reader.execute("SELECT COUNT(*) FROM conversations").fetchone()
+        messages, = reader.execute("SELECT COUNT(*) FROM messages").fetchone()
+        return {"conversations": conversations, "messages": messages, "queued": len(self._pending),
+                "path": str(self.path)}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_transcript_store():
+    """The process-wide TranscriptStore at TRANSCRIPT_PATH"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TranscriptStore()
+        return _store
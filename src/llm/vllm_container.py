@@ -0,0 +1,337 @@
+"""Start, stop and warm up the vLLM containers behind the configured endpoints.
+
+Every endpoint in llm_config.yaml gets one container, rocm-vllm-<name>,
+running docker.vllm_image with the endpoint's model, published on the port
+of the endpoint's URL. Containers are started detached with
+--restart unless-stopped and found again by name, so they keep serving
+between Streamlit sessions and across app restarts.
+
+    manager = ContainerManager()
+    success, output = manager.ensure_running(config.endpoint("local"), on_line=print)
+
+ensure_running starts the container (creating it if needed), polls /health
+and /v1/models with exponential backoff until the model is listed, and then
+sends warm-up requests so the first user request does not pay for kernel
+compilation and graph capture.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+
+from llm.chat_client import ChatClient, ChatError
+from utils.config import ConfigError, get_config, get_dockerfile_loader
+from utils.docker_api import DockerAPIError, get_docker_api, stats_summary
+from utils.system_commands import dockerfile_changed, run_docker
+from utils.tracing import get_tracer
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+ROLE_LABEL = "rocm-installer.role=vllm"
+CONTAINER_PORT = 8000  # the port the image's entrypoint serves on
+READY_TIMEOUT = 900  # seconds; a first start downloads the model
+INITIAL_BACKOFF = 0.5
+MAX_BACKOFF = 10.0
+WARMUP_CONCURRENCY = 4  # concurrent warm-up requests after the first, so batched kernels compile too
+WARMUP_MAX_TOKENS = 16
+# GPU passthrough: WSL exposes the GPU through /dev/dxg and its driver libraries, native ROCm through kfd/dri
+WSL_GPU_DEVICES = ("/dev/dxg",)
+WSL_GPU_VOLUMES = ("/usr/lib/wsl/lib:/usr/lib/wsl/lib:ro",)
+NATIVE_GPU_DEVICES = ("/dev/kfd", "/dev/dri")
+
+
+def container_name(endpoint):
+    return f"rocm-vllm-{endpoint.name}"
+
+
+def host_port(endpoint):
+    """The port the endpoint's URL points at; the container publishes it"""
+    parts = urlsplit(endpoint.url)
+    return parts.port or (443 if parts.scheme == "https" else 80)
+
+
+def server_root(endpoint):
+    """The endpoint URL without the /v1 API prefix; /health lives there"""
+    url = endpoint.url.rstrip("/")
+    return url[:-3] if url.endswith("/v1") else url
+
+
+def on_wsl():
+    """Whether containers run under WSL: a Windows host (Docker Desktop) or a WSL distribution"""
+    return os.name == "nt" or Path("/dev/dxg").exists()
+
+
+def gpu_flags(docker_config):
+    """docker run --device/-v arguments for GPU access: docker.gpu_devices/gpu_volumes, or the platform default"""
+    wsl = on_wsl()
+    devices, volumes = docker_config.gpu_devices, docker_config.gpu_volumes
+    if devices is None:
+        devices = WSL_GPU_DEVICES if wsl else NATIVE_GPU_DEVICES
+    if volumes is None:
+        volumes = WSL_GPU_VOLUMES if wsl else ()
+    flags = []
+    for device in devices:
+        flags += ["--device", device]
+    for volume in volumes:
+        flags += ["-v", volume]
+    return flags
+
+
+def backoff_delays(initial=INITIAL_BACKOFF, maximum=MAX_BACKOFF):
+    """0.5, 1, 2, 4, 8, 10, 10, ... seconds"""
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * 2, maximum)
+
+
+class ContainerManager:
+    """Lifecycle of one vLLM container per endpoint, through the docker CLI"""
+
+    def __init__(self, config=None):
+        self._config = config
+
+    @property
+    def config(self):
+        # Follow config reloads unless a config was given explicitly
+        return self._config if self._config is not None else get_config()
+
+    def models_dir(self):
+        path = Path(self.config.models.storage_path)
+        return path if path.is_absolute() else (REPO_ROOT / path).resolve()
+
+    def inspect(self, endpoint):
+        """docker inspect for the endpoint's container, or None if it does not exist.
+
+        One Engine API round trip when the socket answers, the CLI otherwise.
+        """
+        try:
+            return get_docker_api().inspect_container(container_name(endpoint))
+        except DockerAPIError:
+            pass
+        success, output = run_docker(["inspect", "--format", "{{json .}}", container_name(endpoint)], timeout=30,
+                                     quiet=True)
+        if not success:
+            return None
+        try:
+            return json.loads(output)
+        except ValueError:
+            return None
+
+    def status(self, endpoint):
+        """The container's state as a dict, or None if it does not exist"""
+        info = self.inspect(endpoint)
+        if info is None:
+            return None
+        state = info.get("State", {})
+        labels = info.get("Config", {}).get("Labels") or {}
+        return {
+            "name": container_name(endpoint),
+            "state": state.get("Status", "unknown"),
+            "running": bool(state.get("Running")),
+            "restarting": bool(state.get("Restarting")),
+            "restart_count": info.get("RestartCount", 0),
+            "exit_code": state.get("ExitCode"),
+            "started": state.get("StartedAt"),
+            "image": info.get("Config", {}).get("Image"),
+            "managed": labels.get("rocm-installer.role") == "vllm",  # created by run_args, not by hand
+            "model": labels.get("rocm-installer.model"),
+            "port": labels.get("rocm-installer.port")
+        }
+
+    def run_args(self, endpoint):
+        """docker run arguments for a detached vLLM container serving endpoint"""
+        models_dir = self.models_dir()
+        return [
+            "run", "-d",
+            "--name", container_name(endpoint),
+            "--restart", "unless-stopped",
+            "--label", ROLE_LABEL,
+            "--label", f"rocm-installer.endpoint={endpoint.name}",
+            "--label", f"rocm-installer.model={endpoint.model}",
+            "--label", f"rocm-installer.port={host_port(endpoint)}",
+            "-p", f"{host_port(endpoint)}:{CONTAINER_PORT}",
+            *gpu_flags(self.config.docker),
+            "--group-add", "video",
+            "--ipc", "host",
+            "-v", f"{models_dir}:/root/.cache/huggingface",
+            self.config.docker.vllm_image,
+            "--host", "0.0.0.0", "--port", str(CONTAINER_PORT),
+            "--model", endpoint.model,
+            "--max-model-len", str(endpoint.context_tokens)
+        ]
+
+    def start(self, endpoint, on_line=None, cancel_event=None):
+        """Start the endpoint's container, creating it (or recreating a stale one) as needed"""
+        self._check_image(on_line)
+        status = self.status(endpoint)
+        if status is not None and self._stale(endpoint, status):
+            _emit(on_line, f"{status['name']} serves {status['model']} from {status['image']}; recreating it")
+            success, output = self.remove(endpoint)
+            if not success:
+                return False, output
+            status = None
+        if status is None:
+            self.models_dir().mkdir(parents=True, exist_ok=True)
+            _emit(on_line, f"Creating {container_name(endpoint)} from {self.config.docker.vllm_image}")
+            return run_docker(self.run_args(endpoint), on_line=on_line, cancel_event=cancel_event)
+        if status["running"]:
+            _emit(on_line, f"{status['name']} is already running")
+            return True, status["name"]
+        _emit(on_line, f"Starting {status['name']}")
+        return run_docker(["start", status["name"]], on_line=on_line, cancel_event=cancel_event)
+
+    def _check_image(self, on_line):
+        """Point out an image built from an older src/docker/vllm/Dockerfile"""
+        try:
+            changed = dockerfile_changed(self.config.docker.vllm_image, get_dockerfile_loader("vllm").get())
+        except ConfigError:
+            return
+        if changed:
+            _emit(on_line, f"Warning: src/docker/vllm/Dockerfile changed since {self.config.docker.vllm_image} was built; "
+                           "rebuild it from the Docker & Containers tab")
+
+    def _stale(self, endpoint, status):
+        """Whether a container this app created no longer matches the endpoint's config"""
+        return status["managed"] and (
+            status["image"] != self.config.docker.vllm_image or status["model"] != endpoint.model
+            or status["port"] != str(host_port(endpoint))
+        )
+
+    def stop(self, endpoint, on_line=None):
+        return run_docker(["stop", "-t", "30", container_name(endpoint)], on_line=on_line)
+
+    def restart(self, endpoint, on_line=None):
+        return run_docker(["restart", "-t", "30", container_name(endpoint)], on_line=on_line)
+
+    def remove(self, endpoint, on_line=None):
+        return run_docker(["rm", "-f", container_name(endpoint)], on_line=on_line)
+
+    def usage(self, endpoint):
+        """Memory and CPU use of the running container (see stats_summary), or None without the Engine API"""
+        try:
+            return stats_summary(get_docker_api().stats(container_name(endpoint)))
+        except DockerAPIError:
+            return None
+
+    def logs(self, endpoint, tail=200):
+        return run_docker(["logs", "--tail", str(tail), container_name(endpoint)], timeout=30)
+
+    def wait_ready(self, endpoint, timeout=READY_TIMEOUT, on_line=None, cancel_event=None):
+        """Poll until /health answers and /v1/models lists the model; returns (ready, message).
+
+        Polls back off exponentially up to MAX_BACKOFF. Gives up early, with the
+        end of its log as the message, if the container stops or crash-loops
+        (restarting, or restarted since the wait began).
+        """
+        deadline = time.monotonic() + timeout
+        started = time.monotonic()
+        root = server_root(endpoint)
+        last = "no response yet"
+        status = self.status(endpoint)
+        restarts = status["restart_count"] if status else 0
+        session = requests.Session()
+        try:
+            for delay in backoff_delays():
+                ready, last = self._probe(session, root, endpoint)
+                if ready:
+                    message = f"{endpoint.model} ready on {endpoint.url} after {time.monotonic() - started:.1f}s"
+                    _emit(on_line, message)
+                    return True, message
+                status = self.status(endpoint)
+                if status is None or not status["running"]:
+                    _, logs = self.logs(endpoint, tail=40)
+                    state = status["state"] if status else "missing"
+                    return False, f"{container_name(endpoint)} is {state} (exit code {status and status['exit_code']})\n{logs}"
+                if status["restarting"] or status["restart_count"] > restarts:
+                    # --restart unless-stopped keeps a crashing server coming back; it will not get ready
+                    _, logs = self.logs(endpoint, tail=40)
+                    return False, (f"{container_name(endpoint)} keeps crashing (restarted {status['restart_count']} times, "
+                                   f"exit code {status['exit_code']})\n{logs}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False, f"{endpoint.model} not ready after {timeout}s: {last}"
+                _emit(on_line, f"Waiting for {endpoint.model}: {last}; retrying in {delay:.1f}s")
+                if cancel_event is not None:
+                    if cancel_event.wait(min(delay, remaining)):
+                        return False, "Cancelled while waiting for the server"
+                else:
+                    time.sleep(min(delay, remaining))
+        finally:
+            session.close()
+
+    def _probe(self, session, root, endpoint):
+        try:
+            response = session.get(f"{root}/health", timeout=5)
+            if response.status_code != 200:
+                return False, f"/health returned {response.status_code}"
+            response = session.get(f"{endpoint.url.rstrip('/')}/models", timeout=5)
+            if response.status_code != 200:
+                return False, f"/v1/models returned {response.status_code}"
+            models = [model.get("id") for model in response.json().get("data", [])]
+        except (requests.RequestException, ValueError) as e:
+            return False, type(e).__name__
+        if endpoint.model not in models:
+            return False, f"/v1/models lists {', '.join(models) or 'nothing'}"
+        return True, ""
+
+    def warm_up(self, endpoint, concurrency=WARMUP_CONCURRENCY, on_line=None):
+        """Send one request, then a concurrent batch, to trigger compilation; returns (success, output)"""
+        client = ChatClient(endpoint.url, endpoint.model, timeout=endpoint.timeout_seconds, pool_size=concurrency)
+        messages = [{"role": "user", "content": "Hello"}]
+
+        def send(_=None):
+            return client.chat(messages, temperature=0, max_tokens=WARMUP_MAX_TOKENS)
+
+        lines = []
+        try:
+            with get_tracer().span("vLLM warm-up", "llm", model=endpoint.model):
+                start = time.perf_counter()
+                send()
+                lines.append(f"First request: {time.perf_counter() - start:.2f}s")
+                _emit(on_line, lines[-1])
+                start = time.perf_counter()
+                with ThreadPoolExecutor(concurrency) as pool:
+                    list(pool.map(send, range(concurrency)))
+                lines.append(f"{concurrency} concurrent requests: {time.perf_counter() - start:.2f}s")
+                _emit(on_line, lines[-1])
+        except ChatError as e:
+            lines.append(f"Warm-up request failed: {e}")
+            _emit(on_line, lines[-1])
+            return False, "\n".join(lines)
+        finally:
+            client.close()
+        return True, "\n".join(lines)
+
+    def ensure_running(self, endpoint, on_line=None, cancel_event=None, warm_up=True, timeout=READY_TIMEOUT):
+        """Start the container, wait until it serves the model and warm it up; returns (success, output)"""
+        success, output = self.start(endpoint, on_line=on_line, cancel_event=cancel_event)
+        if not success:
+            return False, output
+        ready, message = self.wait_ready(endpoint, timeout=timeout, on_line=on_line, cancel_event=cancel_event)
+        if not ready or not warm_up:
+            return ready, message
+        success, output = self.warm_up(endpoint, on_line=on_line)
+        return success, f"{message}\n{output}"
+
+
+def _emit(on_line, line):
+    if on_line is not None:
+        on_line(line)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_container_manager():
+    """The process-wide ContainerManager, following the current config"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ContainerManager()
+        return _manager
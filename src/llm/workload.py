@@ -0,0 +1,123 @@
+"""Record chat request traces for replaying as load tests.
+
+A workload file is JSON Lines (gzip-compressed when the name ends in .gz).
+The first line is a header; every other line is one request:
+
+    {"workload": 1, "started": "2025-11-19T10:00:00", "source": "..."}
+    {"t": 0.0, "model": "...", "prompt_tokens": 812, "tokens": 128, "params": {"max_tokens": 256},
+     "ttft": 0.21, "duration": 2.4, "ok": true}
+
+t is the request's start in seconds from the start of the recording, so the
+replayer (src/benchmarks/replay_workload.py) can reproduce the arrival
+pattern. Prompts are only stored with include_prompts=True; otherwise the
+replayer sends synthetic prompts of the recorded length.
+
+While a recorder is active (start_recording), every ChatClient and
+AsyncChatClient request in the process is recorded.
+"""
+import gzip
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+WORKLOAD_DIR = Path(__file__).parent.parent.parent / "logs" / "workloads"
+FORMAT_VERSION = 1
+
+
+def open_workload(path, mode="rt"):
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode.replace("t", ""), encoding="utf-8")
+
+
+class WorkloadRecorder:
+    """Append one compact line per chat request to a workload file; thread-safe"""
+
+    def __init__(self, path, include_prompts=False, source=""):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.include_prompts = include_prompts
+        self.started = time.time()
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = open_workload(self.path, "wt")
+        self._gzip = self.path.suffix == ".gz"  # the gzip file is wrapped in a TextIOWrapper
+        header = {"workload": FORMAT_VERSION, "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                  "source": source, "include_prompts": include_prompts}
+        self._file.write(json.dumps(header) + "\n")
+
+    def record(self, started, model, messages, params, result=None, error=None):
+        """Add a request that started at started (time.time()) with its ChatResult or error"""
+        entry = {"t": round(started - self.started, 4), "model": model,
+                 "params": {key: value for key, value in params.items() if key != "stream_options"}}
+        if result is not None:
+            entry.update(
+                prompt_tokens=result.prompt_tokens,
+                prompt_chars=sum(len(str(m.get("content", ""))) for m in messages),
+                tokens=result.tokens,
+                ttft=round(result.ttft, 4) if result.ttft is not None else None,
+                duration=round(result.duration, 4),
+                ok=not result.cancelled
+            )
+        else:
+            entry.update(prompt_chars=sum(len(str(m.get("content", ""))) for m in messages), ok=False,
+                         error=str(error)[:200])
+        if self.include_prompts:
+            entry["messages"] = list(messages)
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self.count += 1
+            # gzip output is flushed in blocks; a plain file is kept current for tail -f
+            if not self._gzip or self.count % 64 == 0:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_workload(path):
+    """Return (header, list of request entries) from a workload file"""
+    with open_workload(path) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("workload") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a workload file (version {FORMAT_VERSION})")
+    return lines[0], sorted(lines[1:], key=lambda entry: entry["t"])
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def current_recorder():
+    return _recorder
+
+
+def start_recording(path=None, include_prompts=False, source=""):
+    """Record every chat request in this process until stop_recording(); returns the recorder"""
+    global _recorder
+    if path is None:
+        path = WORKLOAD_DIR / f"workload_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
+    with _recorder_lock:
+        if _recorder is not None:
+            _recorder.close()
+        _recorder = WorkloadRecorder(path, include_prompts, source)
+        return _recorder
+
+
+def stop_recording():
+    """Stop the active recording; returns the finished recorder or None"""
+    global _recorder
+    with _recorder_lock:
+        recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.close()
+    return recorder
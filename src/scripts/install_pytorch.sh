@@ -13,6 +13,10 @@ PYTHON_VERSION="cp310"  # Python 3.10
 
 LOG_FILE="/tmp/pytorch_install_$(date +%Y%m%d_%H%M%S).log"
 
+# Compress logs from earlier runs and drop archives older than 30 days
+find /tmp -maxdepth 1 -name 'pytorch_install_*.log.gz' -mtime +30 -delete 2>/dev/null || true
+find /tmp -maxdepth 1 -name 'pytorch_install_*.log' -exec gzip -f {} + 2>/dev/null || true
+
 # Color codes
 RED='\033[0;31m'
 GREEN='\033[0;32m'
@@ -9,6 +9,10 @@ ROCm_VERSION="6.1.3"
 ROCm_BUILD="6.1.60103-1"
 LOG_FILE="/tmp/ROCm_install_$(date +%Y%m%d_%H%M%S).log"
 
+# Compress logs from earlier runs and drop archives older than 30 days
+find /tmp -maxdepth 1 -name 'ROCm_install_*.log.gz' -mtime +30 -delete 2>/dev/null || true
+find /tmp -maxdepth 1 -name 'ROCm_install_*.log' -exec gzip -f {} + 2>/dev/null || true
+
 # Color codes for output
 RED='\033[0;31m'
 GREEN='\033[0;32m'
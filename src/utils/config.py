@@ -0,0 +1,363 @@
+import dataclasses
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import yaml
+
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "llm_config.yaml"
+DOCKER_DIR = Path(__file__).parent.parent / "docker"
+
+
+class ConfigError(Exception):
+    """Raised when the config file is missing, unreadable or fails validation"""
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    url: str
+    model: str
+    enabled: bool = True
+    timeout_seconds: float = 300
+    max_concurrency: int = 16
+    context_tokens: int = 4096
+
+
+@dataclass(frozen=True)
+class ModelsConfig:
+    storage_path: str = "./models"
+    download_source: str = "huggingface"
+
+
+@dataclass(frozen=True)
+class DockerConfig:
+    vllm_image: str = "rocm-vllm:latest"
+    pytorch_image: str = "rocm-pytorch-dev:latest"
+    gpu_devices: tuple = None  # None: the platform default (see llm.vllm_container.gpu_flags)
+    gpu_volumes: tuple = None
+
+
+@dataclass(frozen=True)
+class GatewayConfig:
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 8080
+    max_queue: int = 256
+    queue_timeout_seconds: float = 60
+    health_interval_seconds: float = 5
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/v1"
+
+
+@dataclass(frozen=True)
+class LLMConfig:
+    endpoints: tuple
+    models: ModelsConfig
+    docker: DockerConfig
+    gateway: GatewayConfig = GatewayConfig()
+    source: str = ""
+    digest: str = ""
+
+    def endpoint(self, name=None):
+        """Return the named endpoint, or the first enabled one"""
+        for endpoint in self.endpoints:
+            if (endpoint.enabled if name is None else endpoint.name == name):
+                return endpoint
+        raise ConfigError(f"No {'endpoint named ' + repr(name) if name else 'enabled endpoint'} in {self.source}")
+
+    def chat_endpoint(self):
+        """The endpoint clients should talk to: the gateway when it is enabled"""
+        endpoint = self.endpoint()
+        if not self.gateway.enabled:
+            return endpoint
+        return dataclasses.replace(endpoint, name="gateway", url=self.gateway.url)
+
+    def as_dict(self):
+        """The config in the shape of llm_config.yaml, e.g. for display"""
+        return {
+            "llm_endpoints": {
+                endpoint.name: {key: value for key, value in dataclasses.asdict(endpoint).items() if key != "name"}
+                for endpoint in self.endpoints
+            },
+            "models": dataclasses.asdict(self.models),
+            "docker": dataclasses.asdict(self.docker),
+            "gateway": dataclasses.asdict(self.gateway)
+        }
+
+
+@dataclass(frozen=True)
+class Dockerfile:
+    name: str
+    path: str
+    base_image: str
+    exposed_ports: tuple
+    digest: str
+
+
+# Section name -> field name -> (accepted types, required)
+SCHEMA = {
+    "endpoint": {
+        "url": (str, True),
+        "model": (str, True),
+        "enabled": (bool, False),
+        "timeout_seconds": ((int, float), False),
+        "max_concurrency": (int, False),
+        "context_tokens": (int, False)
+    },
+    "models": {
+        "storage_path": (str, False),
+        "download_source": (str, False)
+    },
+    "docker": {
+        "vllm_image": (str, False),
+        "pytorch_image": (str, False),
+        "gpu_devices": (list, False),
+        "gpu_volumes": (list, False)
+    },
+    "gateway": {
+        "enabled": (bool, False),
+        "host": (str, False),
+        "port": (int, False),
+        "max_queue": (int, False),
+        "queue_timeout_seconds": ((int, float), False),
+        "health_interval_seconds": ((int, float), False)
+    }
+}
+
+
+def _check_section(data, schema, where, errors):
+    """Validate one mapping against schema; returns the known fields"""
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        errors.append(f"{where}: expected a mapping, got {type(data).__name__}")
+        return {}
+    values = {}
+    for key, value in data.items():
+        if key not in schema:
+            errors.append(f"{where}.{key}: unknown setting")
+            continue
+        types, _ = schema[key]
+        # bool is an int subclass; only accept it where bool is expected
+        if not isinstance(value, types) or (isinstance(value, bool) and types is not bool):
+            errors.append(f"{where}.{key}: expected {getattr(types, '__name__', 'a number')}, got {value!r}")
+            continue
+        values[key] = value
+    for key, (_, required) in schema.items():
+        if required and key not in data:
+            errors.append(f"{where}.{key}: required setting is missing")
+    return values
+
+
+def parse_config(text, source="<string>"):
+    """Parse and validate YAML config text into an LLMConfig.
+
+    Every problem found is reported in a single ConfigError.
+    """
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ConfigError(f"{source}: invalid YAML: {e}")
+    if not isinstance(data, dict):
+        raise ConfigError(f"{source}: expected a mapping at the top level")
+
+    errors = []
+    for key in data:
+        if key not in ("llm_endpoints", "models", "docker", "gateway"):
+            errors.append(f"{key}: unknown section")
+
+    endpoints = []
+    raw_endpoints = data.get("llm_endpoints")
+    if not isinstance(raw_endpoints, dict) or not raw_endpoints:
+        errors.append("llm_endpoints: at least one endpoint is required")
+    else:
+        for name, raw in raw_endpoints.items():
+            values = _check_section(raw, SCHEMA["endpoint"], f"llm_endpoints.{name}", errors)
+            url = values.get("url", "")
+            if url and not url.startswith(("http://", "https://")):
+                errors.append(f"llm_endpoints.{name}.url: expected an http(s) URL, got {url!r}")
+            for key in ("timeout_seconds", "max_concurrency", "context_tokens"):
+                if values.get(key, 1) <= 0:
+                    errors.append(f"llm_endpoints.{name}.{key}: must be positive")
+            if "url" in values and "model" in values:
+                endpoints.append(Endpoint(name=str(name), **values))
+
+    models = _check_section(data.get("models"), SCHEMA["models"], "models", errors)
+    docker = _check_section(data.get("docker"), SCHEMA["docker"], "docker", errors)
+    for key in ("gpu_devices", "gpu_volumes"):
+        if key in docker:
+            if not all(isinstance(item, str) for item in docker[key]):
+                errors.append(f"docker.{key}: expected a list of strings, got {docker[key]!r}")
+            docker[key] = tuple(docker[key])
+    gateway = _check_section(data.get("gateway"), SCHEMA["gateway"], "gateway", errors)
+    if not 0 < gateway.get("port", 1) < 65536:
+        errors.append(f"gateway.port: expected 1-65535, got {gateway['port']}")
+
+    if errors:
+        raise ConfigError(f"{source}: invalid config:\n  " + "\n  ".join(errors))
+    return LLMConfig(
+        endpoints=tuple(endpoints),
+        models=ModelsConfig(**models),
+        docker=DockerConfig(**docker),
+        gateway=GatewayConfig(**gateway),
+        source=source,
+        digest=hashlib.sha256(text if isinstance(text, bytes) else text.encode("utf-8")).hexdigest()
+    )
+
+
+def parse_dockerfile(text, source="<string>"):
+    """Summarise a Dockerfile; its digest tells whether an image is stale"""
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    base_image = None
+    ports = []
+    for line in text.splitlines():
+        words = line.split()
+        if not words or words[0].startswith("#"):
+            continue
+        instruction = words[0].upper()
+        if instruction == "FROM" and base_image is None:
+            # FROM [--platform=...] image [AS name]
+            args = [word for word in words[1:] if not word.startswith("--")]
+            base_image = args[0] if args else None
+        elif instruction == "EXPOSE":
+            ports.extend(words[1:])
+    if base_image is None:
+        raise ConfigError(f"{source}: no FROM instruction")
+    return Dockerfile(
+        name=Path(source).parent.name,
+        path=source,
+        base_image=base_image,
+        exposed_ports=tuple(ports),
+        digest=hashlib.sha256(text.encode("utf-8")).hexdigest()
+    )
+
+
+class ConfigLoader:
+    """Load a config file once and reuse it until the file changes.
+
+    get() re-stats the file at most every check_interval seconds (never, if
+    check_interval is None and a file watcher calls reload() instead); the
+    file is only re-read when its mtime or size changed, and only re-parsed
+    when its content hash changed. The parsed object is swapped in with a
+    single assignment, so readers see either the old or the new config.
+    Subscribers are called with (new, old) after a changed config validates.
+    """
+
+    def __init__(self, path=CONFIG_PATH, check_interval=1.0, parse=parse_config):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.parse = parse
+        self._config = None
+        self._stat_key = None
+        self._checked = 0.0
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self):
+        """Return the current LLMConfig; raises ConfigError if it is invalid"""
+        config = self._config
+        if config is not None and (
+            self.check_interval is None or time.monotonic() - self._checked < self.check_interval
+        ):
+            return config
+        return self._refresh(force=False)
+
+    def reload(self):
+        """Re-read the file now; raises ConfigError and keeps the old config if invalid"""
+        return self._refresh(force=True)
+
+    def _refresh(self, force):
+        now = time.monotonic()
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except OSError as e:
+                raise ConfigError(f"Cannot read config file {self.path}: {e}")
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+            old = self._config
+            if old is not None and stat_key == self._stat_key and not force:
+                self._checked = now
+                return old
+            new = self._load(stat_key)
+            self._checked = now
+            subscribers = list(self._subscribers) if old is not None and new is not old else []
+        # Outside the lock so callbacks may call get() or subscribe()
+        for callback in subscribers:
+            callback(new, old)
+        return new
+
+    def _load(self, stat_key):
+        try:
+            data = self.path.read_bytes()
+        except OSError as e:
+            raise ConfigError(f"Cannot read config file {self.path}: {e}")
+        if self._config is not None and hashlib.sha256(data).hexdigest() == self._config.digest:
+            # Touched but not changed
+            self._stat_key = stat_key
+            return self._config
+        # A failed parse leaves the stat key alone so the next get() retries
+        new = self.parse(data, str(self.path))
+        self._config = new
+        self._stat_key = stat_key
+        self.loads += 1
+        return new
+
+    def subscribe(self, callback):
+        """Call callback(new, old) whenever the config changes; returns an unsubscribe function"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+
+_loader = None
+_loader_lock = threading.Lock()
+
+
+def get_config_loader():
+    """Return the process-wide loader for src/config/llm_config.yaml"""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = ConfigLoader()
+        return _loader
+
+
+def set_config_loader(loader):
+    """Replace the process-wide loader, e.g. with one for a benchmark config"""
+    global _loader
+    with _loader_lock:
+        _loader = loader
+
+
+def get_config():
+    """Return the current validated LLM config"""
+    return get_config_loader().get()
+
+
+_dockerfile_loaders = {}
+
+
+def get_dockerfile_loader(name):
+    """Return the process-wide loader for src/docker/<name>/Dockerfile"""
+    with _loader_lock:
+        if name not in _dockerfile_loaders:
+            _dockerfile_loaders[name] = ConfigLoader(DOCKER_DIR / name / "Dockerfile", parse=parse_dockerfile)
+        return _dockerfile_loaders[name]
+
+
+def dockerfile_loaders():
+    """Loaders for every Dockerfile under src/docker"""
+    return [get_dockerfile_loader(path.parent.name) for path in sorted(DOCKER_DIR.glob("*/Dockerfile"))]
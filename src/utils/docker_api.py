@@ -0,0 +1,530 @@
+"""Docker Engine API client over the daemon's local socket.
+
+Speaks HTTP/1.1 to the Engine API directly:
+- the Unix socket /var/run/docker.sock;
+- the \\\\.\\pipe\\docker_engine named pipe on Windows;
+- or whatever DOCKER_HOST names (unix://, npipe:// or plain tcp://).
+
+This replaces spawning the docker CLI. Connections are kept alive and
+reused, so a status check costs one request/response round trip. Answers
+are structured JSON instead of CLI text, and build and pull progress arrive
+as a stream of JSON messages.
+
+    api = get_docker_api()
+    api.version()["Version"]
+    api.containers(all=True, filters={"label": ["rocm-installer.role=vllm"]})
+    for message in api.build("src/docker/vllm", "rocm-vllm:latest"):
+        print(message_text(message))
+
+Every failure, including a missing or unreachable daemon, raises
+DockerAPIError. Callers fall back to the CLI when they get one.
+"""
+import codecs
+import fnmatch
+import io
+import json
+import os
+import socket
+import tarfile
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import quote, urlencode
+
+DEFAULT_HOST = "npipe:////./pipe/docker_engine" if os.name == "nt" else "unix:///var/run/docker.sock"
+DEFAULT_TIMEOUT = 10  # seconds per socket operation; streaming calls wait as long as the daemon is silent
+MAX_IDLE = 4  # kept-alive connections per client
+CHUNK_SIZE = 65536
+SPOOL_SIZE = 32 * 1024 * 1024  # build contexts up to this size are tarred in memory
+_CLIENT_TIMEOUT = object()  # _request default: the client's timeout, as opposed to None (no timeout)
+
+
+class DockerAPIError(Exception):
+    """Raised when the daemon is unreachable or answers with an error; status is the HTTP status or None"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def daemon_address(host=None):
+    """(scheme, target) for host, DOCKER_HOST or the platform default"""
+    host = host or os.environ.get("DOCKER_HOST") or DEFAULT_HOST
+    scheme, _, target = host.partition("://")
+    if scheme == "unix":
+        return "unix", target
+    if scheme == "npipe":
+        return "npipe", target.replace("/", "\\")
+    if scheme == "tcp":
+        if os.environ.get("DOCKER_TLS_VERIFY"):
+            raise DockerAPIError(f"TLS connections to {host} are not supported; use the docker CLI")
+        name, _, port = target.rstrip("/").rpartition(":")
+        return "tcp", (name, int(port))
+    raise DockerAPIError(f"Unsupported DOCKER_HOST {host!r}")
+
+
+def _with_deadline(timeout, function, *args):
+    """Run a blocking call on a worker thread; raises TimeoutError after timeout seconds (None waits).
+
+    A worker that is still blocked is abandoned; it is a daemon thread, so it
+    does not keep the process alive.
+    """
+    if timeout is None:
+        return function(*args)
+    outcome = {}
+
+    def run():
+        try:
+            outcome["value"] = function(*args)
+        except BaseException as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=run, name="docker-npipe", daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        raise TimeoutError(f"Docker daemon did not answer within {timeout}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+class _PipeIO(io.RawIOBase):
+    """A Windows named pipe whose open, reads and writes give up after timeout seconds.
+
+    Pipes opened as files ignore socket-style timeouts, so a hung Docker
+    Desktop would block a read forever; each operation runs under
+    _with_deadline instead.
+    """
+
+    def __init__(self, target, timeout):
+        self.timeout = timeout
+        self._pipe = _with_deadline(timeout, open, target, "r+b", 0)
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def readinto(self, buffer):
+        # Read into a fresh bytes object: an abandoned worker must not write into the caller's buffer later
+        data = _with_deadline(self.timeout, self._pipe.read, len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def write(self, data):
+        return _with_deadline(self.timeout, self._write_all, bytes(data))
+
+    def _write_all(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[self._pipe.write(view):]
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._pipe.close()
+        super().close()
+
+
+class _Connection:
+    """One keep-alive HTTP connection to the daemon"""
+
+    def __init__(self, address, timeout):
+        scheme, target = address
+        self.sock = None
+        if scheme == "npipe":
+            # Reads return what is available, like recv()
+            self._pipe = _PipeIO(target, timeout)
+            self.rfile = io.BufferedReader(self._pipe, CHUNK_SIZE)
+            self._write = self._pipe.write
+            return
+        if scheme == "unix":
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(target)
+        else:
+            self.sock = socket.create_connection(target, timeout)
+        self.rfile = self.sock.makefile("rb", CHUNK_SIZE)
+        self._write = self.sock.sendall
+
+    def settimeout(self, timeout):
+        if self.sock is not None:
+            self.sock.settimeout(timeout)
+        else:
+            self._pipe.timeout = timeout
+
+    def send(self, data):
+        self._write(data)
+
+    def close(self):
+        self.rfile.close()
+        if self.sock is not None:
+            self.sock.close()
+        else:
+            self._pipe.close()
+
+
+class _Response:
+    """Status, headers and a body read incrementally from a connection"""
+
+    def __init__(self, client, connection, method):
+        self._client = client
+        self._connection = connection
+        line = connection.rfile.readline(CHUNK_SIZE)
+        if not line:
+            raise ConnectionResetError("Docker daemon closed the connection")
+        parts = line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise DockerAPIError(f"Malformed response from the Docker daemon: {line[:80]!r}")
+        self.status = int(parts[1])
+        self.headers = {}
+        while True:
+            line = connection.rfile.readline(CHUNK_SIZE)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            self.headers[name.strip().lower()] = value.strip()
+        self._chunked = "chunked" in self.headers.get("transfer-encoding", "").lower()
+        self._length = None if self._chunked else self.headers.get("content-length")
+        self._empty = method == "HEAD" or self.status in (204, 304) or self._length == "0"
+        self._reusable = self.headers.get("connection", "").lower() != "close" and (
+            self._chunked or self._length is not None or self._empty
+        )
+
+    def chunks(self):
+        """Yield the body as it arrives; the connection goes back to the pool at the end"""
+        rfile = self._connection.rfile
+        complete = False
+        try:
+            if self._empty:
+                pass
+            elif self._chunked:
+                while True:
+                    line = rfile.readline(CHUNK_SIZE)
+                    try:
+                        size = int(line.split(b";")[0], 16)
+                    except ValueError:
+                        # b"" when the daemon went away mid-stream (e.g. Docker Desktop restarting)
+                        raise ConnectionResetError(f"Docker daemon closed the connection mid-response: {line[:40]!r}") from None
+                    if size == 0:
+                        while rfile.readline(CHUNK_SIZE) not in (b"\r\n", b"\n", b""):
+                            pass  # trailers
+                        break
+                    data = rfile.read(size)
+                    rfile.readline(CHUNK_SIZE)
+                    if len(data) < size:
+                        raise ConnectionResetError("Docker daemon closed the connection mid-response")
+                    yield data
+            elif self._length is not None:
+                remaining = int(self._length)
+                while remaining:
+                    data = rfile.read(min(remaining, CHUNK_SIZE))
+                    if not data:
+                        raise ConnectionResetError("Docker daemon closed the connection mid-response")
+                    remaining -= len(data)
+                    yield data
+            else:
+                while True:
+                    data = rfile.read1(CHUNK_SIZE)
+                    if not data:
+                        break
+                    yield data
+            complete = True
+        finally:
+            # A body left unread (error, or the caller stopped early) makes the connection unusable
+            self._finish(self._reusable and complete)
+
+    def _finish(self, reusable):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            self._client._release(connection, reusable)
+
+    def read(self):
+        return b"".join(self.chunks())
+
+    def json(self):
+        body = self.read()
+        return json.loads(body) if body else None
+
+    def close(self):
+        """Drop the connection if the body was not read to the end"""
+        self._finish(False)
+
+
+def iter_json_messages(chunks):
+    """Decode a stream of concatenated JSON objects, however the chunks split them"""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")(errors="replace")  # a chunk may end mid-character
+    buffer = ""
+    for chunk in chunks:
+        buffer += text.decode(chunk)
+        while True:
+            buffer = buffer.lstrip()
+            if not buffer:
+                break
+            try:
+                message, end = decoder.raw_decode(buffer)
+            except ValueError:
+                break  # incomplete; wait for more
+            buffer = buffer[end:]
+            yield message
+    if buffer.strip():
+        raise DockerAPIError(f"Truncated message from the Docker daemon: {buffer[:80]!r}")
+
+
+def message_text(message):
+    """One line of human-readable text for a build or pull progress message"""
+    if "stream" in message:
+        return message["stream"].rstrip("\n")
+    if "error" in message:
+        return f"Error: {message['error']}"
+    parts = [message.get("id", ""), message.get("status", ""), message.get("progress", "")]
+    if "aux" in message and "ID" in message["aux"]:
+        parts.append(message["aux"]["ID"])
+    return " ".join(part for part in parts if part)
+
+
+def _ignore_patterns(context):
+    path = Path(context) / ".dockerignore"
+    if not path.exists():
+        return []
+    lines = (line.strip() for line in path.read_text(encoding="utf-8").splitlines())
+    return [line.strip("/") for line in lines if line and not line.startswith(("#", "!"))]
+
+
+def build_context(context, dockerfile="Dockerfile"):
+    """A seekable tar of the context directory, honouring simple .dockerignore patterns"""
+    context = Path(context)
+    patterns = _ignore_patterns(context)
+    archive = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+
+    def excluded(info):
+        relative = info.name[2:] if info.name.startswith("./") else ""
+        if not relative or relative == dockerfile:
+            return info
+        parts = relative.split("/")
+        for pattern in patterns:
+            if any(fnmatch.fnmatch("/".join(parts[:i]), pattern) for i in range(1, len(parts) + 1)):
+                return None
+        return info
+
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        tar.add(str(context), arcname=".", filter=excluded)
+    archive.seek(0)
+    return archive
+
+
+class DockerAPI:
+    """Blocking Engine API client; thread-safe, with a small pool of kept-alive connections"""
+
+    def __init__(self, host=None, timeout=DEFAULT_TIMEOUT):
+        self.host = host
+        self.timeout = timeout
+        self._address = None
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+            if self._address is None:
+                self._address = daemon_address(self.host)
+        try:
+            return _Connection(self._address, self.timeout), False
+        except OSError as e:
+            raise DockerAPIError(f"Cannot connect to the Docker daemon at {self._address[1]}: {e}") from None
+
+    def _release(self, connection, reusable):
+        connection.settimeout(self.timeout)
+        with self._lock:
+            if reusable and len(self._idle) < MAX_IDLE:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _request(self, method, path, params=None, body=None, headers=None, timeout=_CLIENT_TIMEOUT):
+        """Send a request and return the _Response once its headers are in; raises DockerAPIError for >= 400.
+
+        timeout defaults to self.timeout; streaming calls pass None to wait as long as the daemon is silent.
+        """
+        if timeout is _CLIENT_TIMEOUT:
+            timeout = self.timeout
+        if params:
+            path += "?" + urlencode({key: value for key, value in params.items() if value is not None})
+        head = [f"{method} {path} HTTP/1.1", "Host: docker"]
+        for name, value in (headers or {}).items():
+            head.append(f"{name}: {value}")
+        if body is not None and not hasattr(body, "read"):
+            body = body if isinstance(body, bytes) else json.dumps(body).encode()
+            head.append(f"Content-Length: {len(body)}")
+            if not any(name.lower() == "content-type" for name in headers or {}):
+                head.append("Content-Type: application/json")
+        elif body is not None:
+            body.seek(0, os.SEEK_END)
+            head.append(f"Content-Length: {body.tell()}")
+            body.seek(0)
+        elif method in ("POST", "PUT"):
+            head.append("Content-Length: 0")
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1")
+
+        # A kept-alive connection may have been closed by the daemon while idle: retry once on a new one
+        for attempt in range(2):
+            connection, reused = self._acquire()
+            try:
+                connection.settimeout(timeout)
+                connection.send(request)
+                if hasattr(body, "read"):
+                    for data in iter(lambda: body.read(CHUNK_SIZE), b""):
+                        connection.send(data)
+                elif body is not None:
+                    connection.send(body)
+                response = _Response(self, connection, method)
+                break
+            except DockerAPIError:
+                connection.close()
+                raise
+            except OSError as e:
+                connection.close()
+                # A timeout means the daemon is hung, not that the idle connection went stale
+                if reused and attempt == 0 and not isinstance(e, TimeoutError):
+                    self.close()  # the other idle connections are likely stale too
+                    if hasattr(body, "read"):
+                        body.seek(0)
+                    continue
+                raise DockerAPIError(f"Docker API request {method} {path} failed: {e}") from None
+
+        if response.status >= 400:
+            try:
+                error = response.json() or {}
+            except (ValueError, OSError):
+                error = {}
+            message = error.get("message") if isinstance(error, dict) else None
+            raise DockerAPIError(message or f"{method} {path} returned HTTP {response.status}", response.status)
+        return response
+
+    def _get_json(self, path, params=None):
+        try:
+            return self._request("GET", path, params).json()
+        except OSError as e:
+            raise DockerAPIError(f"Docker API request GET {path} failed: {e}") from None
+        except ValueError as e:
+            raise DockerAPIError(f"Docker API returned invalid JSON for {path}: {e}") from None
+
+    def _stream(self, method, path, params=None, body=None, headers=None):
+        """Yield the JSON messages of a streaming endpoint, raising DockerAPIError on an error message"""
+        response = self._request(method, path, params, body, headers, timeout=None)
+        try:
+            for message in iter_json_messages(response.chunks()):
+                if "error" in message:
+                    raise DockerAPIError(message["error"])
+                yield message
+        except OSError as e:
+            raise DockerAPIError(f"Docker API stream {path} failed: {e}") from None
+        finally:
+            response.close()
+
+    def ping(self):
+        """True if the daemon answers; raises DockerAPIError otherwise"""
+        try:
+            return self._request("GET", "/_ping").read().strip() == b"OK"
+        except OSError as e:
+            raise DockerAPIError(f"Docker API ping failed: {e}") from None
+
+    def version(self):
+        return self._get_json("/version")
+
+    def images(self, reference=None):
+        filters = json.dumps({"reference": [reference]}) if reference else None
+        return self._get_json("/images/json", {"filters": filters})
+
+    def containers(self, all=False, filters=None):
+        return self._get_json("/containers/json", {"all": int(all), "filters": json.dumps(filters) if filters else None})
+
+    def inspect_container(self, name):
+        """The same document as docker inspect; None if there is no such container"""
+        try:
+            return self._get_json(f"/containers/{quote(name, safe='')}/json")
+        except DockerAPIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def inspect_image(self, name):
+        """The same document as docker image inspect; None if the image is not present"""
+        try:
+            # The daemon routes /images/{name:.*}/json, so the repository's slashes stay as they are
+            return self._get_json(f"/images/{quote(name, safe='/:')}/json")
+        except DockerAPIError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def stats(self, name):
+        """One resource-usage sample for a running container; see stats_summary()"""
+        return self._get_json(f"/containers/{quote(name, safe='')}/stats", {"stream": "false", "one-shot": "true"})
+
+    def build(self, context, tag, dockerfile="Dockerfile", buildargs=None, labels=None):
+        """Build an image from a context directory, yielding progress messages (see message_text)"""
+        archive = build_context(context, dockerfile)
+        params = {"t": tag, "dockerfile": dockerfile, "rm": "1",
+                  "buildargs": json.dumps(buildargs) if buildargs else None,
+                  "labels": json.dumps(labels) if labels else None}
+        try:
+            yield from self._stream("POST", "/build", params, archive, {"Content-Type": "application/x-tar"})
+        finally:
+            archive.close()
+
+    def pull(self, image):
+        """Pull an image, yielding progress messages"""
+        repository, _, tag = image.rpartition(":") if ":" in image.split("/")[-1] else (image, "", "latest")
+        yield from self._stream("POST", "/images/create", {"fromImage": repository, "tag": tag})
+
+
+def stats_summary(stats):
+    """Memory in MB and CPU percent from a stats() sample; cpu_percent is None without a previous sample"""
+    memory = stats.get("memory_stats") or {}
+    cache = (memory.get("stats") or {}).get("inactive_file", 0)
+    cpu, precpu = stats.get("cpu_stats") or {}, stats.get("precpu_stats") or {}
+    cpu_percent = None
+    if precpu.get("system_cpu_usage"):
+        cpu_delta = cpu["cpu_usage"]["total_usage"] - precpu["cpu_usage"]["total_usage"]
+        system_delta = cpu["system_cpu_usage"] - precpu["system_cpu_usage"]
+        if system_delta > 0:
+            cpu_percent = round(cpu_delta / system_delta * cpu.get("online_cpus", 1) * 100, 1)
+    return {
+        "memory_mb": round((memory.get("usage", 0) - cache) / 2**20, 1),
+        "memory_limit_mb": round(memory.get("limit", 0) / 2**20, 1),
+        "cpu_percent": cpu_percent,
+        "pids": (stats.get("pids_stats") or {}).get("current")
+    }
+
+
+_api = None
+_api_lock = threading.Lock()
+
+
+def get_docker_api():
+    """The process-wide DockerAPI client for DOCKER_HOST or the default socket"""
+    global _api
+    with _api_lock:
+        if _api is None:
+            _api = DockerAPI()
+        return _api
+
+
+def set_docker_api(api):
+    """Replace the process-wide client, e.g. with one pointed at a fake daemon"""
+    global _api
+    with _api_lock:
+        previous, _api = _api, api
+    if previous is not None:
+        previous.close()
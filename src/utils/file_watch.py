@@ -0,0 +1,152 @@
+import fnmatch
+import logging
+import os
+import threading
+from pathlib import Path
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: config loaders fall back to polling mtimes
+    FileSystemEventHandler = object
+    Observer = None
+
+from .config import ConfigError, get_config_loader, get_dockerfile_loader, dockerfile_loaders, DOCKER_DIR
+from .logging_utils import LOGGER_NAME
+
+DEBOUNCE = 0.2  # seconds; editors often write a file in several steps
+
+
+class _Watch:
+    def __init__(self, directory, pattern, callback, recursive):
+        self.directory = directory
+        self.pattern = pattern
+        self.callback = callback
+        self.recursive = recursive
+        self.timer = None
+
+    def matches(self, path):
+        path = Path(path)
+        if not self.recursive and path.parent != self.directory:
+            return False
+        if self.directory not in path.parents:
+            return False
+        return fnmatch.fnmatch(path.name, self.pattern)
+
+
+class FileWatcher(FileSystemEventHandler):
+    """Call back when files matching a pattern change, debounced per watch.
+
+    Bursts of events (save via temp file + rename, several writes) within
+    debounce seconds produce a single callback(path) from a timer thread.
+    """
+
+    def __init__(self, debounce=DEBOUNCE):
+        super().__init__()
+        self.debounce = debounce
+        self._watches = []
+        self._lock = threading.Lock()
+        self._observer = None
+
+    @property
+    def running(self):
+        return self._observer is not None
+
+    def watch(self, path, callback, pattern=None, recursive=False):
+        """Watch a file, or files matching pattern in a directory"""
+        path = Path(path).resolve()
+        if pattern is None:
+            directory, pattern = path.parent, path.name
+        else:
+            directory = path
+        watch = _Watch(directory, pattern, callback, recursive)
+        with self._lock:
+            self._watches.append(watch)
+            if self._observer is not None:
+                self._observer.schedule(self, str(directory), recursive=recursive)
+        return watch
+
+    def start(self):
+        """Start watching; returns False if watchdog is not installed"""
+        if Observer is None:
+            return False
+        with self._lock:
+            if self._observer is None:
+                observer = Observer()
+                for directory, recursive in {(w.directory, w.recursive) for w in self._watches}:
+                    observer.schedule(self, str(directory), recursive=recursive)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+        return True
+
+    def stop(self):
+        with self._lock:
+            observer, self._observer = self._observer, None
+            for watch in self._watches:
+                if watch.timer is not None:
+                    watch.timer.cancel()
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type in ("opened", "closed_no_write"):
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        with self._lock:
+            for watch in self._watches:
+                path = next((p for p in paths if p and watch.matches(os.fsdecode(p))), None)
+                if path is None:
+                    continue
+                if watch.timer is not None:
+                    watch.timer.cancel()
+                watch.timer = threading.Timer(self.debounce, watch.callback, args=(os.fsdecode(path),))
+                watch.timer.daemon = True
+                watch.timer.start()
+
+
+def reload_on_change(loader):
+    """Watcher callback that reloads loader, keeping the old value if invalid"""
+    logger = logging.getLogger(LOGGER_NAME)
+
+    def callback(path):
+        try:
+            loader.reload()
+            logger.info(f"Reloaded {path}", extra={"stage": "config"})
+        except ConfigError as e:
+            logger.error(f"{e}; keeping the previous version", extra={"stage": "config"})
+    return callback
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def start_hot_reload():
+    """Reload llm_config.yaml and the Dockerfiles under src/docker when they change.
+
+    Idempotent. While the watcher runs the loaders stop polling mtimes and
+    serve their cached value until an event arrives. Returns the watcher, or
+    None if watchdog is not installed (the loaders keep polling).
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is not None:
+            return _watcher
+        watcher = FileWatcher()
+        config_loader = get_config_loader()
+        watcher.watch(config_loader.path, reload_on_change(config_loader))
+
+        def reload_dockerfile(path):
+            loader = get_dockerfile_loader(Path(path).parent.name)
+            loader.check_interval = None
+            reload_on_change(loader)(path)
+
+        watcher.watch(DOCKER_DIR, reload_dockerfile, pattern="Dockerfile", recursive=True)
+        if not watcher.start():
+            return None
+        for loader in [config_loader, *dockerfile_loaders()]:
+            loader.check_interval = None
+        _watcher = watcher
+        return watcher
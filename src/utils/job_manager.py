@@ -0,0 +1,175 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class Job:
+    """State of one background task, safe to read from any thread"""
+
+    def __init__(self, job_id, name, description="", tail_lines=500, transcript_path=None):
+        self.id = job_id
+        self.name = name
+        self.description = description or name
+        self.status = QUEUED
+        self.progress = None
+        self.success = None
+        self.output = ""
+        self.line_count = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.transcript_path = transcript_path
+        self._transcript = None
+        self._lines = deque(maxlen=tail_lines)
+        self._lock = threading.Lock()
+
+    def append(self, line):
+        """Record one line of output; used as the on_line callback"""
+        with self._lock:
+            self._lines.append(line)
+            self.line_count += 1
+            if self._transcript is not None:
+                self._transcript.write(line + "\n")
+
+    def _open_transcript(self):
+        if self.transcript_path is not None:
+            self.transcript_path.parent.mkdir(parents=True, exist_ok=True)
+            self._transcript = open(self.transcript_path, "w", encoding="utf-8", buffering=1)
+
+    def _close_transcript(self):
+        with self._lock:
+            if self._transcript is not None:
+                self._transcript.close()
+                self._transcript = None
+
+    def set_progress(self, fraction):
+        """Report progress as a fraction between 0 and 1"""
+        self.progress = max(0.0, min(1.0, fraction))
+
+    def tail(self, lines=None):
+        """Return the most recent output lines as one string"""
+        with self._lock:
+            recent = list(self._lines)
+        if lines is not None:
+            recent = recent[-lines:]
+        return "\n".join(recent)
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def duration(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobManager:
+    """Run callables on a thread pool and keep their state between reruns.
+
+    A job function receives its Job and returns (success, output); it should
+    pass job.append as on_line and honour job.cancel_event. With a
+    transcript_dir, every output line is also written to a per-job .log file
+    there, so the full output stays available while memory holds only the tail.
+    """
+
+    def __init__(self, max_workers=4, history=50, transcript_dir=None):
+        self.transcript_dir = Path(transcript_dir) if transcript_dir else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._history = history
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, name, fn, description=""):
+        """Queue fn for background execution and return the new job id"""
+        with self._lock:
+            job_id = f"{name}-{next(self._ids)}"
+            transcript_path = None
+            if self.transcript_dir is not None:
+                transcript_path = self.transcript_dir / f"{time.strftime('%Y%m%d_%H%M%S')}_{job_id}.log"
+            job = Job(job_id, name, description, transcript_path=transcript_path)
+            self._jobs[job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        return job_id
+
+    def _run(self, job, fn):
+        if job.cancel_event.is_set():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job._open_transcript()
+            success, output = fn(job)
+        except Exception as e:
+            success, output = False, f"Error: {str(e)}"
+        finally:
+            job._close_transcript()
+        job.success = bool(success)
+        job.output = output
+        job.finished_at = time.time()
+        if job.cancel_event.is_set():
+            job.status = CANCELLED
+        else:
+            job.status = SUCCEEDED if success else FAILED
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        while len(self._jobs) > self._history and finished:
+            del self._jobs[finished.pop(0)]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def latest(self, name):
+        """Return the most recently submitted job with the given name"""
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job.name == name:
+                    return job
+        return None
+
+    def jobs(self):
+        """Return all tracked jobs, newest first"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def running(self):
+        return [job for job in self.jobs() if not job.done]
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is not None and not job.done:
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished_at = time.time()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Return the process-wide job manager shared by all browser sessions"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(transcript_dir=Path(__file__).parent.parent.parent / "logs" / "jobs")
+        return _manager
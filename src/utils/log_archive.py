@@ -0,0 +1,157 @@
+import gzip
+import io
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # optional: gzip is used when zstandard is not installed
+    zstandard = None
+
+LOG_DIR = Path(__file__).parent.parent.parent / "logs"
+INDEX_FILE = "index.json"
+
+MAX_RUNS = 20
+MAX_AGE_DAYS = 30
+
+# Files outside the run index that are only pruned by age
+TRANSIENT_LOGS = ("session_*.log", "jobs/*.log", "traces/*.jsonl", ".viewer_cache/*")
+
+_index_lock = threading.Lock()
+
+
+def compress_file(path, method=None):
+    """Compress a closed log file next to itself and remove the original.
+
+    method is "zstd" or "gzip"; by default zstd is used when the zstandard
+    package is available. Returns the path of the compressed file.
+    """
+    path = Path(path)
+    if method is None:
+        method = "zstd" if zstandard is not None else "gzip"
+    if method == "zstd":
+        target = path.with_name(path.name + ".zst")
+        with open(path, "rb") as src, open(target, "wb") as dst:
+            zstandard.ZstdCompressor().copy_stream(src, dst)
+    else:
+        target = path.with_name(path.name + ".gz")
+        with open(path, "rb") as src, gzip.open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+    path.unlink()
+    return target
+
+
+def open_log(path, mode="rt"):
+    """Open a plain, .gz or .zst log file for reading"""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode, encoding="utf-8" if "t" in mode else None)
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read .zst logs: pip install zstandard")
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        if "t" in mode:
+            return io.TextIOWrapper(stream, encoding="utf-8")
+        return stream
+    return open(path, mode, encoding="utf-8" if "t" in mode else None)
+
+
+def load_index(log_dir=LOG_DIR):
+    """Return the run index, or an empty one if it does not exist yet"""
+    index_path = Path(log_dir) / INDEX_FILE
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"runs": []}
+
+
+def _save_index(log_dir, index):
+    index_path = Path(log_dir) / INDEX_FILE
+    tmp_path = index_path.with_name(INDEX_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+
+
+def record_run(run_id, log_dir=LOG_DIR, files=None, **fields):
+    """Create or update the index entry for a run.
+
+    files are appended to the run's file list (replacing an entry with the
+    same name but a different compression suffix); other fields overwrite.
+    """
+    with _index_lock:
+        index = load_index(log_dir)
+        run = next((r for r in index["runs"] if r["id"] == run_id), None)
+        if run is None:
+            run = {"id": run_id, "started": datetime.now().isoformat(timespec="seconds"), "files": []}
+            index["runs"].append(run)
+        for name in files or []:
+            base = name.split(".jsonl")[0] + ".jsonl"
+            run["files"] = [f for f in run["files"] if not f.startswith(base)] + [name]
+        run.update(fields)
+        run["bytes"] = sum(
+            (Path(log_dir) / f).stat().st_size for f in run["files"] if (Path(log_dir) / f).exists()
+        )
+        _save_index(log_dir, index)
+        return run
+
+
+def list_runs(log_dir=LOG_DIR):
+    """Return indexed runs, newest first, without scanning the directory"""
+    return sorted(load_index(log_dir)["runs"], key=lambda r: r.get("started", ""), reverse=True)
+
+
+def _segment_number(name):
+    stem = name.split(".jsonl")[0]
+    suffix = stem.rsplit(".", 1)[-1]
+    return int(suffix) if "." in stem and suffix.isdigit() else float("inf")
+
+
+def run_files(run, log_dir=LOG_DIR):
+    """Return the existing files of an indexed run, oldest segment first"""
+    names = sorted(run.get("files", []), key=_segment_number)
+    return [Path(log_dir) / name for name in names if (Path(log_dir) / name).exists()]
+
+
+def apply_retention(log_dir=LOG_DIR, max_runs=MAX_RUNS, max_age_days=MAX_AGE_DAYS, keep=()):
+    """Delete runs beyond max_runs or older than max_age_days.
+
+    Session spill logs, job transcripts, traces and viewer caches older than
+    max_age_days are removed too. Runs listed in keep are never deleted.
+    Returns the removed run ids.
+    """
+    log_dir = Path(log_dir)
+    cutoff = time.time() - max_age_days * 86400
+    removed = []
+    with _index_lock:
+        index = load_index(log_dir)
+        runs = sorted(index["runs"], key=lambda r: r.get("started", ""), reverse=True)
+        kept = []
+        for position, run in enumerate(runs):
+            try:
+                started = datetime.fromisoformat(run["started"]).timestamp()
+            except (KeyError, ValueError):
+                started = 0
+            if run["id"] not in keep and (position >= max_runs or started < cutoff):
+                for path in run_files(run, log_dir):
+                    path.unlink(missing_ok=True)
+                removed.append(run["id"])
+            else:
+                kept.append(run)
+        if removed:
+            index["runs"] = kept
+            _save_index(log_dir, index)
+    for path in itertools.chain(*(log_dir.glob(pattern) for pattern in TRANSIENT_LOGS)):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+    return removed
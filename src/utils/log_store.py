@@ -0,0 +1,104 @@
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_CAPACITY = 1000
+SPILL_BATCH = 64
+
+
+def format_entry(entry):
+    """Render a (timestamp, level, message) entry as a log line"""
+    timestamp, level, message = entry
+    return f"[{timestamp.strftime('%H:%M:%S')}] [{level}] {message}"
+
+
+class LogStore:
+    """Fixed-capacity ring of structured log entries with spill-to-disk.
+
+    Entries are (timestamp, level, message) tuples kept in a preallocated
+    list of slots. When the ring is full the oldest entry is appended to a
+    spill file before its slot is reused, so memory stays bounded while the
+    full history is still available on disk.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, spill_path=None):
+        self.capacity = capacity
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._slots = [None] * capacity
+        self._head = 0  # index of the oldest entry
+        self._count = 0
+        self._pending = []
+        self.spilled = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def total(self):
+        """Number of entries ever recorded, including spilled ones"""
+        return self.spilled + len(self._pending) + self._count
+
+    def append(self, message, level="INFO"):
+        entry = (datetime.now(), level, message)
+        with self._lock:
+            if self._count < self.capacity:
+                self._slots[(self._head + self._count) % self.capacity] = entry
+                self._count += 1
+                return
+            self._pending.append(self._slots[self._head])
+            self._slots[self._head] = entry
+            self._head = (self._head + 1) % self.capacity
+            if len(self._pending) >= SPILL_BATCH:
+                self._flush_spill()
+
+    def _flush_spill(self):
+        if self._pending and self.spill_path is not None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write("".join(format_entry(entry) + "\n" for entry in self._pending))
+        self.spilled += len(self._pending)
+        self._pending = []
+
+    def flush(self):
+        """Write any entries waiting to be spilled"""
+        with self._lock:
+            self._flush_spill()
+
+    def entries(self, start=0, count=None):
+        """Return in-memory entries oldest first, from start for count entries"""
+        with self._lock:
+            stop = self._count if count is None else min(self._count, start + count)
+            return [self._slots[(self._head + i) % self.capacity] for i in range(max(start, 0), stop)]
+
+    def tail(self, count=100):
+        """Return the newest count entries as formatted lines"""
+        return [format_entry(entry) for entry in self.entries(max(self._count - count, 0))]
+
+    def page(self, index, page_size=100):
+        """Return page index (0 = newest) of in-memory entries as formatted lines"""
+        stop = self._count - index * page_size
+        start = max(stop - page_size, 0)
+        if stop <= 0:
+            return []
+        return [format_entry(entry) for entry in self.entries(start, stop - start)]
+
+    def page_count(self, page_size=100):
+        return max((self._count + page_size - 1) // page_size, 1)
+
+    def clear(self):
+        """Empty the in-memory ring; its entries are spilled first, so the history on disk stays complete"""
+        with self._lock:
+            self._pending.extend(self._slots[(self._head + i) % self.capacity] for i in range(self._count))
+            self._flush_spill()
+            self._slots = [None] * self.capacity
+            self._head = 0
+            self._count = 0
+
+
+def session_log_store(capacity=DEFAULT_CAPACITY):
+    """Create a LogStore that spills into the project logs directory"""
+    log_dir = Path(__file__).parent.parent.parent / "logs"
+    spill_path = log_dir / f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.log"
+    return LogStore(capacity, spill_path)
@@ -0,0 +1,173 @@
+import mmap
+import os
+import re
+import shutil
+import threading
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+from . import log_archive
+
+# Literal markers that classify a line for the level filter and jump-to-error.
+# Each literal is searched separately: a plain literal scan is an order of
+# magnitude faster than one regex alternation over a large file.
+LEVEL_MARKERS = {
+    "ERROR": (b"ERROR", b"CRITICAL", b"FATAL", b"Traceback", b"failed", b"FAILED"),
+    "WARNING": (b"WARN",),
+    "SUCCESS": (b"SUCCESS",)
+}
+
+MAX_MATCHES = 100000
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class LogIndex:
+    """Line-offset index over a log file, read through mmap.
+
+    Building the index is one pass over the file; after that, reading a
+    page costs only the bytes of the lines on that page. Searches run the
+    regex engine over the mapped file and map match positions back to line
+    numbers, so nothing is decoded except the lines that are displayed.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._offsets = array("Q", [0])
+        self._indexed = 0  # bytes covered by complete lines in _offsets
+        self._size = 0
+        self._lock = threading.Lock()
+        self._match_cache = {}
+        self.refresh()
+
+    def refresh(self):
+        """Extend the index with data appended since the last call"""
+        with self._lock:
+            size = os.path.getsize(self.path)
+            if size < self._size:  # truncated or replaced: start over
+                self._offsets = array("Q", [0])
+                self._indexed = 0
+            if size == self._size:
+                return
+            self._size = size
+            self._match_cache.clear()
+            if size == 0:
+                return
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = self._indexed
+                find = mm.find
+                offsets = self._offsets
+                while True:
+                    newline = find(b"\n", pos)
+                    if newline < 0:
+                        break
+                    pos = newline + 1
+                    offsets.append(pos)
+                self._indexed = pos
+
+    def __len__(self):
+        """Number of lines, counting a final line without a newline"""
+        complete = len(self._offsets) - 1
+        return complete + (1 if self._size > self._indexed else 0)
+
+    def _line_bounds(self, line):
+        start = self._offsets[line]
+        end = self._offsets[line + 1] if line + 1 < len(self._offsets) else self._size
+        return start, end
+
+    def lines(self, start, count):
+        """Return count lines starting at line number start (0-based)"""
+        stop = min(start + count, len(self))
+        return self.lines_at(range(max(start, 0), stop))
+
+    def lines_at(self, line_numbers):
+        """Return the text of the given line numbers"""
+        if not line_numbers or self._size == 0:
+            return []
+        result = []
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in line_numbers:
+                start, end = self._line_bounds(line)
+                result.append(mm[start:end].rstrip(b"\r\n").decode("utf-8", errors="replace"))
+        return result
+
+    def _line_of(self, position):
+        return bisect_right(self._offsets, position) - 1
+
+    def search(self, pattern, ignore_case=False, limit=MAX_MATCHES):
+        """Return sorted line numbers whose text matches a regex"""
+        if isinstance(pattern, str):
+            pattern = pattern.encode("utf-8")
+        key = (pattern, ignore_case, limit)
+        if key in self._match_cache:
+            return self._match_cache[key]
+        # MULTILINE: the regex runs over the whole file, but ^ and $ should anchor to each line
+        regex = re.compile(pattern, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        matches = []
+        if self._size:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                last = -1
+                for match in regex.finditer(mm):
+                    line = self._line_of(match.start())
+                    if line != last:
+                        matches.append(line)
+                        last = line
+                        if len(matches) >= limit:
+                            break
+        self._match_cache[key] = matches
+        return matches
+
+    def search_markers(self, markers):
+        """Return sorted line numbers containing any of the literal markers"""
+        lines = set()
+        for marker in markers:
+            lines.update(self.search(re.escape(marker)))
+        return sorted(lines)
+
+    def filter(self, level=None, stage=None, pattern=None, ignore_case=True):
+        """Return line numbers matching all of the given filters, or None if unfiltered"""
+        selected = None
+        results = []
+        if level:
+            results.append(self.search_markers(LEVEL_MARKERS.get(level, (level.encode("utf-8"),))))
+        if stage:
+            results.append(self.search(re.escape(stage.encode("utf-8"))))
+        if pattern:
+            results.append(self.search(pattern, ignore_case))
+        for lines in results:
+            selected = lines if selected is None else sorted(set(selected).intersection(lines))
+        return selected
+
+    def next_error(self, after=-1):
+        """Return the first error line after line number after, or None"""
+        errors = self.search_markers(LEVEL_MARKERS["ERROR"])
+        position = bisect_right(errors, after)
+        return errors[position] if position < len(errors) else None
+
+
+def _readable_path(path):
+    """Return a plain-text path for path, decompressing archives once"""
+    path = Path(path)
+    if path.suffix not in (".gz", ".zst"):
+        return path
+    cache_dir = path.parent / ".viewer_cache"
+    cache_dir.mkdir(exist_ok=True)
+    target = cache_dir / path.with_suffix("").name
+    if not target.exists() or target.stat().st_mtime < path.stat().st_mtime:
+        with log_archive.open_log(path, "rb") as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+    return target
+
+
+def get_log_index(path):
+    """Return a shared, up-to-date LogIndex for a log file"""
+    readable = _readable_path(path)
+    with _cache_lock:
+        index = _cache.get(readable)
+        if index is None:
+            index = _cache[readable] = LogIndex(readable)
+            return index
+    index.refresh()
+    return index
@@ -1,35 +1,234 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
-def setup_logger():
-    """Configure logging for the installer"""
-    log_dir = Path(__file__).parent.parent.parent / "logs"
-    log_dir.mkdir(exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = log_dir / f"install_{timestamp}.log"
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
+from . import log_archive
+
+LOGGER_NAME = "ROCm_installer"
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Extra record attributes copied into each JSON Lines entry when present
+STRUCTURED_FIELDS = ("stage", "command", "duration", "exit_code")
+
+# Roll the JSON Lines file over at whichever limit is reached first
+MAX_LOG_BYTES = 10 * 1024 * 1024
+MAX_LOG_AGE = 24 * 60 * 60  # seconds
+
+# GUI log levels that are not standard logging levels
+LEVEL_ALIASES = {"SUCCESS": logging.INFO}
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format a record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BatchedFileHandler(logging.Handler):
+    """Buffer formatted records and write them to a file in batches.
+
+    When max_bytes or max_age (seconds) is set, the file is rolled over to a
+    numbered segment once either limit is reached. Closed segments, and the
+    last file when the handler closes, are compressed and recorded in the
+    log directory index under run_id.
+    """
+
+    def __init__(self, filename, batch_size=100, max_bytes=0, max_age=0, run_id=None):
+        super().__init__()
+        self.filename = Path(filename)
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.run_id = run_id
+        self.segment = 0
+        self._buffer = []
+        self._open()
+
+    def _open(self):
+        self._stream = open(self.filename, "a", encoding="utf-8")
+        self._bytes = self.filename.stat().st_size
+        self._opened_at = time.monotonic()
+
+    def _archive(self, path):
+        archived = log_archive.compress_file(path)
+        if self.run_id is not None:
+            log_archive.record_run(self.run_id, self.filename.parent, files=[archived.name])
+
+    def _should_rollover(self):
+        if self.max_bytes and self._bytes >= self.max_bytes:
+            return True
+        return bool(self.max_age) and time.monotonic() - self._opened_at >= self.max_age
+
+    def _rollover(self):
+        self._stream.close()
+        self.segment += 1
+        segment_path = self.filename.with_name(f"{self.filename.stem}.{self.segment}{self.filename.suffix}")
+        os.replace(self.filename, segment_path)
+        self._archive(segment_path)
+        self._open()
+
+    def emit(self, record):
+        try:
+            self._buffer.append(self.format(record))
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._buffer and self._stream:
+                data = "\n".join(self._buffer) + "\n"
+                self._stream.write(data)
+                self._stream.flush()
+                self._bytes += len(data.encode("utf-8"))
+                self._buffer = []
+                if self._should_rollover():
+                    self._rollover()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        self.acquire()
+        try:
+            if self._stream:
+                self._stream.close()
+                self._stream = None
+                if self.run_id is not None:
+                    if self.filename.stat().st_size:
+                        self._archive(self.filename)
+                    else:
+                        self.filename.unlink()
+                    log_archive.record_run(
+                        self.run_id, self.filename.parent,
+                        ended=datetime.now().isoformat(timespec="seconds")
+                    )
+        finally:
+            self.release()
+        super().close()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers whenever the queue goes idle"""
+
+    def __init__(self, log_queue, *handlers, flush_interval=1.0):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, self.flush_interval)
+            except queue.Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    handler.flush()
+
+    def stop(self):
+        super().stop()
+        for handler in self.handlers:
+            handler.close()
+
+
+def setup_logger(level=logging.INFO, max_bytes=MAX_LOG_BYTES, max_age=MAX_LOG_AGE,
+                 max_runs=log_archive.MAX_RUNS, max_age_days=log_archive.MAX_AGE_DAYS):
+    """Configure logging for the installer.
+
+    Records are handed to a queue on the calling thread; a background
+    listener writes them as JSON Lines to logs/install_YYYYMMDD_HHMMSS.jsonl
+    in batches and as human-readable text to the console. The file rotates at
+    max_bytes/max_age, closed files are compressed, and runs beyond the
+    retention policy are deleted; logs/index.json lists the remaining runs.
+    Safe to call more than once; later calls return the configured logger.
+    """
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    with _setup_lock:
+        if _listener is not None:
+            return logger
+
+        log_dir = log_archive.LOG_DIR
+        log_dir.mkdir(exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id = f"install_{timestamp}"
+        log_file = log_dir / f"{run_id}.jsonl"
+        log_archive.record_run(run_id, log_dir, files=[log_file.name])
+        log_archive.apply_retention(log_dir, max_runs, max_age_days, keep=(run_id,))
+
+        file_handler = BatchedFileHandler(log_file, max_bytes=max_bytes, max_age=max_age, run_id=run_id)
+        file_handler.setFormatter(JsonLinesFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        _listener = BatchingQueueListener(log_queue, file_handler, console_handler)
+        _listener.start()
+        atexit.register(shutdown_logger)
+
+        logger.setLevel(level)
+        logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+        logger.propagate = False
+    return logger
+
+
+def shutdown_logger():
+    """Stop the background listener, flushing any buffered records"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            logging.getLogger(LOGGER_NAME).handlers = []
+
+
+def log_command(stage, command, duration, exit_code, level=logging.INFO):
+    """Record a finished command as a structured entry"""
+    logger = logging.getLogger(LOGGER_NAME)
+    if isinstance(command, (list, tuple)):
+        command = " ".join(str(part) for part in command)
+    logger.log(
+        level,
+        f"{stage}: exit code {exit_code} after {duration:.2f}s",
+        extra={"stage": stage, "command": command, "duration": round(duration, 3), "exit_code": exit_code}
     )
-    
-    return logging.getLogger("ROCm_installer")
+
 
 def log_system_info():
     """Log system information at the start of installation"""
-    logger = logging.getLogger("ROCm_installer")
-    
+    logger = logging.getLogger(LOGGER_NAME)
+
     import platform
     import sys
-    
+
     logger.info("=== System Information ===")
     logger.info(f"OS: {platform.system()} {platform.release()}")
     logger.info(f"Python Version: {sys.version}")
     logger.info(f"Machine: {platform.machine()}")
-    logger.info("=========================")
\ No newline at end of file
+    logger.info("=========================")
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+DEFAULT_TTL = 300  # seconds
+
+# Environment variables that change what an idempotent probe would report
+FINGERPRINT_VARS = ("PATH", "DOCKER_HOST", "DOCKER_CONTEXT", "WSLENV")
+
+
+def environment_fingerprint(executable=None):
+    """Hash the parts of the environment a probe result depends on.
+
+    When an executable is given, its resolved path and mtime are included so
+    installing, upgrading or removing it invalidates cached results without
+    spawning anything.
+    """
+    parts = [os.environ.get(name, "") for name in FINGERPRINT_VARS]
+    if executable:
+        resolved = shutil.which(executable)
+        parts.append(resolved or "<missing>")
+        if resolved:
+            try:
+                parts.append(str(os.stat(resolved).st_mtime_ns))
+            except OSError:
+                pass
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class ProbeCache:
+    """Thread-safe TTL cache for the results of environment probes.
+
+    Keys are tuples whose first element is a namespace (e.g. "docker"), which
+    is what invalidate() matches on. Concurrent callers for the same key wait
+    for a single probe instead of spawning their own.
+    """
+
+    def __init__(self, default_ttl=DEFAULT_TTL):
+        self.default_ttl = default_ttl
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def peek(self, key, fingerprint=""):
+        """Return the cached value, or None if missing or expired"""
+        entry = self._entries.get((key, fingerprint))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def get(self, key, probe, ttl=None, fingerprint=""):
+        """Return the cached result for key, running probe() on a miss"""
+        full_key = (key, fingerprint)
+        entry = self._entries.get(full_key)
+        if entry is not None and entry[0] >= time.monotonic():
+            self.hits += 1
+            return entry[1]
+        with self._key_lock(full_key):
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            value = probe()
+            expires = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+            self._entries[full_key] = (expires, value)
+        self._evict(key, fingerprint)
+        return value
+
+    def _evict(self, key, fingerprint):
+        """Drop key's entries for other fingerprints and any expired entries, with their locks.
+
+        A changed fingerprint means the old result can never be served again;
+        without this a long-running server would keep every one.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for full_key, (expires, _) in list(self._entries.items()):
+                if (full_key[0] == key and full_key[1] != fingerprint) or expires < now:
+                    del self._entries[full_key]
+                    lock = self._key_locks.get(full_key)
+                    if lock is not None and not lock.locked():
+                        del self._key_locks[full_key]
+
+    def invalidate(self, namespace=None):
+        """Drop every entry, or only those whose key starts with namespace"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for full_key in list(self._entries):
+                    if full_key[0][0] == namespace:
+                        del self._entries[full_key]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_probe_cache():
+    """Return the probe cache shared by all sessions in this server process"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProbeCache()
+        return _cache
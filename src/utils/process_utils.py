@@ -0,0 +1,116 @@
+import subprocess
+import threading
+import time
+from collections import deque
+
+DEFAULT_TAIL_LINES = 500
+
+
+def _watch_process(proc, deadline, cancel_event, finished, state):
+    """Kill the process if it runs past its deadline or is cancelled"""
+    while not finished.wait(0.05):
+        if cancel_event is not None and cancel_event.is_set():
+            state["cancelled"] = True
+            proc.kill()
+            return
+        if deadline is not None and time.monotonic() >= deadline:
+            state["timed_out"] = True
+            proc.kill()
+            return
+
+
+def stream_command(cmd, on_line=None, timeout=None, tail_lines=DEFAULT_TAIL_LINES, cancel_event=None):
+    """Run a command, pushing each output line to on_line as it arrives.
+
+    stdout and stderr are merged. Only the last tail_lines lines are kept in
+    memory, so the returned output stays bounded no matter how verbose the
+    child is. Returns (returncode, output); returncode is None if the process
+    was killed because of the timeout or cancel_event.
+    """
+    tail = deque(maxlen=tail_lines)
+    state = {"timed_out": False, "cancelled": False}
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1
+    )
+
+    deadline = time.monotonic() + timeout if timeout else None
+    finished = threading.Event()
+    watcher = threading.Thread(
+        target=_watch_process,
+        args=(proc, deadline, cancel_event, finished, state),
+        daemon=True
+    )
+    watcher.start()
+
+    with proc.stdout:
+        for line in proc.stdout:
+            line = line.rstrip("\r\n")
+            tail.append(line)
+            if on_line is not None:
+                on_line(line)
+
+    returncode = proc.wait()
+    finished.set()
+    watcher.join()
+
+    if state["timed_out"]:
+        tail.append(f"Command timed out after {timeout} seconds")
+        return None, "\n".join(tail)
+    if state["cancelled"]:
+        tail.append("Command cancelled")
+        return None, "\n".join(tail)
+    return returncode, "\n".join(tail)
+
+
+class LiveOutput:
+    """Throttled line sink that redraws a bounded tail into a placeholder"""
+
+    def __init__(self, placeholder, tail_lines=40, min_interval=0.25):
+        self.placeholder = placeholder
+        self.lines = deque(maxlen=tail_lines)
+        self.min_interval = min_interval
+        self._last_draw = 0.0
+
+    def __call__(self, line):
+        self.lines.append(line)
+        now = time.monotonic()
+        if now - self._last_draw >= self.min_interval:
+            self._last_draw = now
+            self.flush()
+
+    def flush(self):
+        """Redraw the current tail regardless of the throttle"""
+        self.placeholder.code("\n".join(self.lines))
+
+    def clear(self):
+        """Remove the live view once the command has finished"""
+        self.placeholder.empty()
+
+
+class LiveText:
+    """Throttled sink for streamed text (e.g. LLM tokens) shown as markdown"""
+
+    def __init__(self, placeholder, prefix="", min_interval=0.05):
+        self.placeholder = placeholder
+        self.prefix = prefix
+        self.parts = []
+        self.min_interval = min_interval
+        self._last_draw = 0.0
+
+    def __call__(self, text):
+        self.parts.append(text)
+        now = time.monotonic()
+        if now - self._last_draw >= self.min_interval:
+            self._last_draw = now
+            self.flush()
+
+    def flush(self):
+        self.placeholder.markdown(self.prefix + "".join(self.parts))
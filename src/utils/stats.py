@@ -0,0 +1,33 @@
+"""Latency statistics shared by the batch runner and the benchmarks.
+
+The examples are checked with: python -m doctest src/utils/stats.py
+"""
+import math
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list: the smallest value with fraction of the values at or below it
+
+    >>> percentile(range(1, 11), 0.50), percentile(range(1, 101), 0.95), percentile(range(1, 101), 0.99)
+    (5, 95, 99)
+    >>> percentile(range(1, 101), 0.07), percentile([3, 1, 2], 0.0), percentile([3, 1, 2], 1.0)
+    (7, 1, 3)
+    """
+    ordered = sorted(values)
+    # Round away float noise first: 0.07 * 100 is 7.000000000000001, whose ceiling would skip a rank
+    rank = max(math.ceil(round(fraction * len(ordered), 9)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def distribution(values, scale=1000):
+    """p50/p95/p99/mean/max of values (seconds scaled to ms by default), or None if empty"""
+    if not values:
+        return None
+    scaled = [value * scale for value in values]
+    return {
+        "p50": round(percentile(scaled, 0.50), 3),
+        "p95": round(percentile(scaled, 0.95), 3),
+        "p99": round(percentile(scaled, 0.99), 3),
+        "mean": round(sum(scaled) / len(scaled), 3),
+        "max": round(max(scaled), 3)
+    }
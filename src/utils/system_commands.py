@@ -0,0 +1,255 @@
+import json
+import logging
+import subprocess
+import time
+from collections import deque
+from pathlib import Path
+
+from .config import get_config
+from .docker_api import DockerAPIError, get_docker_api, message_text
+from .logging_utils import log_command
+from .probe_cache import get_probe_cache, environment_fingerprint
+from .process_utils import stream_command, DEFAULT_TAIL_LINES
+from .tracing import get_tracer
+from .wsl_session import get_wsl_pool, SessionBusy
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+DOCKERFILE_DIGEST_LABEL = "rocm-installer.dockerfile-digest"  # set on images built here; see dockerfile_changed
+
+
+def run_powershell_script(script_name, params="", on_line=None, cancel_event=None):
+    """Execute a PowerShell script, streaming output lines to on_line"""
+    try:
+        script_path = SCRIPTS_DIR / script_name
+
+        if not script_path.exists():
+            return False, f"Script not found: {script_path}"
+
+        cmd = ["powershell", "-ExecutionPolicy", "Bypass", "-File", str(script_path)]
+        if params:
+            cmd.append(params)
+
+        start = time.monotonic()
+        with get_tracer().span(script_name, "subprocess") as span:
+            returncode, output = stream_command(
+                cmd,
+                on_line=on_line,
+                timeout=300,  # 5 minutes timeout
+                cancel_event=cancel_event
+            )
+            span["exit_code"] = returncode
+        log_command(script_path.stem, cmd, time.monotonic() - start, returncode,
+                    logging.INFO if returncode == 0 else logging.ERROR)
+
+        return returncode == 0, output
+    except Exception as e:
+        if on_line is not None:
+            on_line(f"Error: {str(e)}")
+        return False, f"Error: {str(e)}"
+
+
+def run_wsl_command(command, description="", on_line=None, cancel_event=None):
+    """Execute a command in WSL, streaming output lines to on_line"""
+    try:
+        if on_line is not None:
+            on_line(f"Executing WSL command: {description or command}")
+        start = time.monotonic()
+        with get_tracer().span(f"wsl: {description or command}", "subprocess", command=command) as span:
+            returncode, output = get_wsl_pool().run(
+                command,
+                on_line=on_line,
+                timeout=600,  # 10 minutes timeout
+                cancel_event=cancel_event
+            )
+            span["exit_code"] = returncode
+        log_command(description or "wsl", command, time.monotonic() - start, returncode,
+                    logging.INFO if returncode == 0 else logging.ERROR)
+        return returncode == 0, output
+    except Exception as e:
+        if on_line is not None:
+            on_line(f"Error: {str(e)}")
+        return False, f"Error: {str(e)}"
+
+
+def run_wsl_batch(commands, timeout=120):
+    """Execute several short probe commands in WSL in a single round trip"""
+    try:
+        results = get_wsl_pool().run_batch(commands, timeout=timeout)
+        return [(returncode == 0, output) for returncode, output in results]
+    except Exception as e:
+        return [(False, f"Error: {str(e)}") for _ in commands]
+
+
+def run_docker(args, on_line=None, timeout=120, cancel_event=None, quiet=False):
+    """Run the docker CLI with args, streaming output lines to on_line; returns (success, output).
+
+    quiet logs failures at DEBUG, for probes where failing is an answer.
+    """
+    cmd = ["docker", *args]
+    try:
+        start = time.monotonic()
+        with get_tracer().span(f"docker {args[0]}", "subprocess", command=" ".join(cmd)) as span:
+            returncode, output = stream_command(cmd, on_line=on_line, timeout=timeout, cancel_event=cancel_event)
+            span["exit_code"] = returncode
+        log_command(f"docker {args[0]}", cmd, time.monotonic() - start, returncode,
+                    logging.INFO if returncode == 0 else logging.DEBUG if quiet else logging.ERROR)
+        return returncode == 0, output
+    except Exception as e:
+        if on_line is not None:
+            on_line(f"Error: {str(e)}")
+        return False, f"Error: {str(e)}"
+
+
+def docker_api_available():
+    """True if the Docker Engine API answers on its socket; otherwise callers use the CLI"""
+    try:
+        return get_docker_api().ping()
+    except DockerAPIError:
+        return False
+
+
+def docker_installed():
+    """Check if Docker Desktop is installed and running (cached across reruns).
+
+    Asks the Engine API first (one round trip on a kept-alive socket) and
+    falls back to spawning docker --version when the socket is unavailable.
+    """
+    def probe():
+        if docker_api_available():
+            return True
+        try:
+            result = subprocess.run(["docker", "--version"], capture_output=True, text=True)
+            return result.returncode == 0
+        except FileNotFoundError:
+            return False
+
+    return get_probe_cache().get(
+        ("docker", "--version"), probe, ttl=60, fingerprint=environment_fingerprint("docker")
+    )
+
+
+def docker_version():
+    """Engine and API version from the Engine API, or None without it (cached)"""
+    def probe():
+        try:
+            version = get_docker_api().version()
+        except DockerAPIError:
+            return None
+        return {"version": version.get("Version"), "api_version": version.get("ApiVersion")}
+
+    return get_probe_cache().get(("docker", "version"), probe, ttl=60, fingerprint=environment_fingerprint("docker"))
+
+
+def build_image(image, context, on_line=None, cancel_event=None, labels=None):
+    """Build image from the context directory, streaming progress lines; returns (success, output).
+
+    Uses the Engine API when it answers, so progress arrives as structured
+    messages, and docker build otherwise.
+    """
+    try:
+        return _build_image(image, context, on_line, cancel_event, labels)
+    finally:
+        get_probe_cache().invalidate("docker")  # image_labels() must see the new image
+
+
+def _build_image(image, context, on_line, cancel_event, labels):
+    if not docker_api_available():
+        label_args = [arg for key, value in (labels or {}).items() for arg in ("--label", f"{key}={value}")]
+        return run_docker(["build", "-t", image, *label_args, str(context)], on_line=on_line, timeout=3600,
+                          cancel_event=cancel_event)
+    lines = deque(maxlen=DEFAULT_TAIL_LINES)
+
+    def emit(line):
+        lines.append(line)
+        if on_line is not None:
+            on_line(line)
+
+    start = time.monotonic()
+    success = False
+    with get_tracer().span(f"docker build {image}", "subprocess", api=True) as span:
+        try:
+            for message in get_docker_api().build(context, image, labels=labels):
+                if cancel_event is not None and cancel_event.is_set():
+                    emit("Build cancelled")  # closing the stream makes the daemon stop the build
+                    break
+                text = message_text(message)
+                if text:
+                    emit(text)
+            else:
+                success = True
+        except DockerAPIError as e:
+            emit(f"Error: {e}")
+        except OSError as e:
+            emit(f"Error: could not read the build context: {e}")
+        span["success"] = success
+    log_command("docker build", f"POST /build t={image} {context}", time.monotonic() - start, 0 if success else 1,
+                logging.INFO if success else logging.ERROR)
+    return success, "\n".join(lines)
+
+
+def image_labels(image):
+    """Labels of a local image ({} if it has none), or None if it has not been built (cached)"""
+    def probe():
+        try:
+            info = get_docker_api().inspect_image(image)
+            return None if info is None else (info.get("Config") or {}).get("Labels") or {}
+        except DockerAPIError:
+            pass
+        success, output = run_docker(["image", "inspect", "--format", "{{json .Config.Labels}}", image], timeout=30,
+                                     quiet=True)
+        if not success:
+            return None
+        try:
+            return json.loads(output) or {}
+        except ValueError:
+            return None
+
+    return get_probe_cache().get(("docker", "image", image), probe, ttl=60, fingerprint=environment_fingerprint("docker"))
+
+
+def dockerfile_changed(image, dockerfile):
+    """Whether image was built from another revision of dockerfile (a parsed Dockerfile); None if unknown.
+
+    Unknown covers an image that is not built or was built without the digest label.
+    """
+    digest = (image_labels(image) or {}).get(DOCKERFILE_DIGEST_LABEL)
+    return None if digest is None else digest != dockerfile.digest
+
+
+WSL_PROBE_TIMEOUT = 30  # seconds, including the wait for a session that install jobs may be holding
+
+# Idempotent WSL probes, run together in one round trip and cached
+WSL_PROBES = {
+    "ROCm": "rocminfo >/dev/null 2>&1 && echo installed || echo missing",
+    "Python": "python3 --version",
+    "PyTorch": "python3 -c 'import torch; print(torch.__version__)'"
+}
+
+
+def probe_wsl_environment():
+    """Report ROCm, Python and PyTorch status inside WSL (cached).
+
+    Raises SessionBusy, and caches nothing, if install jobs hold every WSL
+    session for longer than WSL_PROBE_TIMEOUT.
+    """
+    def probe():
+        try:
+            results = get_wsl_pool().run_batch(list(WSL_PROBES.values()), timeout=WSL_PROBE_TIMEOUT)
+            results = [(returncode == 0, output) for returncode, output in results]
+        except SessionBusy:
+            raise
+        except Exception as e:
+            results = [(False, f"Error: {str(e)}") for _ in WSL_PROBES]
+        return {
+            name: (output.strip() if success else "not available")
+            for name, (success, output) in zip(WSL_PROBES, results)
+        }
+
+    return get_probe_cache().get(
+        ("wsl", "environment"), probe, fingerprint=environment_fingerprint("wsl")
+    )
+
+
+def load_config():
+    """Load LLM configuration as a dict (parsed once, reloaded when the file changes)"""
+    return get_config().as_dict()
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+TRACE_DIR = Path(__file__).parent.parent.parent / "logs" / "traces"
+
+
+class Tracer:
+    """Record timed spans and persist each one as a JSON line.
+
+    Spans nest naturally: the Chrome trace viewer stacks spans on the same
+    thread by their start time and duration, so a stage span encloses the
+    subprocess spans that ran inside it.
+    """
+
+    def __init__(self, trace_path=None, max_spans=10000):
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.max_spans = max_spans
+        self._spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, category="stage", **args):
+        """Time the with-block; the yielded dict can collect extra args"""
+        start = time.time()
+        start_counter = time.perf_counter()
+        status = "ok"
+        try:
+            yield args
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            duration = time.perf_counter() - start_counter
+            self.record(name, category, start, duration, status=status, **args)
+
+    def record(self, name, category, start, duration, **args):
+        """Add a finished span; start is epoch seconds, duration seconds"""
+        span = {
+            "name": name,
+            "cat": category,
+            "ts": int(start * 1e6),
+            "dur": int(duration * 1e6),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "thread": threading.current_thread().name,
+            "args": args
+        }
+        with self._lock:
+            self._spans.append(span)
+            if len(self._spans) > self.max_spans:
+                del self._spans[:len(self._spans) - self.max_spans]
+            if self.trace_path is not None:
+                self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.trace_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span, default=str) + "\n")
+        return span
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+
+def load_spans(path):
+    """Read spans persisted by a Tracer"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def to_chrome_trace(spans):
+    """Convert spans to the Chrome trace event format (chrome://tracing, Perfetto)"""
+    events = []
+    threads = {}
+    for span in spans:
+        events.append({
+            "name": span["name"],
+            "cat": span["cat"],
+            "ph": "X",
+            "ts": span["ts"],
+            "dur": span["dur"],
+            "pid": span["pid"],
+            "tid": span["tid"],
+            "args": span.get("args", {})
+        })
+        threads[(span["pid"], span["tid"])] = span.get("thread", str(span["tid"]))
+    for (pid, tid), thread_name in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(spans, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_chrome_trace(spans), f)
+    return Path(path)
+
+
+def summarize(spans):
+    """Return {name: (count, total seconds, max seconds)} sorted by total time"""
+    totals = {}
+    for span in spans:
+        count, total, longest = totals.get(span["name"], (0, 0.0, 0.0))
+        seconds = span["dur"] / 1e6
+        totals[span["name"]] = (count + 1, total + seconds, max(longest, seconds))
+    return dict(sorted(totals.items(), key=lambda item: item[1][1], reverse=True))
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Return the process-wide tracer, persisting to logs/traces/"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(TRACE_DIR / f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        return _tracer
+
+
+def set_tracer(tracer):
+    """Replace the process-wide tracer, e.g. with an in-memory one for benchmarks"""
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer
@@ -0,0 +1,248 @@
+import os
+import queue
+import shlex
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+WSL_DISTRO = "Ubuntu-22.04"
+WSL_SHELL = ["wsl", "-d", WSL_DISTRO, "-e", "bash", "--noprofile", "--norc"]
+
+_EOF = object()
+
+
+class SessionError(Exception):
+    """Raised when a shell session dies or stops following the protocol"""
+
+
+class SessionBusy(SessionError):
+    """Raised when every pooled session stays busy past the caller's deadline"""
+
+
+class ShellSession:
+    """A long-lived shell that runs commands over its stdin/stdout.
+
+    Each command runs in a subshell with stdin from /dev/null and stderr
+    merged into stdout, followed by a unique sentinel line carrying the exit
+    code, so many commands can share one process (and one WSL attach).
+    """
+
+    def __init__(self, argv=None):
+        self.argv = list(argv or WSL_SHELL)
+        self._proc = subprocess.Popen(
+            self.argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+        self._lines = queue.Queue()
+        self._carry = deque()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+        self.commands_run = 0
+
+    def _read(self):
+        # Hand lines over in per-read batches; a queue operation per line
+        # would cap throughput for verbose commands
+        fd = self._proc.stdout.fileno()
+        pending = b""
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            pending += chunk
+            if b"\n" in chunk:
+                *lines, pending = pending.split(b"\n")
+                self._lines.put([line.decode("utf-8", errors="replace").rstrip("\r") for line in lines])
+        if pending:
+            self._lines.put([pending.decode("utf-8", errors="replace").rstrip("\r")])
+        self._lines.put(_EOF)
+
+    def _next_line(self, timeout):
+        """Return the next output line or _EOF; raises queue.Empty on timeout"""
+        if not self._carry:
+            batch = self._lines.get(timeout=timeout)
+            if batch is _EOF:
+                return _EOF
+            self._carry.extend(batch)
+        return self._carry.popleft()
+
+    @property
+    def alive(self):
+        return self._proc.poll() is None
+
+    def _send(self, commands):
+        sentinels = []
+        script = []
+        for command in commands:
+            sentinel = f"__ROCM_DONE_{uuid.uuid4().hex}__"
+            sentinels.append(sentinel)
+            # eval of a quoted string: a syntax error in command fails the subshell with exit 2
+            # instead of leaving the session's shell waiting for a closing quote or bracket
+            script.append(f"( eval {shlex.quote(command)}\n) < /dev/null 2>&1; printf '\\n%s %d\\n' '{sentinel}' $?\n")
+        try:
+            self._proc.stdin.write("".join(script).encode("utf-8"))
+            self._proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.close()
+            raise SessionError(f"Shell session is not running: {e}")
+        return sentinels
+
+    def _collect(self, sentinel, deadline, on_line, cancel_event, tail_lines):
+        tail = deque(maxlen=tail_lines)
+        held = None  # one line of lookahead: the sentinel is preceded by an extra newline
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                self.close()
+                tail.append("Command cancelled")
+                return None, "\n".join(tail)
+            wait = 0.1
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.close()
+                    tail.append("Command timed out")
+                    return None, "\n".join(tail)
+                wait = min(wait, remaining)
+            try:
+                line = self._next_line(wait)
+            except queue.Empty:
+                continue
+            if line is _EOF:
+                self.close()
+                raise SessionError("Shell session exited unexpectedly")
+            if line.startswith(sentinel):
+                if held:
+                    tail.append(held)
+                    if on_line is not None:
+                        on_line(held)
+                self.commands_run += 1
+                return int(line[len(sentinel):].strip()), "\n".join(tail)
+            if held is not None:
+                tail.append(held)
+                if on_line is not None:
+                    on_line(held)
+            held = line
+
+    def run(self, command, timeout=None, on_line=None, cancel_event=None, tail_lines=500):
+        """Run one command and return (returncode, output).
+
+        returncode is None if the command timed out or was cancelled; the
+        session is killed in that case because it is mid-command.
+        """
+        sentinel = self._send([command])[0]
+        deadline = time.monotonic() + timeout if timeout else None
+        return self._collect(sentinel, deadline, on_line, cancel_event, tail_lines)
+
+    def run_batch(self, commands, timeout=None, tail_lines=500):
+        """Run several commands in one round trip; returns a list of results"""
+        sentinels = self._send(commands)
+        deadline = time.monotonic() + timeout if timeout else None
+        results = []
+        for sentinel in sentinels:
+            if not self.alive:
+                results.append((None, "Skipped: session closed by an earlier timeout"))
+                continue
+            results.append(self._collect(sentinel, deadline, None, None, tail_lines))
+        return results
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.wait()
+
+
+class SessionPool:
+    """A small pool of ShellSessions; dead sessions are replaced on demand"""
+
+    def __init__(self, argv=None, size=2):
+        self.argv = list(argv or WSL_SHELL)
+        self.size = size
+        self._idle = []
+        self._count = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def session(self, deadline=None, cancel_event=None):
+        """Borrow a live session for the duration of a with-block.
+
+        Raises SessionError if none frees up before deadline (a
+        time.monotonic() value) or cancel_event is set.
+        """
+        session = self._acquire(deadline, cancel_event)
+        try:
+            yield session
+        finally:
+            self._release(session)
+
+    def _acquire(self, deadline=None, cancel_event=None):
+        with self._cond:
+            while True:
+                while self._idle:
+                    session = self._idle.pop()
+                    if session.alive:
+                        return session
+                    self._count -= 1
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                if cancel_event is not None and cancel_event.is_set():
+                    raise SessionError("Cancelled while waiting for a WSL session")
+                wait = None if cancel_event is None else 0.1
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise SessionBusy(f"WSL sessions busy: all {self.size} are running other commands")
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+        try:
+            return ShellSession(self.argv)
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, session):
+        with self._cond:
+            if session.alive:
+                self._idle.append(session)
+            else:
+                self._count -= 1
+            self._cond.notify()
+
+    def run(self, command, timeout=None, on_line=None, cancel_event=None):
+        """Run a command on a pooled session; the wait for a free session counts against timeout"""
+        deadline = time.monotonic() + timeout if timeout else None
+        with self.session(deadline, cancel_event) as session:
+            remaining = max(deadline - time.monotonic(), 0.001) if deadline is not None else None
+            return session.run(command, timeout=remaining, on_line=on_line, cancel_event=cancel_event)
+
+    def run_batch(self, commands, timeout=None):
+        deadline = time.monotonic() + timeout if timeout else None
+        with self.session(deadline) as session:
+            remaining = max(deadline - time.monotonic(), 0.001) if deadline is not None else None
+            return session.run_batch(commands, timeout=remaining)
+
+    def close(self):
+        with self._cond:
+            for session in self._idle:
+                session.close()
+            self._count -= len(self._idle)
+            self._idle = []
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_wsl_pool(argv=None, size=2):
+    """Return the process-wide session pool for argv (WSL bash by default)"""
+    key = tuple(argv or WSL_SHELL)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SessionPool(key, size=size)
+        return _pools[key]